@@ -3,30 +3,41 @@ Traffic Volume Prediction Dashboard
 A production-quality interactive machine learning dashboard for traffic volume prediction.
 
 Run with: streamlit run app.py
+Profile every rerun: streamlit run app.py -- --profile   (or TRAFFIC_PROFILE=1)
 """
 
 import streamlit as st
 import pandas as pd
 import numpy as np
 from pathlib import Path
+import os
 import sys
 
 # Add utils to path
 sys.path.insert(0, str(Path(__file__).parent))
 
+from utils.streamlit_utils import load_model, load_all_models
 from utils import (
-    load_model,
-    load_all_models,
-    calculate_metrics,
-    calculate_residuals,
     plot_actual_vs_predicted,
     plot_residuals,
     plot_actual_vs_predicted_line,
     plot_model_comparison,
     plot_error_distribution,
+    plot_target_distribution,
     plot_feature_importance,
     get_feature_stats,
-    get_feature_names
+    get_feature_names,
+    PredictionCache,
+    fingerprint_frame,
+    build_feature_schema,
+    get_model_type
+)
+from utils.data_utils import get_feature_schema_path, load_feature_schema
+from utils.importance_utils import get_feature_importances, get_permutation_importance
+from utils.inference_utils import compile_pipeline
+from utils.perf_utils import get_recorder, span, timed, note_cache_miss, format_run
+from utils.profile_utils import (
+    DEFAULT_PROFILE_DIR, PROFILE_DIR_ENV_VAR, Profiler, engine_from_environment, run_id
 )
 
 
@@ -67,6 +78,7 @@ st.markdown("""
 # INITIALIZATION & UTILITIES
 # ============================================================================
 
+@timed('load_data')
 def load_data():
     """
     Load test data with RAW categorical features (not one-hot encoded).
@@ -104,9 +116,11 @@ def load_data():
         return df
 
 
+@timed('get_models', cache='get_models')
 @st.cache_resource
 def get_models():
     """Load all models."""
+    note_cache_miss()
     model_names = ['Linear Regression', 'Decision Tree', 'Random Forest']
     return load_all_models(model_names)
 
@@ -127,46 +141,268 @@ def get_model_predictions(pipeline, X_features):
         numpy array of predictions
     """
     try:
-        return pipeline.predict(X_features)
+        with span(f"get_model_predictions[{get_model_type(pipeline)}]"):
+            return pipeline.predict(X_features)
     except Exception as e:
         st.error(f"Error making predictions: {str(e)}")
         return None
 
 
-def get_feature_importance(pipeline, feature_names):
+@timed('get_compiled_model', cache='get_compiled_model')
+@st.cache_resource
+def get_compiled_model(model_name, pipeline_id, _pipeline):
+    """
+    Compile a pipeline into the flat NumPy predictor used for single-row requests.
+    
+    Args:
+        model_name: Display name of the model
+        pipeline_id: id() of the loaded pipeline, so a reloaded model is recompiled
+        _pipeline: sklearn.pipeline.Pipeline object (not hashed by Streamlit)
+    
+    Returns:
+        CompiledPipeline, or None if the pipeline can't be compiled
+    """
+    note_cache_miss()
+    try:
+        return compile_pipeline(_pipeline)
+    except TypeError:
+        return None
+
+
+@timed('get_single_prediction')
+def get_single_prediction(model_name, pipeline, user_input):
+    """
+    Predict one row of raw feature values.
+    
+    Uses the compiled predictor, which skips sklearn's per-call DataFrame
+    validation and returns the same values as pipeline.predict(); falls back
+    to the pipeline if the model can't be compiled or rejects the input.
+    
+    Args:
+        model_name: Display name of the model
+        pipeline: sklearn.pipeline.Pipeline object
+        user_input: Dictionary of {feature_name: raw value}; None means missing
+    
+    Returns:
+        numpy array with one prediction, or None if prediction failed
+    """
+    # The form offers None for missing values; both paths should see NaN, as in a loaded CSV
+    user_input = {k: (np.nan if v is None else v) for k, v in user_input.items()}
+    compiled = get_compiled_model(model_name, id(pipeline), pipeline)
+    if compiled is not None:
+        try:
+            return compiled.predict(user_input)
+        except ValueError:
+            # Invalid input: let the pipeline report it
+            pass
+    # object dtype keeps a lone NaN in a categorical column from turning the column into float64
+    return get_model_predictions(pipeline, pd.DataFrame([user_input], dtype=object))
+
+
+def get_prediction_cache():
+    """
+    Get the per-session prediction/metrics cache.
+    
+    Predictions and metrics are computed once per (model, dataset) pair and
+    shared by every dashboard section across reruns of the same session.
+    
+    Returns:
+        PredictionCache stored in st.session_state
+    """
+    if 'prediction_cache' not in st.session_state:
+        st.session_state['prediction_cache'] = PredictionCache()
+    return st.session_state['prediction_cache']
+
+
+@timed('get_cached_predictions')
+def get_cached_predictions(model_name, pipeline, X_features, dataset_key):
     """
-    Extract feature importance from the pipeline's underlying model.
+    Get predictions for a model on the dataset, computing them only once per session.
     
-    Handles both tree-based models (feature_importances_) and linear models (coef_).
+    Args:
+        model_name: Name of the model
+        pipeline: sklearn.pipeline.Pipeline object
+        X_features: DataFrame with raw features
+        dataset_key: Fingerprint of the dataset (see fingerprint_frame)
+    
+    Returns:
+        numpy array of predictions, or None if prediction failed
+    """
+    return get_prediction_cache().get_predictions(
+        model_name, pipeline, X_features, dataset_key, predict_fn=get_model_predictions
+    )
+
+
+@timed('get_cached_metrics')
+def get_cached_metrics(model_name, pipeline, X_features, y_true, dataset_key):
+    """
+    Get evaluation metrics for a model on the dataset, computing them only once per session.
     
     Args:
+        model_name: Name of the model
         pipeline: sklearn.pipeline.Pipeline object
-        feature_names: List of original feature names
+        X_features: DataFrame with raw features
+        y_true: Actual target values
+        dataset_key: Fingerprint of the dataset (see fingerprint_frame)
     
     Returns:
-        Dictionary of {feature_name: importance_value}
+        Dictionary of metrics, or None if prediction failed
+    """
+    return get_prediction_cache().get_metrics(
+        model_name, pipeline, X_features, y_true, dataset_key, predict_fn=get_model_predictions
+    )
+
+
+@timed('get_feature_schema', cache='get_feature_schema')
+@st.cache_resource
+def get_feature_schema(schema_mtime, dataset_key, _X_features):
     """
-    importance_dict = {}
+    Get the prediction form's schema (ranges, defaults, vocabularies).
+    
+    Uses feature_schema.json written at training time (encoder vocabularies,
+    training ranges and quantiles). Without it, falls back to scanning the
+    dataset. Either way the schema is built once, so moving a widget doesn't
+    rescan the data.
+    
+    Args:
+        schema_mtime: Modification time of feature_schema.json (None if missing),
+            so a retrained schema is reloaded
+        dataset_key: Fingerprint of the dataset (see fingerprint_frame)
+        _X_features: DataFrame with raw features (not hashed by Streamlit)
+    
+    Returns:
+        Dictionary from build_feature_schema(); 'source' is 'training' or 'dataset'
+    """
+    note_cache_miss()
+    schema = load_feature_schema() if schema_mtime is not None else None
+    if schema is not None:
+        return {**schema, 'source': 'training'}
+    return {**build_feature_schema(_X_features), 'source': 'dataset'}
+
+
+def get_schema_mtime():
+    """Modification time of feature_schema.json, or None if it doesn't exist."""
     try:
-        # Extract the actual model from the pipeline
-        if hasattr(pipeline, 'named_steps') and 'model' in pipeline.named_steps:
-            model = pipeline.named_steps['model']
-        else:
-            model = pipeline
-        
-        # Get feature importance from the model
-        if hasattr(model, 'feature_importances_'):
-            # Tree-based models (Decision Tree, Random Forest)
-            importances = model.feature_importances_
-            importance_dict = dict(zip(feature_names, importances))
-        elif hasattr(model, 'coef_'):
-            # Linear models
-            coefs = np.abs(model.coef_)
-            importance_dict = dict(zip(feature_names, coefs))
+        return os.stat(get_feature_schema_path()).st_mtime
+    except OSError:
+        return None
+
+
+def slider_help(spec):
+    """Help text for a numeric input: the training distribution when the schema has it."""
+    if 'quantiles' not in spec:
+        return None
+    q = spec['quantiles']
+    text = f"Median {q['p50']:,.2f}; 90% of training values in [{q['p05']:,.2f}, {q['p95']:,.2f}]"
+    return text if spec.get('used', True) else text + " - not used by the model"
+
+
+@timed('get_feature_importance')
+def get_feature_importance(pipeline):
+    """
+    Get feature importances of the pipeline's model, labelled with the
+    preprocessor's real output columns and grouped back to raw columns.
+    
+    Handles both tree-based models (feature_importances_) and linear models
+    (|coef_|). Computed once per loaded pipeline (see utils.importance_utils).
+    
+    Args:
+        pipeline: sklearn.pipeline.Pipeline object
+    
+    Returns:
+        Dictionary from compute_feature_importances(), or None if unavailable
+    """
+    try:
+        return get_feature_importances(pipeline)
     except Exception as e:
         st.warning(f"Could not extract feature importance: {str(e)}")
+        return None
+
+
+def show_chart(fig):
+    """Render a Plotly figure, timing Streamlit's serialization of it separately from building it."""
+    with span('st.plotly_chart'):
+        st.plotly_chart(fig)
+
+
+# ============================================================================
+# PERFORMANCE PANEL
+# ============================================================================
+
+# Set to a file path to export metrics after every rerun ('.prom' = Prometheus text, else JSON)
+METRICS_FILE = os.environ.get('DASHBOARD_METRICS_FILE')
+
+# Off unless --profile[=engine] or TRAFFIC_PROFILE is set; one set of files per rerun
+PROFILER = Profiler(
+    engine_from_environment(),
+    os.path.join(os.environ.get(PROFILE_DIR_ENV_VAR, DEFAULT_PROFILE_DIR), 'app')
+)
+
+
+def render_performance_panel(run):
+    """
+    Show where the last rerun spent its time, cache hit rates and process-wide
+    span totals in a collapsible sidebar panel.
     
-    return importance_dict
+    Args:
+        run: RunRecord of the rerun that just finished (see utils.perf_utils)
+    """
+    snapshot = get_recorder().snapshot()
+    
+    with st.sidebar:
+        with st.expander("⏱️ Performance", expanded=False):
+            st.metric("Last rerun", f"{run.elapsed() * 1e3:,.0f} ms",
+                      help=f"Rerun #{snapshot['runs']} of this server process")
+            
+            # Spans of this rerun, nested under their callers; sub-millisecond ones hidden
+            rows = format_run(run, min_seconds=0.001)
+            if rows:
+                st.dataframe(
+                    pd.DataFrame(rows).style.format({'ms': '{:,.1f}', 'Share': '{:.0%}'}),
+                    hide_index=True
+                )
+            if run.dropped:
+                st.caption(f"{run.dropped} further spans not listed")
+            
+            if snapshot['caches']:
+                st.write("**Cache hits / misses**")
+                caches_df = pd.DataFrame([
+                    {'Cache': name, 'Hits': stats['hits'], 'Misses': stats['misses'], 'Hit rate': stats['hit_rate']}
+                    for name, stats in snapshot['caches'].items()
+                ])
+                st.dataframe(caches_df.style.format({'Hit rate': '{:.0%}'}), hide_index=True)
+            
+            st.write("**All reruns**")
+            totals_df = pd.DataFrame([
+                {'Span': name, 'Calls': stats['count'], 'Total ms': stats['total_seconds'] * 1e3,
+                 'Mean ms': stats['mean_seconds'] * 1e3, 'Max ms': stats['max_seconds'] * 1e3}
+                for name, stats in snapshot['spans'].items()
+            ]).sort_values('Total ms', ascending=False)
+            st.dataframe(
+                totals_df.style.format({'Total ms': '{:,.1f}', 'Mean ms': '{:,.2f}', 'Max ms': '{:,.1f}'}),
+                hide_index=True
+            )
+            
+            st.download_button(
+                "⬇️ Prometheus metrics",
+                data=get_recorder().to_prometheus(),
+                file_name="dashboard_metrics.prom",
+                mime="text/plain"
+            )
+            if METRICS_FILE:
+                st.caption(f"Exported after every rerun to {METRICS_FILE}")
+            if PROFILER.enabled:
+                st.caption(f"Profiling every rerun ({PROFILER.engine}) to {PROFILER.output_dir}/")
+
+
+def export_metrics():
+    """Write the process-wide metrics to DASHBOARD_METRICS_FILE, if set."""
+    if not METRICS_FILE:
+        return
+    try:
+        get_recorder().write(METRICS_FILE)
+    except OSError as e:
+        st.sidebar.warning(f"Could not write metrics to {METRICS_FILE}: {str(e)}")
 
 
 # ============================================================================
@@ -196,7 +432,7 @@ def main():
         # Prepare features
         X_test = test_data.drop('traffic_volume', axis=1)
         y_test = test_data['traffic_volume'].values
-        feature_names = list(X_test.columns)
+        dataset_key = fingerprint_frame(test_data)
     
     if not all(models.values()):
         st.error("❌ Could not load all models. Please ensure .pkl files exist in the directory.")
@@ -236,7 +472,10 @@ def main():
         st.text(f"Training samples: {len(y_test)}")
     
     # Calculate predictions for selected model after sidebar is created
-    y_pred = get_model_predictions(selected_model, X_test) if selected_model is not None else None
+    y_pred = (
+        get_cached_predictions(selected_model_name, selected_model, X_test, dataset_key)
+        if selected_model is not None else None
+    )
     
     # ========================================================================
     # SECTION 1: MODEL EVALUATION
@@ -247,7 +486,7 @@ def main():
         
         if y_pred is not None:
             # Calculate metrics
-            metrics = calculate_metrics(y_test, y_pred)
+            metrics = get_cached_metrics(selected_model_name, selected_model, X_test, y_test, dataset_key)
             
             # Display metrics in columns
             col1, col2, col3, col4 = st.columns(4)
@@ -281,17 +520,16 @@ def main():
                 )
             
             # Additional statistics
+            # Residual statistics come from the same fused pass as the metrics
             with st.expander("📋 Detailed Error Statistics"):
-                residuals = calculate_residuals(y_test, y_pred)
-                
                 col1, col2 = st.columns(2)
                 with col1:
-                    st.metric("Mean Error", f"{np.mean(residuals):,.2f}")
-                    st.metric("Max Error", f"{np.max(np.abs(residuals)):,.2f}")
+                    st.metric("Mean Error", f"{metrics['Mean Error']:,.2f}")
+                    st.metric("Max Error", f"{metrics['Max Error']:,.2f}")
                 
                 with col2:
-                    st.metric("Std Error", f"{np.std(residuals):,.2f}")
-                    st.metric("Min Error", f"{np.min(np.abs(residuals)):,.2f}")
+                    st.metric("Std Error", f"{metrics['Std Error']:,.2f}")
+                    st.metric("Min Error", f"{metrics['Min Error']:,.2f}")
     
     # ========================================================================
     # SECTION 2: VISUALIZATIONS
@@ -311,41 +549,43 @@ def main():
             ])
             
             with tab1:
-                st.plotly_chart(
+                show_chart(
                     plot_actual_vs_predicted_line(y_test, y_pred, sample_size=100)
                 )
             
             with tab2:
-                st.plotly_chart(
+                show_chart(
                     plot_actual_vs_predicted(y_test, y_pred)
                 )
             
             with tab3:
-                st.plotly_chart(
+                show_chart(
                     plot_residuals(y_test, y_pred)
                 )
             
             with tab4:
-                residuals = calculate_residuals(y_test, y_pred)
-                st.plotly_chart(
-                    plot_error_distribution(residuals)
+                show_chart(
+                    plot_error_distribution(histogram=get_prediction_cache().get_residual_histogram(
+                        selected_model_name, selected_model, X_test, y_test, dataset_key,
+                        predict_fn=get_model_predictions
+                    ))
                 )
             
             with tab5:
                 # Show metrics comparison with other models
                 all_metrics = {}
                 for model_name, model in models.items():
-                    pred = get_model_predictions(model, X_test)
-                    if pred is not None:
-                        all_metrics[model_name] = calculate_metrics(y_test, pred)
+                    model_metrics = get_cached_metrics(model_name, model, X_test, y_test, dataset_key)
+                    if model_metrics is not None:
+                        all_metrics[model_name] = model_metrics
                 
                 col1, col2 = st.columns(2)
                 with col1:
-                    st.plotly_chart(
+                    show_chart(
                         plot_model_comparison(all_metrics, 'MSE')
                     )
                 with col2:
-                    st.plotly_chart(
+                    show_chart(
                         plot_model_comparison(all_metrics, 'R2 Score')
                     )
     
@@ -359,9 +599,8 @@ def main():
         # Calculate metrics for all models
         comparison_data = []
         for model_name, model in models.items():
-            pred = get_model_predictions(model, X_test)
-            if pred is not None:
-                metrics = calculate_metrics(y_test, pred)
+            metrics = get_cached_metrics(model_name, model, X_test, y_test, dataset_key)
+            if metrics is not None:
                 comparison_data.append({
                     'Model': model_name,
                     'MSE': metrics['MSE'],
@@ -411,12 +650,15 @@ def main():
         The pipeline automatically handles categorical encoding internally!
         """)
         
-        # Create input columns for numerical features
-        numerical_features = X_test.select_dtypes(include=[np.number]).columns.tolist()
-        categorical_features = X_test.select_dtypes(include=['object']).columns.tolist()
+        # Ranges, defaults and vocabularies come from the cached schema, not the data
+        schema = get_feature_schema(get_schema_mtime(), dataset_key, X_test)
+        if schema['source'] == 'training':
+            st.caption(f"Input ranges and options come from the training data ({schema.get('n_rows', 0):,} rows).")
+        else:
+            st.caption("⚠️ feature_schema.json not found (run train_with_pipeline.py); "
+                       "input ranges and options come from the test data.")
         
         user_input = {}
-        test_data_sample = X_test.iloc[0]
         
         # --- NUMERICAL FEATURES ---
         st.subheader("📊 Numerical Features")
@@ -424,68 +666,47 @@ def main():
         col_idx = 0
         cols = [pred_col1, pred_col2, pred_col3]
         
-        for feature in numerical_features:
+        for feature, spec in schema['numerical'].items():
             col = cols[col_idx % 3]
             with col:
-                min_val = float(X_test[feature].min())
-                max_val = float(X_test[feature].max())
-                default_val = float(test_data_sample[feature])
-                
-                # Handle edge case where min == max
-                if min_val == max_val:
-                    # If all values are the same, add small range
-                    max_val = min_val + 1.0
-                    default_val = min_val
-                
-                # Calculate step size, ensuring it's not zero
-                step_size = max(0.01, (max_val - min_val) / 100)
-                
                 user_input[feature] = st.slider(
                     f"{feature}",
-                    min_value=min_val,
-                    max_value=max_val,
-                    value=min(max_val, max(min_val, default_val)),  # Clamp default to valid range
-                    step=step_size,
-                    format="%.2f"
+                    min_value=spec['min'],
+                    max_value=spec['max'],
+                    value=spec['default'],
+                    step=spec['step'],
+                    format="%.2f",
+                    help=slider_help(spec)
                 )
             col_idx += 1
         
         # --- CATEGORICAL FEATURES ---
-        if categorical_features:
+        if schema['categorical']:
             st.subheader("🏷️ Categorical Features")
             cat_col1, cat_col2, cat_col3 = st.columns(3)
             cat_idx = 0
             cat_cols = [cat_col1, cat_col2, cat_col3]
             
-            for feature in categorical_features:
+            for feature, spec in schema['categorical'].items():
                 col = cat_cols[cat_idx % 3]
                 with col:
-                    unique_values = [None] + sorted(X_test[feature].dropna().unique().tolist())
-                    default_idx = 0
-                    if pd.notna(test_data_sample[feature]):
-                        try:
-                            default_idx = unique_values.index(test_data_sample[feature])
-                        except ValueError:
-                            default_idx = 0
-                    
                     user_input[feature] = st.selectbox(
                         f"{feature}",
-                        options=unique_values,
-                        index=default_idx,
+                        options=spec['options'],
+                        index=spec['default_index'],
                         help=f"Select a value for {feature} (None = NaN)"
+                        + ("" if spec.get('used', True) else " - not used by the model")
                     )
                 cat_idx += 1
         
         # Prediction button
         if st.button("🔮 Predict Traffic Volume"):
-            # Prepare input DataFrame with raw values (NO manual encoding)
-            input_df = pd.DataFrame([user_input])
-            
-            # Pipeline automatically handles:
+            # Raw values go straight in (NO manual encoding); the compiled
+            # pipeline handles:
             # 1. OneHotEncoding of categorical features
             # 2. StandardScaling of numerical features
             # 3. Model prediction
-            prediction = get_model_predictions(selected_model, input_df)
+            prediction = get_single_prediction(selected_model_name, selected_model, user_input)
             
             if prediction is not None:
                 st.divider()
@@ -502,7 +723,7 @@ def main():
                 
                 with col2:
                     # Get confidence based on R2 score
-                    metrics = calculate_metrics(y_test, get_model_predictions(selected_model, X_test))
+                    metrics = get_cached_metrics(selected_model_name, selected_model, X_test, y_test, dataset_key)
                     confidence = max(0, metrics['R2 Score'] * 100)
                     st.metric(
                         "Model Confidence",
@@ -538,24 +759,43 @@ def main():
         with tab1:
             st.subheader("🎯 Feature Importance")
             
-            importance_dict = get_feature_importance(selected_model, feature_names)
+            importances = get_feature_importance(selected_model)
             
-            if importance_dict:
-                st.plotly_chart(
+            if importances:
+                group_by_column = st.toggle(
+                    "Group one-hot columns by input feature", value=True,
+                    help="Sum the importances of e.g. every weather_main_* column into weather_main"
+                )
+                importance_dict = importances['grouped' if group_by_column else 'encoded']
+                show_chart(
                     plot_feature_importance(importance_dict, top_n=15)
                 )
+                if importances['kind'] == 'coefficient':
+                    st.caption("Linear model: importance is |coefficient| on the scaled inputs.")
                 
-                # Show importance values in table
+                # Show importance values in table (already sorted by importance)
                 with st.expander("📊 Feature Importance Values"):
-                    importance_df = pd.DataFrame([
-                        {'Feature': k, 'Importance': v}
-                        for k, v in sorted(importance_dict.items(), key=lambda x: x[1], reverse=True)
-                    ])
+                    importance_df = pd.DataFrame(list(importance_dict.items()), columns=['Feature', 'Importance'])
                     st.dataframe(
                         importance_df.style.format({'Importance': '{:.6f}'})
                     )
             else:
-                st.info("Feature importance not available for this model")
+                st.info("Feature importance not available for this model; try permutation importance below")
+            
+            # Model-agnostic alternative: score drop when one raw column is shuffled
+            if st.checkbox("🔀 Permutation importance (test set)",
+                           help="Drop in R² when each raw input column is shuffled, averaged over 5 repeats"):
+                with st.spinner("Computing permutation importance..."):
+                    permutation = get_permutation_importance(
+                        selected_model, X_test, y_test, dataset_key=dataset_key
+                    )
+                show_chart(
+                    plot_feature_importance(permutation['importances'], top_n=15)
+                )
+                st.caption(
+                    f"Baseline R² {permutation['baseline']['R2 Score']:.4f} on {permutation['n_rows']:,} rows, "
+                    f"{permutation['n_repeats']} repeats per column ({permutation['seconds']:.2f}s)."
+                )
         
         with tab2:
             st.subheader("📈 Feature Statistics")
@@ -579,19 +819,10 @@ def main():
             with col4:
                 st.metric("Count", f"{len(y_test)}")
             
-            # Distribution plot
-            import plotly.graph_objects as go
-            fig = go.Figure(data=[
-                go.Histogram(x=y_test, nbinsx=30, marker_color='rgba(31, 119, 180, 0.7)')
-            ])
-            fig.update_layout(
-                title="Traffic Volume Distribution",
-                xaxis_title="Traffic Volume",
-                yaxis_title="Frequency",
-                template='plotly_white',
-                height=400
+            # Distribution plot (bins computed once per dataset)
+            show_chart(
+                plot_target_distribution(histogram=get_prediction_cache().get_target_histogram(y_test, dataset_key))
             )
-            st.plotly_chart(fig)
     
     # ========================================================================
     # FOOTER
@@ -608,4 +839,8 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    with PROFILER.profile(run_id('rerun')):
+        with get_recorder().run() as run:
+            main()
+        render_performance_panel(run)
+        export_metrics()
@@ -0,0 +1,89 @@
+"""
+Benchmark loading datafile.csv with pd.read_csv versus the columnar cache.
+
+Each loader runs in a fresh interpreter. Resident memory is the growth in
+RSS after loading and summing every numeric column (Linux /proc only);
+memory-mapped pages count once touched but are shared between processes.
+
+Usage:
+    python benchmarks/bench_data_load.py
+    python benchmarks/bench_data_load.py --rows 5000000   # tile datafile.csv to 5M rows
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+LOADERS = {
+    'pd.read_csv': "df = pd.read_csv(path)",
+    'cache (mmap)': "df = load_raw_data(path)",
+    'cache (in memory)': "df = load_raw_data(path, mmap=False)",
+}
+
+# Runs in the child: time the load, then touch every column as a consumer would
+CHILD = """
+import json, os, sys, time
+import pandas as pd
+sys.path.insert(0, {root!r})
+from utils.data_utils import load_raw_data
+
+def rss_mb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+
+path = {path!r}
+base_rss = rss_mb()
+start = time.perf_counter()
+{statement}
+load_time = time.perf_counter() - start
+checksum = float(df.select_dtypes('number').sum().sum())
+print(json.dumps({{'load_s': load_time, 'rss_mb': rss_mb() - base_rss, 'checksum': checksum}}))
+"""
+
+
+def run_loader(path: Path, statement: str) -> dict:
+    code = CHILD.format(root=str(PROJECT_ROOT), path=str(path), statement=statement)
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def make_csv(rows: int, directory: Path) -> Path:
+    source = pd.read_csv(PROJECT_ROOT / 'datafile.csv')
+    repeats = -(-rows // len(source))
+    path = directory / 'datafile.csv'
+    pd.concat([source] * repeats, ignore_index=True).head(rows).to_csv(path, index=False)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark raw data loading")
+    parser.add_argument('--rows', type=int, default=None,
+                        help="Tile datafile.csv to this many rows (default: use it as is)")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = make_csv(args.rows, Path(tmp)) if args.rows else PROJECT_ROOT / 'datafile.csv'
+        # Build the cache up front so only warm loads are timed
+        run_loader(path, LOADERS['cache (mmap)'])
+
+        print(f"Source: {path} ({path.stat().st_size / 2**20:.1f} MB)")
+        print(f"{'Loader':20} {'Load (ms)':>10} {'RSS (MB)':>14}")
+        print("-" * 46)
+        for name, statement in LOADERS.items():
+            results = [run_loader(path, statement) for _ in range(args.repeat)]
+            best = min(results, key=lambda r: r['load_s'])
+            print(f"{name:20} {best['load_s'] * 1000:>10.1f} {best['rss_mb']:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmark date_time feature extraction against the pd.to_datetime + .dt path.
+
+The timestamps of datafile.csv are tiled to each requested size, so the
+ratio of rows to unique timestamps grows with the input, as it does for
+longer multi-sensor histories.
+
+Usage:
+    python benchmarks/bench_features.py
+    python benchmarks/bench_features.py --sizes 1000000 5000000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.feature_utils import _pandas_datetime_features, extract_datetime_features
+
+
+def best_of(func, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark date_time feature extraction")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[48_204, 1_000_000, 5_000_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    project_root = Path(__file__).resolve().parent.parent
+    source = pd.read_csv(project_root / 'datafile.csv', usecols=['date_time'])['date_time']
+
+    print(f"{'Rows':>12} {'Input':>12} {'pandas (ms)':>12} {'fast (ms)':>10} {'speedup':>8}")
+    print("-" * 58)
+    for n_rows in args.sizes:
+        repeats = -(-n_rows // len(source))
+        strings = pd.Series(np.tile(source.to_numpy(), repeats)[:n_rows])
+        for label, date_time in [('strings', strings), ('categorical', strings.astype('category'))]:
+            t_pandas, expected = best_of(lambda: _pandas_datetime_features(date_time), args.repeat)
+            t_fast, result = best_of(lambda: extract_datetime_features(date_time), args.repeat)
+            pd.testing.assert_frame_equal(result, expected)
+            print(f"{n_rows:>12,} {label:>12} {t_pandas * 1000:>12.1f} {t_fast * 1000:>10.1f} "
+                  f"{t_pandas / t_fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
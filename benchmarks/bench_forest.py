@@ -0,0 +1,119 @@
+"""
+Benchmark the packed tree-ensemble evaluator against sklearn's predict.
+
+Both sides get the same encoded float32 matrix (the preprocessor is applied
+once up front), so only the tree evaluation is compared. Rows are tiled from
+test_data.csv to each batch size.
+
+PackedForest walks small batches level by level in NumPy ("block") and
+larger ones with sklearn's compiled Tree.apply on the packed nodes
+("native"); "packed" is what predict() picks. The last line reports the
+smallest measured size from which the native walk wins, per tree, which is
+what _NATIVE_ROWS_PER_TREE in utils/inference_utils.py is calibrated from.
+
+Usage:
+    python benchmarks/bench_forest.py
+    python benchmarks/bench_forest.py --model "Decision Tree" --sizes 1 1000 100000
+    python benchmarks/bench_forest.py --sizes 8 16 32 64 128 256 512
+"""
+
+import argparse
+import pickle
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from utils.inference_utils import _NATIVE_ROWS_PER_TREE, _PAIRS_PER_BLOCK, PackedForest  # noqa: E402
+from utils.model_utils import get_model_path  # noqa: E402
+
+
+# Largest batch the level-wise walk is timed on
+MAX_BLOCK_ROWS = 100_000
+
+
+def best_of(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def block_walk(packed: PackedForest, X: np.ndarray) -> None:
+    # The level-wise walk in the same blocks predict() uses below the native threshold
+    block_rows = max(1, _PAIRS_PER_BLOCK // packed.n_trees)
+    for start in range(0, len(X), block_rows):
+        packed._apply_block(X[start:start + block_rows])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark packed forest evaluation")
+    parser.add_argument('--model', default='Random Forest')
+    parser.add_argument('--csv', default=str(PROJECT_ROOT / 'test_data.csv'))
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 1_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore')
+    pipeline = joblib.load(get_model_path(args.model))
+    preprocessor, model = pipeline[0], pipeline[-1]
+    X_raw = pd.read_csv(args.csv).drop(columns=['traffic_volume'], errors='ignore')
+    X_base = preprocessor.transform(X_raw)
+    if hasattr(X_base, 'toarray'):
+        # Pipelines trained with --sparse emit CSR; the packed walk takes dense rows
+        X_base = X_base.toarray()
+    X_base = np.asarray(X_base, dtype=np.float32)
+
+    start = time.perf_counter()
+    packed = PackedForest.from_estimator(model)
+    pack_seconds = time.perf_counter() - start
+    print(f"Model: {args.model} ({packed.n_trees} trees, {len(packed.feature):,} nodes, "
+          f"max depth {packed.max_depth})")
+    print(f"Pickled estimator: {len(pickle.dumps(model)) / 2**20:.1f} MB | "
+          f"packed arrays: {packed.nbytes / 2**20:.1f} MB (packed in {pack_seconds:.2f}s)")
+    print()
+    print(f"{'Rows':>10} {'sklearn (ms)':>13} {'block (ms)':>11} {'native (ms)':>12} "
+          f"{'packed (ms)':>12} {'sklearn rows/s':>15} {'packed rows/s':>14} {'max |diff|':>11}")
+    print("-" * 96)
+    # Build the native trees up front so the first size doesn't pay for it
+    packed._native_trees()
+    crossover = None
+    for size in args.sizes:
+        X = np.ascontiguousarray(np.resize(X_base, (size, X_base.shape[1])))
+        repeat = 1 if size >= 100_000 else args.repeat
+        sklearn_s = best_of(lambda: model.predict(X), repeat)
+        # The level-wise walk takes minutes at 1M rows, long after it has lost
+        block_s = best_of(lambda: block_walk(packed, X), repeat) if size <= MAX_BLOCK_ROWS else np.inf
+        native_s = best_of(lambda: packed._apply_native(X), repeat)
+        packed_s = best_of(lambda: packed.predict(X), repeat)
+        max_diff = float(np.max(np.abs(model.predict(X) - packed.predict(X))))
+        if native_s < block_s and crossover is None:
+            crossover = size
+        elif native_s >= block_s:
+            crossover = None
+        block_ms = f"{block_s * 1000:.2f}" if np.isfinite(block_s) else "-"
+        print(f"{size:>10,} {sklearn_s * 1000:>13.2f} {block_ms:>11} {native_s * 1000:>12.2f} "
+              f"{packed_s * 1000:>12.2f} {size / sklearn_s:>15,.0f} {size / packed_s:>14,.0f} "
+              f"{max_diff:>11.2g}")
+
+    print()
+    threshold = _NATIVE_ROWS_PER_TREE * packed.n_trees
+    if crossover is None:
+        print(f"Native walk doesn't win at the largest size measured "
+              f"(predict() switches at {threshold:,} rows)")
+    else:
+        print(f"Native walk wins from {crossover:,} rows ({crossover / packed.n_trees:.2g} per tree) "
+              f"among the sizes measured (predict() switches at {threshold:,} rows)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Cold-import benchmark for the utils package.
+
+Each statement is timed in a fresh interpreter so module caches from earlier
+runs don't hide the real startup cost.
+
+Usage:
+    python benchmarks/bench_import.py              # every public symbol of utils
+    python benchmarks/bench_import.py --repeat 10 "from utils import calculate_metrics"
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+EXTRA_STATEMENTS = [
+    "import utils",
+    "from utils.streamlit_utils import load_model",
+]
+
+TIMER = (
+    "import time; _t = time.perf_counter(); {statement}; "
+    "print(time.perf_counter() - _t)"
+)
+
+
+def time_import(statement: str, repeat: int = 5) -> float:
+    """
+    Time a statement in fresh interpreters.
+
+    Args:
+        statement: Python statement to execute, e.g. "from utils import calculate_metrics"
+        repeat: Number of fresh interpreters to run
+
+    Returns:
+        Median wall-clock time in seconds
+    """
+    timings = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", TIMER.format(statement=statement)],
+            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        ).stdout
+        timings.append(float(output.strip().splitlines()[-1]))
+    return statistics.median(timings)
+
+
+def default_statements() -> list:
+    """One "from utils import X" statement per public symbol, plus a few extras."""
+    sys.path.insert(0, str(PROJECT_ROOT))
+    import utils
+    return EXTRA_STATEMENTS + [f"from utils import {name}" for name in utils.__all__]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold import time of utils")
+    parser.add_argument("statements", nargs="*",
+                        help="Statements to time (default: every public symbol of utils)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    statements = args.statements or default_statements()
+    print(f"{'Statement':60} {'Median (ms)':>12}")
+    print("-" * 73)
+    for statement in statements:
+        print(f"{statement:60} {time_import(statement, args.repeat) * 1000:12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark single-row and small-batch latency of pipeline.predict versus the
+compiled NumPy predictor from utils.inference_utils.
+
+Single-row requests are timed one call at a time and reported as p50/p99
+latency. "pipeline" is the dashboard path: a one-row DataFrame through
+pipeline.predict. "compiled (dict)" is the same row as a plain dict.
+
+Usage:
+    python benchmarks/bench_inference.py
+    python benchmarks/bench_inference.py --models "Decision Tree" --iterations 5000
+"""
+
+import argparse
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from utils.inference_utils import compile_pipeline  # noqa: E402
+from utils.model_utils import get_model_path  # noqa: E402
+
+MODEL_NAMES = ['Linear Regression', 'Decision Tree', 'Random Forest']
+
+
+def latencies(func, inputs: list, iterations: int) -> np.ndarray:
+    """Time func on inputs round-robin; returns per-call seconds."""
+    func(inputs[0])  # warm up
+    timings = np.empty(iterations)
+    for i in range(iterations):
+        row = inputs[i % len(inputs)]
+        start = time.perf_counter()
+        func(row)
+        timings[i] = time.perf_counter() - start
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark compiled vs sklearn pipeline inference")
+    parser.add_argument('--models', nargs='+', default=MODEL_NAMES)
+    parser.add_argument('--csv', default=str(PROJECT_ROOT / 'test_data.csv'))
+    parser.add_argument('--iterations', type=int, default=1000)
+    parser.add_argument('--batch-rows', type=int, default=64, help="Rows per call in the small-batch test")
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore')
+    X = pd.read_csv(args.csv).drop(columns=['traffic_volume'], errors='ignore')
+    frames = [X.iloc[[i]] for i in range(min(len(X), 100))]
+    dicts = [X.iloc[i].to_dict() for i in range(min(len(X), 100))]
+    batch = X.head(args.batch_rows)
+
+    print(f"{'Model':20} {'Path':18} {'p50 (µs)':>10} {'p99 (µs)':>10} {f'batch {len(batch)} (µs)':>16}")
+    print("-" * 78)
+    for model_name in args.models:
+        pipeline = joblib.load(get_model_path(model_name))
+        compiled = compile_pipeline(pipeline)
+        if not np.allclose(pipeline.predict(X), compiled.predict(X), rtol=0, atol=1e-6):
+            print(f"{model_name:20} compiled predictions differ from the pipeline, skipped")
+            continue
+
+        paths = [
+            ('pipeline', pipeline.predict, frames),
+            ('compiled (dict)', compiled.predict, dicts),
+            ('compiled (frame)', compiled.predict, frames),
+        ]
+        for path, func, inputs in paths:
+            single = latencies(func, inputs, args.iterations) * 1e6
+            batched = np.min(latencies(func, [batch], max(args.iterations // 10, 5))) * 1e6
+            p50, p99 = np.percentile(single, [50, 99])
+            print(f"{model_name:20} {path:18} {p50:>10.1f} {p99:>10.1f} {batched:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark the fused metrics kernel against the sklearn-based path.
+
+The "sklearn" column reproduces the old dashboard work per model:
+mean_squared_error + mean_absolute_error + r2_score, then
+calculate_residuals + get_prediction_error_stats.
+
+Usage:
+    python benchmarks/bench_metrics.py
+    python benchmarks/bench_metrics.py --sizes 10000 1000000 --models 3
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.metrics_utils import (
+    calculate_metrics,
+    calculate_metrics_batch,
+    calculate_residuals,
+    get_prediction_error_stats
+)
+
+
+def sklearn_path(y_true: np.ndarray, y_pred: np.ndarray) -> dict:
+    from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
+
+    mse = mean_squared_error(y_true, y_pred)
+    metrics = {
+        'MSE': mse,
+        'RMSE': np.sqrt(mse),
+        'MAE': mean_absolute_error(y_true, y_pred),
+        'R2 Score': r2_score(y_true, y_pred)
+    }
+    metrics.update(get_prediction_error_stats(calculate_residuals(y_true, y_pred)))
+    return metrics
+
+
+def best_of(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark calculate_metrics")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 1_000_000, 100_000_000])
+    parser.add_argument('--models', type=int, default=3, help="Rows of the 2-D batch mode")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    print(f"{'Rows':>12} {'sklearn (ms)':>14} {'fused (ms)':>12} {'speedup':>8} "
+          f"{'sklearn x' + str(args.models):>14} {'batch (ms)':>12} {'speedup':>8}")
+    print("-" * 88)
+
+    for n_rows in args.sizes:
+        y_true = rng.uniform(0, 7000, n_rows)
+        y_pred = y_true + rng.normal(0, 500, n_rows)
+
+        reference = sklearn_path(y_true, y_pred)
+        fused = calculate_metrics(y_true, y_pred)
+        for name, value in reference.items():
+            assert np.isclose(value, fused[name], rtol=1e-8), (name, value, fused[name])
+
+        t_sklearn = best_of(lambda: sklearn_path(y_true, y_pred), args.repeat)
+        t_fused = best_of(lambda: calculate_metrics(y_true, y_pred), args.repeat)
+        del y_pred
+
+        # Each model's predictions are generated in place to keep peak memory bounded
+        y_pred_matrix = np.empty((args.models, n_rows))
+        for i in range(args.models):
+            y_pred_matrix[i] = y_true
+            y_pred_matrix[i] += rng.normal(0, 500 * (i + 1), n_rows)
+        t_sklearn_all = best_of(
+            lambda: [sklearn_path(y_true, row) for row in y_pred_matrix], args.repeat
+        )
+        t_batch = best_of(lambda: calculate_metrics_batch(y_true, y_pred_matrix), args.repeat)
+        del y_pred_matrix
+
+        print(f"{n_rows:>12,} {t_sklearn * 1000:>14.2f} {t_fused * 1000:>12.2f} "
+              f"{t_sklearn / t_fused:>7.1f}x {t_sklearn_all * 1000:>14.2f} "
+              f"{t_batch * 1000:>12.2f} {t_sklearn_all / t_batch:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
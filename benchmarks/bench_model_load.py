@@ -0,0 +1,120 @@
+"""
+Benchmark model loading: joblib pickles versus compiled artifacts.
+
+Each loader runs in a fresh interpreter and reports the load time, the time
+of the first single-row prediction after loading, and resident memory split
+into anonymous (private to the process) and file-backed pages. File-backed
+pages of a memory-mapped artifact come from the page cache and are shared by
+every process that maps the same files.
+
+Usage:
+    python benchmarks/bench_model_load.py
+    python benchmarks/bench_model_load.py --models "Random Forest" --repeat 5
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import warnings
+from pathlib import Path
+
+import joblib
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from utils.inference_utils import compile_pipeline, save_artifact  # noqa: E402
+from utils.model_utils import get_model_path  # noqa: E402
+
+MODEL_NAMES = ['Linear Regression', 'Decision Tree', 'Random Forest']
+
+# Runs in the child: load, predict one row, report timings and memory
+CHILD = """
+import json, sys, time, warnings
+warnings.filterwarnings('ignore')
+sys.path.insert(0, {root!r})
+import pandas as pd
+
+def memory_mb():
+    fields = {{}}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    return fields.get('Anonymous', 0.0), fields.get('Rss', 0.0) - fields.get('Anonymous', 0.0)
+
+row = pd.read_csv({csv!r}).drop(columns=['traffic_volume'], errors='ignore').iloc[[0]]
+{imports}
+base_anon, base_file = memory_mb()
+start = time.perf_counter()
+model = {load}
+load_s = time.perf_counter() - start
+start = time.perf_counter()
+model.predict({row})
+predict_s = time.perf_counter() - start
+anon, file_backed = memory_mb()
+print(json.dumps({{'load_s': load_s, 'predict_s': predict_s,
+                  'anon_mb': anon - base_anon, 'file_mb': file_backed - base_file}}))
+"""
+
+LOADERS = {
+    'pickle': ("import joblib", "joblib.load(path)", "row"),
+    'artifact (mmap)': ("from utils.inference_utils import load_artifact", "load_artifact(path)",
+                        "row.iloc[0].to_dict()"),
+    'artifact (read)': ("from utils.inference_utils import load_artifact", "load_artifact(path, mmap=False)",
+                        "row.iloc[0].to_dict()"),
+    'artifact (zlib)': ("from utils.inference_utils import load_artifact", "load_artifact(path)",
+                        "row.iloc[0].to_dict()"),
+}
+
+
+def run_loader(path: str, csv: str, loader: tuple) -> dict:
+    imports, load, row = loader
+    code = CHILD.format(root=str(PROJECT_ROOT), csv=csv, imports=imports + f"\npath = {path!r}",
+                        load=load, row=row)
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def disk_mb(path: str) -> float:
+    if os.path.isdir(path):
+        return sum(entry.stat().st_size for entry in os.scandir(path)) / 2**20
+    return os.path.getsize(path) / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pickle vs compiled artifact loading")
+    parser.add_argument('--models', nargs='+', default=MODEL_NAMES)
+    parser.add_argument('--csv', default=str(PROJECT_ROOT / 'test_data.csv'))
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore')
+    print(f"{'Model':18} {'Format':16} {'Disk (MB)':>10} {'Load (ms)':>10} {'1st pred (ms)':>14} "
+          f"{'Anon (MB)':>10} {'File (MB)':>10}")
+    print("-" * 94)
+    with tempfile.TemporaryDirectory() as tmp:
+        for model_name in args.models:
+            pipeline_path = get_model_path(model_name)
+            compiled = compile_pipeline(joblib.load(pipeline_path))
+            paths = {
+                'pickle': pipeline_path,
+                'artifact (mmap)': str(save_artifact(compiled, Path(tmp) / f'{model_name} raw')),
+                'artifact (zlib)': str(save_artifact(compiled, Path(tmp) / f'{model_name} zlib', compression='zlib')),
+            }
+            paths['artifact (read)'] = paths['artifact (mmap)']
+            del compiled
+
+            for name, loader in LOADERS.items():
+                results = [run_loader(paths[name], args.csv, loader) for _ in range(args.repeat)]
+                best = min(results, key=lambda r: r['load_s'])
+                print(f"{model_name:18} {name:16} {disk_mb(paths[name]):>10.1f} {best['load_s'] * 1000:>10.1f} "
+                      f"{best['predict_s'] * 1000:>14.2f} {best['anon_mb']:>10.1f} {best['file_mb']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
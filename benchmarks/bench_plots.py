@@ -0,0 +1,89 @@
+"""
+Benchmark the payload of the dashboard's point plots as the test set grows.
+
+For each size, the actual-vs-predicted scatter, the residual plot, the
+full-length actual-vs-predicted line and the residual histogram are built
+twice: as before (every point as an SVG trace, raw values binned by the
+browser) and with the automatic representation from utils.plot_utils
+(Scattergl, server-side density binning, LTTB, server-side histogram bins). Reported per plot: build
+time, JSON serialization time and the serialized size, which is what
+Streamlit ships to the browser. Browser render time isn't measured here;
+the payload size is its main driver.
+
+Usage:
+    python benchmarks/bench_plots.py
+    python benchmarks/bench_plots.py --sizes 1000 100000 --bins 200
+"""
+
+import argparse
+import math
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import plotly.graph_objects as go
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from utils.plot_utils import (  # noqa: E402
+    DENSITY_BINS,
+    plot_actual_vs_predicted,
+    plot_actual_vs_predicted_line,
+    plot_error_distribution,
+    plot_residuals,
+)
+
+
+def build_plots(y_true: np.ndarray, y_pred: np.ndarray, legacy: bool, bins: int) -> dict:
+    if legacy:
+        limits = dict(webgl_threshold=math.inf, density_threshold=math.inf)
+        max_points = math.inf
+    else:
+        limits = dict(bins=bins)
+        max_points = None
+    line_kwargs = {} if max_points is None else {'max_points': max_points}
+    residuals = y_true - y_pred
+    if legacy:
+        histogram = lambda: go.Figure(go.Histogram(x=residuals, nbinsx=30))  # noqa: E731
+    else:
+        histogram = lambda: plot_error_distribution(residuals)  # noqa: E731
+    return {
+        'actual vs predicted': lambda: plot_actual_vs_predicted(y_true, y_pred, **limits),
+        'residuals': lambda: plot_residuals(y_true, y_pred, **limits),
+        'line (all samples)': lambda: plot_actual_vs_predicted_line(y_true, y_pred, sample_size=None, **line_kwargs),
+        'error distribution': histogram,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark plot payload size vs number of points")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000, 1_000_000],
+                        help="Numbers of points to plot")
+    parser.add_argument('--bins', type=int, default=DENSITY_BINS,
+                        help="Bins per axis of the density heatmap")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'Points':>10} {'Plot':20} {'Mode':7} {'Traces':24} {'Build (ms)':>11} "
+          f"{'JSON (ms)':>10} {'Payload':>10}")
+    print("-" * 98)
+    for n in args.sizes:
+        y_true = rng.gamma(2.0, 1600.0, n)
+        y_pred = y_true + rng.normal(0, 800, n)
+        for legacy in (True, False):
+            for name, build in build_plots(y_true, y_pred, legacy, args.bins).items():
+                start = time.perf_counter()
+                fig = build()
+                built = time.perf_counter()
+                payload = len(fig.to_json())
+                serialized = time.perf_counter()
+                traces = ','.join(trace.type for trace in fig.data)
+                print(f"{n:>10,} {name:20} {'before' if legacy else 'auto':7} {traces:24} "
+                      f"{(built - start) * 1000:>11.1f} {(serialized - built) * 1000:>10.1f} "
+                      f"{payload / 2**20:>8.2f}MB")
+
+
+if __name__ == "__main__":
+    main()
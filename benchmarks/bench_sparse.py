@@ -0,0 +1,106 @@
+"""
+Benchmark dense versus sparse (CSR) one-hot encoding of the training data.
+
+For each feature set the preprocessor from train_with_pipeline.py is built
+both ways. Reported per layout: the encoded matrix size, peak memory
+allocated while encoding (tracemalloc), and the time and peak memory of
+fitting a LinearRegression on the result. Feature sets grow the number of
+categories: the current columns, plus weather_description, plus a synthetic
+sensor_id column standing in for per-sensor data.
+
+Usage:
+    python benchmarks/bench_sparse.py
+    python benchmarks/bench_sparse.py --sensors 5000 --rows 500000
+"""
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.linear_model import LinearRegression
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from utils.data_utils import load_raw_data  # noqa: E402
+from utils.feature_utils import add_datetime_features  # noqa: E402
+from utils.training_utils import matrix_nbytes  # noqa: E402
+
+NUMERICAL_COLS = ['temp', 'rain_1h', 'snow_1h', 'clouds_all']
+BASE_CATEGORICAL_COLS = ['holiday', 'weather_main', 'day']
+
+
+def load_frame(rows: int, sensors: int) -> pd.DataFrame:
+    df = add_datetime_features(load_raw_data(str(PROJECT_ROOT / 'datafile.csv')))
+    if rows:
+        repeats = -(-rows // len(df))
+        df = pd.concat([df] * repeats, ignore_index=True).head(rows)
+    rng = np.random.default_rng(0)
+    df['sensor_id'] = pd.Categorical.from_codes(
+        rng.integers(0, sensors, len(df)), [f'S{i:05d}' for i in range(sensors)]
+    )
+    return df
+
+
+def build_preprocessor(categorical_cols: list, sparse: bool) -> ColumnTransformer:
+    return ColumnTransformer(
+        transformers=[
+            ('cat', OneHotEncoder(handle_unknown='ignore', sparse_output=sparse), categorical_cols),
+            ('num', StandardScaler(), NUMERICAL_COLS)
+        ],
+        sparse_threshold=1.0 if sparse else 0.3
+    )
+
+
+def measure(func):
+    """Run func once; return (result, seconds, peak MB allocated)."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dense vs sparse one-hot encoding")
+    parser.add_argument('--rows', type=int, default=None,
+                        help="Tile the data to this many rows (default: datafile.csv as is)")
+    parser.add_argument('--sensors', type=int, default=1000,
+                        help="Categories in the synthetic sensor_id column")
+    args = parser.parse_args()
+
+    df = load_frame(args.rows, args.sensors)
+    y = df['traffic_volume'].to_numpy(dtype=np.float64)
+    feature_sets = {
+        'current': BASE_CATEGORICAL_COLS,
+        '+ weather_description': BASE_CATEGORICAL_COLS + ['weather_description'],
+        f'+ sensor_id ({args.sensors})': BASE_CATEGORICAL_COLS + ['weather_description', 'sensor_id'],
+    }
+
+    print(f"Rows: {len(df):,}")
+    print(f"{'Feature set':26} {'Layout':7} {'Columns':>8} {'Matrix (MB)':>12} {'Encode peak':>12} "
+          f"{'Fit (s)':>8} {'Fit peak':>9}")
+    print("-" * 89)
+    for name, categorical_cols in feature_sets.items():
+        for sparse in (False, True):
+            preprocessor = build_preprocessor(categorical_cols, sparse)
+            X, _, encode_peak = measure(lambda: preprocessor.fit_transform(df))
+            _, fit_seconds, fit_peak = measure(lambda: LinearRegression().fit(X, y))
+            print(f"{name:26} {'sparse' if sparse else 'dense':7} {X.shape[1]:>8} "
+                  f"{matrix_nbytes(X) / 2**20:>12.1f} {encode_peak:>10.1f}MB "
+                  f"{fit_seconds:>8.2f} {fit_peak:>7.1f}MB")
+            del X
+
+
+if __name__ == "__main__":
+    main()
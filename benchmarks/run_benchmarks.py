@@ -0,0 +1,307 @@
+"""
+Reproducible benchmark harness for the load -> predict -> score -> plot path.
+
+`run` times every stage of the dashboard/training path on synthetic data of
+increasing size and writes the results as JSON. Synthetic data is
+datafile.csv resampled (with a fixed seed) to each size, so distributions
+and category vocabularies match the real data.
+
+    read_csv        pd.read_csv of datafile.csv, and of a synthetic CSV per size
+    features        add_datetime_features (timestamp parsing) per size
+    predict         each "<name> Pipeline.pkl" on batches of 1, 100 and each size
+    metrics         calculate_metrics per size
+    plots           every utils.plot_utils builder plus fig.to_json() per size
+
+`compare` reads two result files and flags cases whose median time grew by
+more than --threshold. It exits with status 1 if there is a regression, so
+it can gate CI.
+
+Usage:
+    python benchmarks/run_benchmarks.py run --output before.json
+    python benchmarks/run_benchmarks.py run --sizes 1000 100000 10000000 --only predict metrics
+    python benchmarks/run_benchmarks.py compare before.json after.json --threshold 0.10
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import warnings
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from utils.feature_utils import add_datetime_features  # noqa: E402
+from utils.metrics_utils import calculate_metrics, compute_histogram  # noqa: E402
+from utils import plot_utils  # noqa: E402
+
+warnings.filterwarnings('ignore')
+
+RESULTS_FORMAT_VERSION = 1
+CASES = ['read_csv', 'features', 'predict', 'metrics', 'plots']
+MODEL_NAMES = ['Linear Regression', 'Decision Tree', 'Random Forest']
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+SMALL_BATCHES = [1, 100]
+
+
+# ============================================================================
+# TIMING AND DATA
+# ============================================================================
+
+def time_call(func, repeat: int) -> list:
+    """Wall-clock seconds of repeat calls of func."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def synthetic_raw(raw: pd.DataFrame, rows: int, seed: int) -> pd.DataFrame:
+    """datafile.csv rows resampled with replacement to the requested size."""
+    rng = np.random.default_rng(seed)
+    return raw.iloc[rng.integers(0, len(raw), rows)].reset_index(drop=True)
+
+
+def synthetic_csv(raw: pd.DataFrame, rows: int, seed: int, cache_dir: Path) -> Path:
+    """Write (once) and return a synthetic CSV with the given number of rows."""
+    path = cache_dir / f'raw-{rows}-seed{seed}.csv'
+    if not path.exists():
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        synthetic_raw(raw, rows, seed).to_csv(tmp_path, index=False)
+        os.replace(tmp_path, path)
+    return path
+
+
+def model_features(raw: pd.DataFrame) -> tuple:
+    """Raw frame -> (pipeline input X, target y), as in train_with_pipeline.py."""
+    df = add_datetime_features(raw).drop(columns='weather_description')
+    return df.drop(columns='traffic_volume'), df['traffic_volume'].to_numpy(dtype=np.float64)
+
+
+def load_pipelines() -> dict:
+    import joblib
+
+    pipelines = {}
+    for name in MODEL_NAMES:
+        path = PROJECT_ROOT / f"{name} Pipeline.pkl"
+        if path.exists():
+            pipelines[name] = joblib.load(path)
+        else:
+            print(f"  ⚠️  {path.name} not found, skipping its predict cases")
+    return pipelines
+
+
+def plot_builders(y_true: np.ndarray, y_pred: np.ndarray) -> dict:
+    residuals = y_true - y_pred
+    metrics = {'Model': calculate_metrics(y_true, y_pred)}
+    importances = {f'feature_{i}': float(v) for i, v in enumerate(np.linspace(1, 0, 15))}
+    return {
+        'plot_actual_vs_predicted': lambda: plot_utils.plot_actual_vs_predicted(y_true, y_pred),
+        'plot_residuals': lambda: plot_utils.plot_residuals(y_true, y_pred),
+        'plot_actual_vs_predicted_line': lambda: plot_utils.plot_actual_vs_predicted_line(
+            y_true, y_pred, sample_size=None),
+        'plot_error_distribution': lambda: plot_utils.plot_error_distribution(residuals),
+        'plot_target_distribution': lambda: plot_utils.plot_target_distribution(
+            histogram=compute_histogram(y_true)),
+        'plot_model_comparison': lambda: plot_utils.plot_model_comparison(metrics, 'MSE'),
+        'plot_feature_importance': lambda: plot_utils.plot_feature_importance(importances, top_n=15),
+    }
+
+
+# ============================================================================
+# RUN
+# ============================================================================
+
+def run_cases(args) -> list:
+    results = []
+
+    def record(case: str, name: str, rows: int, func, repeat: int = args.repeat) -> None:
+        times = time_call(func, repeat)
+        median = float(np.median(times))
+        results.append({
+            'case': case, 'name': name, 'rows': rows, 'times': times,
+            'min': min(times), 'median': median,
+            'rows_per_second': rows / median if median > 0 else None
+        })
+        print(f"  {case:9} {name:32} {rows:>11,} rows  median {median * 1000:>10.2f} ms")
+
+    csv_path = PROJECT_ROOT / 'datafile.csv'
+    raw = pd.read_csv(csv_path)
+    pipelines = load_pipelines() if 'predict' in args.only else {}
+    cache_dir = Path(args.data_dir)
+
+    if 'plots' in args.only:
+        # Plotly builds its template and validators on first use; keep that out of the first case
+        plot_utils.plot_feature_importance({'warm-up': 1.0}).to_json()
+
+    if 'read_csv' in args.only:
+        record('read_csv', 'datafile.csv', len(raw), lambda: pd.read_csv(csv_path))
+
+    # Batches of 1 and 100 rows are sliced from the smallest dataset
+    small_X = model_features(synthetic_raw(raw, max(SMALL_BATCHES), args.seed))[0]
+    for name, pipeline in pipelines.items():
+        for batch in SMALL_BATCHES:
+            X_batch = small_X.head(batch)
+            record('predict', name, batch, lambda: pipeline.predict(X_batch), repeat=max(args.repeat, 10))
+
+    for rows in args.sizes:
+        print(f"\n  --- {rows:,} rows ---")
+        raw_n = synthetic_raw(raw, rows, args.seed)
+        if 'read_csv' in args.only:
+            path = synthetic_csv(raw, rows, args.seed, cache_dir)
+            record('read_csv', 'synthetic csv', rows, lambda: pd.read_csv(path))
+        if 'features' in args.only:
+            record('features', 'add_datetime_features', rows, lambda: add_datetime_features(raw_n))
+
+        if not {'predict', 'metrics', 'plots'} & set(args.only):
+            continue
+        X, y = model_features(raw_n)
+        del raw_n
+        y_pred = None
+        for name, pipeline in pipelines.items():
+            record('predict', name, rows, lambda: pipeline.predict(X))
+        if pipelines:
+            y_pred = next(iter(pipelines.values())).predict(X)
+        if y_pred is None:
+            # No pipelines requested/available: score a noisy copy of the target instead
+            y_pred = y + np.random.default_rng(args.seed).normal(0, 1000, len(y))
+        if 'metrics' in args.only:
+            record('metrics', 'calculate_metrics', rows, lambda: calculate_metrics(y, y_pred))
+        if 'plots' in args.only:
+            for name, build in plot_builders(y, y_pred).items():
+                record('plots', name, rows, lambda: build().to_json())
+    return results
+
+
+def environment() -> dict:
+    import plotly
+    import sklearn
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT,
+                                capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__,
+        'plotly': plotly.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'git_commit': commit
+    }
+
+
+def command_run(args) -> int:
+    print("=" * 80)
+    print("BENCHMARKS: load -> predict -> score -> plot")
+    print("=" * 80)
+    print(f"Sizes: {', '.join(f'{n:,}' for n in args.sizes)} | cases: {', '.join(args.only)} | "
+          f"repeat: {args.repeat}")
+
+    started = datetime.now(timezone.utc)
+    results = run_cases(args)
+    document = {
+        'format_version': RESULTS_FORMAT_VERSION,
+        'created': started.isoformat(timespec='seconds'),
+        'settings': {'sizes': args.sizes, 'cases': args.only, 'repeat': args.repeat, 'seed': args.seed},
+        'environment': environment(),
+        'results': results
+    }
+    output = Path(args.output or PROJECT_ROOT / 'benchmarks' / 'results'
+                  / f"bench-{started.strftime('%Y%m%d-%H%M%S')}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(document, f, indent=2)
+    print(f"\n✓ Saved {len(results)} results to {output}")
+    return 0
+
+
+# ============================================================================
+# COMPARE
+# ============================================================================
+
+def command_compare(args) -> int:
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    def by_key(document: dict) -> dict:
+        return {(r['case'], r['name'], r['rows']): r for r in document['results']}
+
+    base, new = by_key(baseline), by_key(candidate)
+    print(f"Baseline:  {args.baseline} ({baseline['environment'].get('git_commit')})")
+    print(f"Candidate: {args.candidate} ({candidate['environment'].get('git_commit')})")
+    print(f"\n{'Case':9} {'Name':32} {'Rows':>11} {'Before (ms)':>12} {'After (ms)':>11} {'Ratio':>7}  Status")
+    print("-" * 98)
+
+    regressions = 0
+    for key in sorted(base.keys() & new.keys(), key=lambda k: (CASES.index(k[0]) if k[0] in CASES else 99,
+                                                                k[1], k[2])):
+        before, after = base[key]['median'], new[key]['median']
+        ratio = after / before if before > 0 else float('inf')
+        # Changes below the noise floor are never flagged, whatever the ratio
+        significant = abs(after - before) >= args.min_seconds
+        if significant and ratio > 1 + args.threshold:
+            status = "⚠️  REGRESSION"
+            regressions += 1
+        elif significant and ratio < 1 / (1 + args.threshold):
+            status = "✓ faster"
+        else:
+            status = ""
+        case, name, rows = key
+        print(f"{case:9} {name:32} {rows:>11,} {before * 1000:>12.2f} {after * 1000:>11.2f} "
+              f"{ratio:>6.2f}x  {status}")
+
+    only_base, only_new = base.keys() - new.keys(), new.keys() - base.keys()
+    if only_base or only_new:
+        print(f"\n{len(only_base)} case(s) only in the baseline, {len(only_new)} only in the candidate")
+    print(f"\n{regressions} regression(s) above {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark harness for the dashboard/training path")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help="Run the benchmarks and write JSON results")
+    run.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                     help="Synthetic dataset sizes in rows (up to 10000000)")
+    run.add_argument('--only', nargs='+', choices=CASES, default=CASES, help="Cases to run")
+    run.add_argument('--repeat', type=int, default=3, help="Timed calls per case (the median is compared)")
+    run.add_argument('--seed', type=int, default=0, help="Seed for the synthetic data")
+    run.add_argument('--output', default=None,
+                     help="Result file (default: benchmarks/results/bench-<timestamp>.json)")
+    run.add_argument('--data-dir', default=str(PROJECT_ROOT / '.cache' / 'bench'),
+                     help="Where synthetic CSVs are written (reused across runs)")
+    run.set_defaults(func=command_run)
+
+    compare = commands.add_parser('compare', help="Compare two result files and flag regressions")
+    compare.add_argument('baseline', help="Earlier result file")
+    compare.add_argument('candidate', help="Later result file")
+    compare.add_argument('--threshold', type=float, default=0.10,
+                         help="Relative slowdown of the median flagged as a regression")
+    compare.add_argument('--min-seconds', type=float, default=0.001,
+                         help="Ignore differences smaller than this many seconds")
+    compare.set_defaults(func=command_compare)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Export saved pipelines as compiled NumPy predictors.
+
+Each "<name> Pipeline.pkl" is flattened by utils.inference_utils.compile_pipeline()
+into a "<name> Compiled/" artifact directory (raw .npy blocks + manifest.json).
+The exported artifact is reloaded and checked against pipeline.predict() on
+test_data.csv; a mismatching export is removed again.
+
+Usage:
+    python export_compiled_models.py
+    python export_compiled_models.py --models "Random Forest" --csv test_data.csv
+    python export_compiled_models.py --compression zlib   # smaller, but not memory-mapped
+"""
+
+import argparse
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+# Add utils to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from utils.inference_utils import COMPRESSIONS, load_artifact
+from utils.model_utils import get_model_path, save_compiled_model
+
+
+MODEL_NAMES = ['Linear Regression', 'Decision Tree', 'Random Forest']
+
+
+def directory_size(path: str) -> int:
+    return sum(entry.stat().st_size for entry in os.scandir(path))
+
+
+def export_model(model_name: str, X_check: pd.DataFrame, tolerance: float, compression: str = None) -> bool:
+    """
+    Compile one pipeline, save it next to the pipeline and verify the saved artifact.
+
+    Args:
+        model_name: Name of the model (e.g., 'Random Forest')
+        X_check: Raw features used to compare against pipeline.predict()
+        tolerance: Largest absolute difference accepted
+        compression: None (memory-mappable), 'zlib' or 'lzma'
+
+    Returns:
+        True if the artifact was written and verified
+    """
+    pipeline_path = get_model_path(model_name)
+    if not os.path.exists(pipeline_path):
+        print(f"  ⚠️  {model_name}: {pipeline_path} not found, skipped")
+        return False
+
+    pipeline = joblib.load(pipeline_path)
+    try:
+        output_path = save_compiled_model(model_name, pipeline, compression=compression)
+    except TypeError as e:
+        print(f"  ⚠️  {model_name}: {e}")
+        return False
+
+    compiled = load_artifact(output_path)
+    max_diff = float(np.max(np.abs(pipeline.predict(X_check) - compiled.predict(X_check)), initial=0.0))
+    if max_diff > tolerance:
+        shutil.rmtree(output_path, ignore_errors=True)
+        print(f"  ❌ {model_name}: compiled predictions differ by up to {max_diff:.3g}, removed")
+        return False
+
+    print(f"  ✓ {model_name}: {output_path} ({directory_size(output_path) / 2**20:.1f} MB vs "
+          f"{os.path.getsize(pipeline_path) / 2**20:.1f} MB pickle; "
+          f"max |diff| = {max_diff:.3g} on {len(X_check):,} rows)")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile saved pipelines into flat NumPy predictors")
+    parser.add_argument('--models', nargs='+', default=MODEL_NAMES)
+    parser.add_argument('--csv', default='test_data.csv', help="Raw rows used to verify the export")
+    parser.add_argument('--tolerance', type=float, default=1e-6)
+    parser.add_argument('--compression', choices=[c for c in COMPRESSIONS if c], default=None,
+                        help="Compress the array blocks (disables memory-mapped loading)")
+    args = parser.parse_args()
+
+    X_check = pd.read_csv(args.csv).drop(columns=['traffic_volume'], errors='ignore')
+    print(f"Exporting compiled predictors (verified on {args.csv})...")
+    exported = [export_model(name, X_check, args.tolerance, args.compression) for name in args.models]
+    sys.exit(0 if all(exported) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,19 +6,17 @@ Uses raw categorical values for pipeline-based predictions
 import pandas as pd
 import joblib
 
-# Load the original processed data
-df = pd.read_csv('datafile.csv')
+from utils.data_utils import load_raw_data
+from utils.feature_utils import add_datetime_features
+
+# Load the original processed data (typed columnar cache of datafile.csv)
+df = load_raw_data('datafile.csv')
 
 # Remove duplicates
 df.drop_duplicates(inplace=True)
 
 # Feature engineering (same as training)
-df['date_time'] = pd.to_datetime(df['date_time'], format='%d-%m-%Y %H:%M')
-df['day'] = df['date_time'].dt.day_name()
-df['month'] = df['date_time'].dt.month
-df['year'] = df['date_time'].dt.year
-df['hour'] = df['date_time'].dt.hour
-df.drop('date_time', axis=1, inplace=True)
+df = add_datetime_features(df)
 df.drop('weather_description', axis=1, inplace=True)
 
 # Save 200 random samples as test_data (with raw categorical values)
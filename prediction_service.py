@@ -0,0 +1,459 @@
+"""
+Batch Prediction REST Service for Traffic Volume Prediction
+Serves the saved "<name> Pipeline.pkl" models over HTTP without Streamlit.
+
+Requests from concurrent clients are coalesced into micro-batches so each
+pipeline.predict() call amortises sklearn's per-call overhead over many rows.
+
+Usage:
+    python prediction_service.py serve --port 8000
+    python prediction_service.py serve --compiled   # memory-mapped compiled artifacts
+    python prediction_service.py client --csv test_data.csv --model "Random Forest"
+    python prediction_service.py loadgen --concurrency 8 --batch-rows 256 --duration 10
+
+Endpoints:
+    GET  /health              -> {"status": "ok"}
+    GET  /models              -> {"models": [...]}
+    POST /predict?model=NAME  -> {"model": NAME, "predictions": [...]}
+         body: application/json  {"rows": [{...}, ...]}  or  {"columns": {col: [...]}}
+               text/csv          header row + raw rows (extra columns are ignored)
+"""
+
+import argparse
+import io
+import json
+import queue
+import sys
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add utils to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from utils.model_utils import (
+    get_compiled_model_path,
+    get_compiled_registry,
+    get_default_registry,
+    get_model_path
+)
+
+
+MODEL_NAMES = ['Linear Regression', 'Decision Tree', 'Random Forest']
+
+# Raw features expected by the pipelines (same columns as test_data.csv minus the target)
+FEATURE_COLUMNS = [
+    'holiday', 'temp', 'rain_1h', 'snow_1h', 'clouds_all',
+    'weather_main', 'day', 'month', 'year', 'hour'
+]
+
+# Columns the pipelines scale as numbers; anything else is one-hot encoded
+NUMERIC_COLUMNS = ['temp', 'rain_1h', 'snow_1h', 'clouds_all', 'month', 'year', 'hour']
+
+
+# ============================================================================
+# MODEL LOADING & MICRO-BATCHING
+# ============================================================================
+
+def load_pipelines(model_names: list, compiled: bool = False) -> dict:
+    """
+    Load pipeline models from disk, skipping any that are missing.
+
+    Args:
+        model_names: List of model names to load
+        compiled: Load the memory-mapped "<name> Compiled" artifacts written by
+            export_compiled_models.py instead of the pickled pipelines
+
+    Returns:
+        Dictionary mapping model names to loaded models (anything with .predict)
+    """
+    registry = get_compiled_registry() if compiled else get_default_registry()
+    path_resolver = get_compiled_model_path if compiled else get_model_path
+    pipelines = {}
+    for model_name in model_names:
+        model_path = path_resolver(model_name)
+        try:
+            pipelines[model_name] = registry.get(model_name)
+            print(f"  ✓ Loaded: {model_path}")
+        except FileNotFoundError:
+            print(f"  ✗ Model file not found: {model_path}")
+    return pipelines
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent prediction requests for one pipeline into batches.
+
+    Request threads call predict(); a single worker thread drains the queue
+    until max_batch_rows rows are collected or max_wait_ms has elapsed since
+    the first request, runs one pipeline.predict() and hands each caller its
+    slice of the result.
+    """
+
+    def __init__(self, pipeline, max_batch_rows: int = 4096, max_wait_ms: float = 2.0):
+        self.pipeline = pipeline
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+        self.batches = 0
+        self.rows = 0
+
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        """
+        Predict for a frame of raw rows, blocking until its batch has run.
+
+        If the batch fails, its requests are retried one by one, so an error
+        is only raised for the request that caused it.
+
+        Args:
+            X: DataFrame with FEATURE_COLUMNS
+
+        Returns:
+            numpy array of predictions for X
+        """
+        future = Future()
+        self._queue.put((X, future))
+        return future.result()
+
+    def _collect(self) -> list:
+        items = [self._queue.get()]
+        n_rows = len(items[0][0])
+        deadline = time.perf_counter() + self.max_wait
+        while n_rows < self.max_batch_rows:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            items.append(item)
+            n_rows += len(item[0])
+        return items
+
+    def _run_each(self, items: list):
+        for X, future in items:
+            try:
+                y = self.pipeline.predict(X)
+            except Exception as e:
+                future.set_exception(e)
+                continue
+            self.batches += 1
+            self.rows += len(X)
+            future.set_result(y)
+
+    def _run(self):
+        while True:
+            items = self._collect()
+            frames = [X for X, _ in items]
+            try:
+                X_batch = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+                y_batch = self.pipeline.predict(X_batch)
+            except Exception as e:
+                if len(items) == 1:
+                    items[0][1].set_exception(e)
+                else:
+                    # One bad request must not fail the others it was batched with
+                    self._run_each(items)
+                continue
+
+            self.batches += 1
+            self.rows += len(X_batch)
+            offset = 0
+            for X, future in items:
+                future.set_result(y_batch[offset:offset + len(X)])
+                offset += len(X)
+
+
+# ============================================================================
+# REQUEST PARSING
+# ============================================================================
+
+def _records_frame(rows) -> pd.DataFrame:
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise ValueError("Rows must be a list of JSON objects")
+    return pd.DataFrame.from_records(rows)
+
+
+def _columns_frame(columns) -> pd.DataFrame:
+    if not isinstance(columns, dict) or not all(isinstance(values, list) for values in columns.values()):
+        raise ValueError("Columns must be a JSON object of lists")
+    if len({len(values) for values in columns.values()}) > 1:
+        raise ValueError("All columns must have the same length")
+    return pd.DataFrame(columns)
+
+
+def parse_rows(body: bytes, content_type: str) -> pd.DataFrame:
+    """
+    Parse a JSON or CSV request body into a raw feature frame.
+
+    Args:
+        body: Raw request body
+        content_type: Value of the Content-Type header
+
+    Returns:
+        DataFrame with FEATURE_COLUMNS in training order
+
+    Raises:
+        ValueError: If the body is malformed or in the wrong shape, required
+            columns are missing or a numeric column holds non-numeric or
+            non-finite values
+    """
+    if 'csv' in content_type:
+        df = pd.read_csv(io.BytesIO(body))
+    else:
+        payload = json.loads(body)
+        if isinstance(payload, list):
+            df = _records_frame(payload)
+        elif isinstance(payload, dict) and 'rows' in payload:
+            df = _records_frame(payload['rows'])
+        elif isinstance(payload, dict) and 'columns' in payload:
+            df = _columns_frame(payload['columns'])
+        else:
+            raise ValueError("JSON body must be a list of rows, {'rows': [...]} or {'columns': {...}}")
+
+    if df.empty:
+        raise ValueError("Request contains no rows")
+
+    missing = [col for col in FEATURE_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"Missing feature columns: {missing}")
+
+    X = df[FEATURE_COLUMNS].copy()
+    # Reject bad values here (HTTP 400) instead of failing inside pipeline.predict()
+    for col in NUMERIC_COLUMNS:
+        try:
+            X[col] = pd.to_numeric(X[col], errors='raise')
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Column {col!r} must be numeric: {e}") from None
+        if not np.isfinite(X[col].to_numpy(dtype=float)).all():
+            raise ValueError(f"Column {col!r} must be finite (no null, NaN or infinity)")
+    # JSON null / empty CSV cells both mean "no holiday", which the encoder learned as NaN
+    X['holiday'] = X['holiday'].astype(object).where(X['holiday'].notna(), np.nan)
+    return X
+
+
+# ============================================================================
+# HTTP SERVER
+# ============================================================================
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    """HTTP handler; the server instance holds the batchers."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = urllib.parse.urlparse(self.path).path
+        if path == '/health':
+            self._send_json(200, {'status': 'ok'})
+        elif path == '/models':
+            self._send_json(200, {'models': list(self.server.batchers.keys())})
+        else:
+            self._send_json(404, {'error': f"Unknown endpoint: {path}"})
+
+    def do_POST(self):
+        url = urllib.parse.urlparse(self.path)
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length)
+
+        if url.path != '/predict':
+            self._send_json(404, {'error': f"Unknown endpoint: {url.path}"})
+            return
+
+        params = urllib.parse.parse_qs(url.query)
+        model_name = params.get('model', [self.server.default_model])[0]
+        batcher = self.server.batchers.get(model_name)
+        if batcher is None:
+            self._send_json(404, {'error': f"Unknown model: {model_name}"})
+            return
+
+        try:
+            X = parse_rows(body, self.headers.get('Content-Type', 'application/json'))
+        except (ValueError, TypeError, pd.errors.ParserError) as e:
+            self._send_json(400, {'error': str(e)})
+            return
+
+        try:
+            predictions = batcher.predict(X)
+        except Exception as e:
+            self._send_json(500, {'error': f"Error making predictions: {str(e)}"})
+            return
+
+        self._send_json(200, {'model': model_name, 'predictions': predictions.tolist()})
+
+
+def serve(host: str, port: int, model_names: list, max_batch_rows: int, max_wait_ms: float,
+          verbose: bool = False, compiled: bool = False):
+    """Load pipelines and serve predictions until interrupted."""
+    print("Loading compiled model artifacts..." if compiled else "Loading pipeline models...")
+    pipelines = load_pipelines(model_names, compiled=compiled)
+    if not pipelines:
+        print("No models could be loaded. Train them first with: python train_with_pipeline.py")
+        sys.exit(1)
+
+    server = ThreadingHTTPServer((host, port), PredictionHandler)
+    server.daemon_threads = True
+    server.verbose = verbose
+    server.batchers = {
+        name: MicroBatcher(pipeline, max_batch_rows=max_batch_rows, max_wait_ms=max_wait_ms)
+        for name, pipeline in pipelines.items()
+    }
+    server.default_model = next(iter(server.batchers))
+
+    print(f"Serving predictions on http://{host}:{port} (models: {list(server.batchers)})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down...")
+    finally:
+        server.server_close()
+
+
+# ============================================================================
+# CLIENT & LOAD GENERATOR
+# ============================================================================
+
+def request_predictions(url: str, model_name: str, X: pd.DataFrame, use_csv: bool = False) -> list:
+    """
+    Send a batch of raw rows to the service.
+
+    Args:
+        url: Base URL of the service (e.g. http://127.0.0.1:8000)
+        model_name: Name of the model to use
+        X: DataFrame with raw feature columns
+        use_csv: Send the batch as CSV instead of JSON
+
+    Returns:
+        List of predictions
+    """
+    if use_csv:
+        body = X.to_csv(index=False).encode()
+        content_type = 'text/csv'
+    else:
+        body = json.dumps({'columns': X.replace({np.nan: None}).to_dict(orient='list')}).encode()
+        content_type = 'application/json'
+
+    query = urllib.parse.urlencode({'model': model_name})
+    request = urllib.request.Request(
+        f"{url}/predict?{query}", data=body, headers={'Content-Type': content_type}
+    )
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())['predictions']
+
+
+def run_client(url: str, model_name: str, csv_path: str, n_rows: int, use_csv: bool):
+    """Send rows from a CSV file once and print the predictions."""
+    X = pd.read_csv(csv_path)[FEATURE_COLUMNS].head(n_rows)
+    predictions = request_predictions(url, model_name, X, use_csv=use_csv)
+    for i, pred in enumerate(predictions):
+        print(f"  Sample {i+1}: {pred:,.0f} vehicles")
+
+
+def run_loadgen(url: str, model_name: str, csv_path: str, concurrency: int, batch_rows: int,
+                duration: float, use_csv: bool):
+    """Hammer the service from several threads and report throughput and latency."""
+    source = pd.read_csv(csv_path)[FEATURE_COLUMNS]
+    repeats = int(np.ceil(batch_rows / len(source)))
+    X = pd.concat([source] * repeats, ignore_index=True).head(batch_rows)
+
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def worker():
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            try:
+                request_predictions(url, model_name, X, use_csv=use_csv)
+            except Exception as e:
+                with lock:
+                    errors.append(str(e))
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    print("=" * 60)
+    print(f"Model: {model_name} | concurrency={concurrency} | batch_rows={batch_rows}")
+    print(f"Requests: {len(latencies)} ok, {len(errors)} failed in {elapsed:.1f}s")
+    if len(latencies):
+        print(f"Throughput: {len(latencies) / elapsed:,.1f} req/s | "
+              f"{len(latencies) * batch_rows / elapsed:,.0f} rows/s")
+        print(f"Latency ms: p50={np.percentile(latencies_ms, 50):.1f} "
+              f"p99={np.percentile(latencies_ms, 99):.1f} max={latencies_ms.max():.1f}")
+    if errors:
+        print(f"First error: {errors[0]}")
+    print("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch prediction REST service")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = subparsers.add_parser('serve', help="Run the prediction server")
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8000)
+    serve_parser.add_argument('--models', nargs='+', default=MODEL_NAMES)
+    serve_parser.add_argument('--max-batch-rows', type=int, default=4096)
+    serve_parser.add_argument('--max-wait-ms', type=float, default=2.0)
+    serve_parser.add_argument('--verbose', action='store_true', help="Log every request")
+    serve_parser.add_argument('--compiled', action='store_true',
+                              help="Serve memory-mapped compiled artifacts (see export_compiled_models.py)")
+
+    for name, help_text in [('client', "Send one batch and print predictions"),
+                            ('loadgen', "Generate load and report rows/sec")]:
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument('--url', default='http://127.0.0.1:8000')
+        sub.add_argument('--model', default='Random Forest')
+        sub.add_argument('--csv', default='test_data.csv', help="Source of raw rows")
+        sub.add_argument('--use-csv', action='store_true', help="Send CSV bodies instead of JSON")
+        if name == 'client':
+            sub.add_argument('--rows', type=int, default=5)
+        else:
+            sub.add_argument('--concurrency', type=int, default=8)
+            sub.add_argument('--batch-rows', type=int, default=256)
+            sub.add_argument('--duration', type=float, default=10.0)
+
+    args = parser.parse_args()
+    if args.command == 'serve':
+        serve(args.host, args.port, args.models, args.max_batch_rows, args.max_wait_ms, args.verbose,
+              args.compiled)
+    elif args.command == 'client':
+        run_client(args.url, args.model, args.csv, args.rows, args.use_csv)
+    else:
+        run_loadgen(args.url, args.model, args.csv, args.concurrency, args.batch_rows,
+                    args.duration, args.use_csv)
+
+
+if __name__ == "__main__":
+    main()
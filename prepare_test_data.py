@@ -7,13 +7,15 @@ import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
 
+from utils.data_utils import load_raw_data
+
 def generate_test_data():
     """
     Generate sample test data mimicking the traffic volume dataset structure.
     """
     # Read the original data to understand its structure
     try:
-        df = pd.read_csv('datafile.csv')
+        df = load_raw_data('datafile.csv')
     except FileNotFoundError:
         print("Creating synthetic test data...")
         # Create synthetic data if original is not available
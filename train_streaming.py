@@ -0,0 +1,330 @@
+"""
+Out-of-core Training Script for Traffic Volume Prediction
+Trains incremental (SGD) pipelines on CSV histories larger than RAM.
+
+The CSV is streamed in chunks, several times:
+  [1/4] Discovery pass: hash-based dedup, category vocabularies,
+        StandardScaler.partial_fit and target statistics
+  [2/4] Training passes: SGD partial_fit on each chunk (one pass per epoch)
+  [3/4] Evaluation pass: streaming train/test metrics
+  [4/4] Save "<name> Pipeline.pkl" files usable by the dashboard and service
+
+Rows are assigned to train/test by row hash, so the split is deterministic
+without shuffling the whole dataset.
+
+Usage:
+    python train_streaming.py --csv datafile.csv --chunksize 100000
+    python train_streaming.py --dedup bloom --expected-rows 500000000 --epochs 2
+    python train_streaming.py --compare      # also run the in-memory path and compare
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.linear_model import SGDRegressor
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from utils.feature_utils import add_datetime_features
+from utils.metrics_utils import StreamingMetrics, calculate_metrics
+from utils.training_utils import HashDeduplicator, ScaledTargetRegressor, peak_memory_mb, row_hashes
+
+warnings.filterwarnings('ignore')
+
+# Fixed dtypes so every chunk hashes and encodes the same way, whatever values it holds
+RAW_DTYPES = {
+    'traffic_volume': 'int64',
+    'holiday': 'object',
+    'temp': 'float64',
+    'rain_1h': 'float64',
+    'snow_1h': 'float64',
+    'clouds_all': 'int64',
+    'weather_main': 'object',
+    'weather_description': 'object',
+    'date_time': 'object',
+}
+
+# Same columns the in-memory script ends up using (see feature_info.pkl)
+CATEGORICAL_COLS = ['holiday', 'weather_main', 'day']
+NUMERICAL_COLS = ['temp', 'rain_1h', 'snow_1h', 'clouds_all']
+TARGET = 'traffic_volume'
+
+
+def build_models() -> dict:
+    """Incremental models trained by this script."""
+    return {
+        'SGD Regressor': SGDRegressor(eta0=1e-3, random_state=42),
+        'SGD Huber Regressor': SGDRegressor(loss='huber', epsilon=1.0, random_state=42),
+    }
+
+
+def engineer(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Apply the training script's feature engineering to one chunk."""
+    return add_datetime_features(chunk).drop(columns='weather_description')
+
+
+def is_test_row(hashes: np.ndarray, test_size: float) -> np.ndarray:
+    # High bits of the row hash are independent of the low bits used by the Bloom filter
+    return (hashes >> np.uint64(40)) % np.uint64(10_000) < np.uint64(int(test_size * 10_000))
+
+
+def stream_chunks(args, shuffle_seed: int = None):
+    """
+    Yield (features, target, is_test) for each deduplicated chunk of the CSV.
+
+    A fresh deduplicator is used for every pass; since chunks arrive in the
+    same order, each pass keeps exactly the same rows.
+    """
+    dedup = None if args.dedup == 'none' else HashDeduplicator(
+        args.dedup, capacity=args.expected_rows, error_rate=args.bloom_error_rate
+    )
+    rng = np.random.default_rng(shuffle_seed) if shuffle_seed is not None else None
+
+    for chunk in pd.read_csv(args.csv, chunksize=args.chunksize, dtype=RAW_DTYPES):
+        hashes = row_hashes(chunk)
+        if dedup is not None:
+            keep = dedup.first_occurrences(hashes)
+            chunk, hashes = chunk[keep], hashes[keep]
+        if rng is not None:
+            # Rows arrive in time order; shuffle within the chunk for SGD
+            order = rng.permutation(len(chunk))
+            chunk, hashes = chunk.iloc[order], hashes[order]
+
+        chunk = engineer(chunk)
+        y = chunk.pop(TARGET).to_numpy()
+        yield chunk, y, is_test_row(hashes, args.test_size)
+
+
+def timed_pass(label: str, rows: int, start: float) -> dict:
+    elapsed = time.perf_counter() - start
+    print(f"  {label}: {rows:,} rows in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/s)")
+    return {'rows': rows, 'seconds': elapsed}
+
+
+def discover(args) -> tuple:
+    """
+    Discovery pass: category vocabularies, scaler and target statistics.
+
+    Returns:
+        Tuple of (categories per column, fitted scaler, target scaler, sample frame, rows)
+    """
+    categories = {col: set() for col in CATEGORICAL_COLS}
+    has_missing = {col: False for col in CATEGORICAL_COLS}
+    scaler = StandardScaler()
+    target_scaler = StandardScaler()
+    sample = None
+    rows = 0
+
+    for X, y, is_test in stream_chunks(args):
+        rows += len(X)
+        for col in CATEGORICAL_COLS:
+            values = X[col]
+            has_missing[col] |= bool(values.isna().any())
+            categories[col].update(values.dropna().unique().tolist())
+
+        X_train, y_train = X[~is_test], y[~is_test]
+        if len(X_train):
+            scaler.partial_fit(X_train[NUMERICAL_COLS])
+            target_scaler.partial_fit(y_train.reshape(-1, 1).astype(np.float64))
+            if sample is None:
+                sample = X_train.head(1000)
+
+    # Same layout OneHotEncoder learns in memory: sorted values, NaN last
+    vocabularies = [
+        sorted(categories[col]) + ([np.nan] if has_missing[col] else [])
+        for col in CATEGORICAL_COLS
+    ]
+    return vocabularies, scaler, target_scaler, sample, rows
+
+
+def build_preprocessor(vocabularies: list, scaler: StandardScaler, sample: pd.DataFrame) -> ColumnTransformer:
+    """
+    Build a fitted ColumnTransformer from streamed statistics.
+
+    The transformer is fitted on a small sample to set up its column layout;
+    the encoder's categories are fixed up front and the scaler statistics are
+    then replaced with those accumulated over the whole training stream.
+    """
+    preprocessor = ColumnTransformer(
+        transformers=[
+            ('cat', OneHotEncoder(categories=vocabularies, handle_unknown='ignore', sparse_output=False),
+             CATEGORICAL_COLS),
+            ('num', StandardScaler(), NUMERICAL_COLS)
+        ]
+    )
+    preprocessor.fit(sample)
+
+    fitted_scaler = preprocessor.named_transformers_['num']
+    for attr in ('mean_', 'var_', 'scale_', 'n_samples_seen_'):
+        setattr(fitted_scaler, attr, getattr(scaler, attr))
+    return preprocessor
+
+
+def run_streaming(args) -> dict:
+    """Train and evaluate in chunks; returns the run summary."""
+    summary = {'mode': 'streaming', 'passes': {}}
+    start_total = time.perf_counter()
+
+    print("\n[1/4] Discovery pass (dedup, categories, scaler)...")
+    start = time.perf_counter()
+    vocabularies, scaler, target_scaler, sample, rows = discover(args)
+    summary['passes']['discovery'] = timed_pass("Discovery", rows, start)
+    if sample is None:
+        print("No training rows found.")
+        sys.exit(1)
+    for col, vocabulary in zip(CATEGORICAL_COLS, vocabularies):
+        print(f"  {col}: {len(vocabulary)} categories")
+
+    preprocessor = build_preprocessor(vocabularies, scaler, sample)
+    y_mean, y_scale = float(target_scaler.mean_[0]), float(target_scaler.scale_[0])
+    models = {
+        name: ScaledTargetRegressor(model, y_mean=y_mean, y_scale=y_scale)
+        for name, model in build_models().items()
+    }
+
+    print(f"\n[2/4] Training passes ({args.epochs} epoch(s))...")
+    for epoch in range(args.epochs):
+        start = time.perf_counter()
+        rows = 0
+        for X, y, is_test in stream_chunks(args, shuffle_seed=epoch):
+            X_train, y_train = X[~is_test], y[~is_test]
+            if not len(X_train):
+                continue
+            encoded = preprocessor.transform(X_train)
+            for model in models.values():
+                model.partial_fit(encoded, y_train)
+            rows += len(X_train)
+        summary['passes'][f'epoch_{epoch + 1}'] = timed_pass(f"Epoch {epoch + 1}", rows, start)
+
+    print("\n[3/4] Evaluation pass...")
+    start = time.perf_counter()
+    streams = {name: {'train': StreamingMetrics(), 'test': StreamingMetrics()} for name in models}
+    rows = 0
+    for X, y, is_test in stream_chunks(args):
+        encoded = preprocessor.transform(X)
+        for name, model in models.items():
+            y_pred = model.predict(encoded)
+            if (~is_test).any():
+                streams[name]['train'].update(y[~is_test], y_pred[~is_test])
+            if is_test.any():
+                streams[name]['test'].update(y[is_test], y_pred[is_test])
+        rows += len(X)
+    summary['passes']['evaluation'] = timed_pass("Evaluation", rows, start)
+
+    summary['results'] = {}
+    for name, stream in streams.items():
+        train, test = stream['train'].result(), stream['test'].result()
+        summary['results'][name] = {'Train R²': train['R2 Score'], 'Test R²': test['R2 Score'],
+                                    'Test MSE': test['MSE'], 'Test MAE': test['MAE']}
+        print(f"  {name}: Train R² {train['R2 Score']:.4f} | Test R² {test['R2 Score']:.4f} "
+              f"| Test MSE {test['MSE']:,.2f}")
+
+    print("\n[4/4] Saving pipeline models...")
+    for name, model in models.items():
+        file_path = f"{name} Pipeline.pkl"
+        joblib.dump(Pipeline([('preprocessor', preprocessor), ('model', model)]), file_path)
+        print(f"  ✓ Saved: {file_path}")
+
+    summary['seconds'] = time.perf_counter() - start_total
+    summary['rows'] = summary['passes']['discovery']['rows']
+    summary['peak_memory_mb'] = peak_memory_mb()
+    return summary
+
+
+def run_in_memory(args) -> dict:
+    """Reference path: the in-memory approach of train_with_pipeline.py with the same models."""
+    print("\n[in-memory] Loading full CSV...")
+    start_total = time.perf_counter()
+    df = pd.read_csv(args.csv, dtype=RAW_DTYPES)
+    df.drop_duplicates(inplace=True)
+    df = engineer(df)
+    X, y = df.drop(TARGET, axis=1), df[TARGET].to_numpy()
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=args.test_size, shuffle=True, random_state=42
+    )
+
+    preprocessor = ColumnTransformer(
+        transformers=[
+            ('cat', OneHotEncoder(handle_unknown='ignore', sparse_output=False), CATEGORICAL_COLS),
+            ('num', StandardScaler(), NUMERICAL_COLS)
+        ]
+    )
+    encoded_train = preprocessor.fit_transform(X_train)
+    encoded_test = preprocessor.transform(X_test)
+    y_mean, y_scale = float(y_train.mean()), float(y_train.std())
+
+    summary = {'mode': 'in-memory', 'results': {}}
+    for name, model in build_models().items():
+        model = ScaledTargetRegressor(model, y_mean=y_mean, y_scale=y_scale)
+        for _ in range(args.epochs):
+            model.partial_fit(encoded_train, y_train)
+        test = calculate_metrics(y_test, model.predict(encoded_test))
+        summary['results'][name] = {'Test R²': test['R2 Score'], 'Test MSE': test['MSE']}
+        print(f"  {name}: Test R² {test['R2 Score']:.4f} | Test MSE {test['MSE']:,.2f}")
+
+    summary['seconds'] = time.perf_counter() - start_total
+    summary['rows'] = len(df)
+    summary['peak_memory_mb'] = peak_memory_mb()
+    return summary
+
+
+def compare(args, streaming: dict):
+    """Run the in-memory path in a fresh process and print both side by side."""
+    command = [sys.executable, __file__, '--in-memory', '--json',
+               '--csv', args.csv, '--epochs', str(args.epochs), '--test-size', str(args.test_size)]
+    output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+    in_memory = json.loads(output.strip().splitlines()[-1])
+
+    print("\n" + "=" * 80)
+    print("STREAMING vs IN-MEMORY")
+    print("=" * 80)
+    print(f"{'Mode':12} {'Rows':>12} {'Seconds':>10} {'Rows/s':>12} {'Peak MB':>10}")
+    for run in (streaming, in_memory):
+        print(f"{run['mode']:12} {run['rows']:>12,} {run['seconds']:>10.2f} "
+              f"{run['rows'] / run['seconds']:>12,.0f} {run['peak_memory_mb']:>10.1f}")
+    print("(rows/s counts each deduplicated row once per run, across all passes)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunked out-of-core training")
+    parser.add_argument('--csv', default='datafile.csv')
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    parser.add_argument('--epochs', type=int, default=3)
+    parser.add_argument('--test-size', type=float, default=0.15)
+    parser.add_argument('--dedup', choices=['exact', 'bloom', 'none'], default='exact',
+                        help="exact: hash set; bloom: fixed-memory approximate filter")
+    parser.add_argument('--expected-rows', type=int, default=10_000_000,
+                        help="Capacity of the Bloom filter")
+    parser.add_argument('--bloom-error-rate', type=float, default=1e-4)
+    parser.add_argument('--in-memory', action='store_true',
+                        help="Run the in-memory reference path instead")
+    parser.add_argument('--compare', action='store_true',
+                        help="Also run the in-memory path in a subprocess and compare")
+    parser.add_argument('--json', action='store_true', help="Print the summary as JSON")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("TRAFFIC VOLUME PREDICTION - OUT-OF-CORE TRAINING")
+    print("=" * 80)
+
+    summary = run_in_memory(args) if args.in_memory else run_streaming(args)
+    print(f"\nRows: {summary['rows']:,} | Time: {summary['seconds']:.2f}s | "
+          f"Peak memory: {summary['peak_memory_mb']:.1f} MB")
+
+    if args.compare and not args.in_memory:
+        compare(args, summary)
+    if args.json:
+        print(json.dumps(summary))
+
+
+if __name__ == "__main__":
+    main()
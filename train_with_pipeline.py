@@ -1,12 +1,26 @@
 """
 Pipeline-based Training Script for Traffic Volume Prediction
 Uses sklearn Pipeline + ColumnTransformer for robust preprocessing
+
+The preprocessor is fitted once and the candidate models are trained
+concurrently on the shared encoded matrix (see --jobs).
+
+Usage:
+    python train_with_pipeline.py            # one worker process per model
+    python train_with_pipeline.py --jobs 1   # train sequentially in-process
+    python train_with_pipeline.py --sparse   # sparse one-hot matrix end-to-end
+    python train_with_pipeline.py --export-compiled   # also write mmap-able compiled artifacts
+    python train_with_pipeline.py --budget --max-artifact-mb 20 --max-p99-ms 2
+                                             # pick Random Forest settings under size/latency limits
+    python train_with_pipeline.py --profile  # profile each step; collapsed stacks in profiles/train-*/
 """
 
+import argparse
+import os
+import time
+
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from sklearn.linear_model import LinearRegression
 from sklearn.tree import DecisionTreeRegressor
 from sklearn.ensemble import RandomForestRegressor
@@ -14,219 +28,400 @@ from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import OneHotEncoder, StandardScaler
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 import joblib
-import os
+import sklearn
 import warnings
 
-warnings.filterwarnings('ignore')
-
-print("=" * 80)
-print("TRAFFIC VOLUME PREDICTION - PIPELINE-BASED TRAINING")
-print("=" * 80)
-
-# ============================================================================
-# STEP 1: LOAD AND PREPARE DATA
-# ============================================================================
-
-print("\n[1/6] Loading data...")
-df = pd.read_csv('datafile.csv')
-print(f"Original data shape: {df.shape}")
-print(f"Columns: {list(df.columns)}")
-
-# Remove duplicates
-print("[1/6] Removing duplicates...")
-initial_length = len(df)
-df.drop_duplicates(inplace=True)
-print(f"Removed {initial_length - len(df)} duplicate rows")
-
-# ============================================================================
-# STEP 2: FEATURE ENGINEERING
-# ============================================================================
-
-print("\n[2/6] Performing feature engineering...")
-
-# Parse date_time
-df['date_time'] = pd.to_datetime(df['date_time'], format='%d-%m-%Y %H:%M')
-df['day'] = df['date_time'].dt.day_name()
-df['month'] = df['date_time'].dt.month
-df['year'] = df['date_time'].dt.year
-df['hour'] = df['date_time'].dt.hour
-df.drop('date_time', axis=1, inplace=True)
-
-# Drop weather_description (redundant with weather_main)
-df.drop('weather_description', axis=1, inplace=True)
-
-print(f"Data shape after feature engineering: {df.shape}")
-print(f"Columns: {list(df.columns)}")
-
-# ============================================================================
-# STEP 3: IDENTIFY CATEGORICAL AND NUMERICAL COLUMNS
-# ============================================================================
-
-print("\n[3/6] Identifying column types...")
-
-# Separate target from features
-X = df.drop('traffic_volume', axis=1)
-y = df['traffic_volume']
-
-# Identify categorical and numerical columns
-categorical_cols = X.select_dtypes(include=['object']).columns.tolist()
-numerical_cols = X.select_dtypes(include=['int64', 'float64']).columns.tolist()
-
-print(f"Categorical columns: {categorical_cols}")
-print(f"Numerical columns: {numerical_cols}")
-
-# ============================================================================
-# STEP 4: SPLIT DATA
-# ============================================================================
-
-print("\n[4/6] Splitting data (85% train, 15% test)...")
-X_train, X_test, y_train, y_test = train_test_split(
-    X, y, train_size=0.85, shuffle=True, random_state=42
+from utils.cache_utils import FeatureStore
+from utils.data_utils import build_feature_schema, load_raw_data, save_feature_schema
+from utils.feature_utils import add_datetime_features
+from utils.model_utils import save_compiled_model
+from utils.profile_utils import (
+    DEFAULT_PROFILE_DIR, ENGINES, PROFILE_DIR_ENV_VAR, Profiler, engine_from_environment, run_id
 )
-print(f"Training set size: {X_train.shape[0]}")
-print(f"Test set size: {X_test.shape[0]}")
+from utils.training_utils import fit_models_parallel, matrix_nbytes, pareto_front, search_forest_budget
 
-# ============================================================================
-# STEP 5: BUILD PIPELINES WITH PREPROCESSING
-# ============================================================================
-
-print("\n[5/6] Building preprocessing + model pipelines...")
+warnings.filterwarnings('ignore')
 
-# Create the preprocessing pipeline
-preprocessor = ColumnTransformer(
-    transformers=[
-        ('cat', OneHotEncoder(handle_unknown='ignore', sparse_output=False), categorical_cols),
-        ('num', StandardScaler(), numerical_cols)
-    ]
-)
+MODEL_NAMES = ['Linear Regression', 'Decision Tree', 'Random Forest']
 
-# Define models
-models = {
-    'Linear Regression': LinearRegression(),
-    'Decision Tree': DecisionTreeRegressor(random_state=42),
-    'Random Forest': RandomForestRegressor(n_estimators=100, random_state=42)
-}
+# Share of the training rows held out to score --budget candidates
+BUDGET_VALIDATION_SIZE = 0.15
 
-# Build and train pipelines
-pipelines = {}
-results = []
 
-for model_name, model in models.items():
-    print(f"\n  Training {model_name}...")
-    
-    # Create pipeline: preprocessing + model
-    pipeline = Pipeline([
-        ('preprocessor', preprocessor),
-        ('model', model)
-    ])
-    
-    # Train
-    pipeline.fit(X_train, y_train)
-    pipelines[model_name] = pipeline
-    
-    # Evaluate
-    y_pred_train = pipeline.predict(X_train)
-    y_pred_test = pipeline.predict(X_test)
+def build_models(n_jobs: int, forest_params: dict = None) -> dict:
+    """
+    Candidate models, keyed by the name used for "<name> Pipeline.pkl".
     
-    train_mse = mean_squared_error(y_train, y_pred_train)
-    train_r2 = r2_score(y_train, y_pred_train)
-    train_mae = mean_absolute_error(y_train, y_pred_train)
+    Args:
+        n_jobs: Worker processes used for training
+        forest_params: Random Forest settings overriding the defaults (e.g. from --budget)
     
-    test_mse = mean_squared_error(y_test, y_pred_test)
-    test_r2 = r2_score(y_test, y_pred_test)
-    test_mae = mean_absolute_error(y_test, y_pred_test)
+    Returns:
+        Dictionary of {model_name: unfitted estimator}
+    """
+    # Cores not taken by the other model workers go to the forest's own trees
+    forest_jobs = max(1, (os.cpu_count() or 1) - (n_jobs - 1))
+    forest_params = {'n_estimators': 100, **(forest_params or {})}
+    return {
+        'Linear Regression': LinearRegression(),
+        'Decision Tree': DecisionTreeRegressor(random_state=42),
+        'Random Forest': RandomForestRegressor(random_state=42, n_jobs=forest_jobs, **forest_params)
+    }
+
+
+def print_budget_report(candidates: list, front: list) -> None:
+    """Print every budget candidate, marking those within budget (✓) and on the Pareto front (★)."""
+    on_front = {id(c) for c in front}
+    print(f"\n  {'Trees':>5} {'Depth':>5} {'Leaf':>4} {'Val R²':>8} {'Val MAE':>8} "
+          f"{'Size (MB)':>10} {'p50 (ms)':>9} {'p99 (ms)':>9}")
+    for c in sorted(candidates, key=lambda c: (c['p99_ms'], -c['val_r2'])):
+        marks = ('✓' if c['feasible'] else ' ') + ('★' if id(c) in on_front else ' ')
+        depth = c['max_depth'] if c['max_depth'] is not None else '-'
+        print(f"  {c['n_estimators']:>5} {depth:>5} {c['min_samples_leaf']:>4} {c['val_r2']:>8.4f} "
+              f"{c['val_mae']:>8.1f} {c['artifact_mb']:>10.2f} {c['p50_ms']:>9.3f} {c['p99_ms']:>9.3f} {marks}")
+
+    print("\n  Accuracy/latency Pareto front (within budget):")
+    for c in front:
+        print(f"    Validation R² {c['val_r2']:.4f} at p99 {c['p99_ms']:.3f} ms, {c['artifact_mb']:.2f} MB  "
+              f"(n_estimators={c['n_estimators']}, max_depth={c['max_depth']}, "
+              f"min_samples_leaf={c['min_samples_leaf']})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train traffic volume pipelines")
+    parser.add_argument('--jobs', type=int, default=None,
+                        help="Worker processes for model training (default: one per model)")
+    parser.add_argument('--sparse', action='store_true',
+                        help="Keep the one-hot encoded matrix sparse (CSR) instead of dense float64")
+    parser.add_argument('--export-compiled', action='store_true',
+                        help="Also write memory-mappable '<name> Compiled' artifacts next to the pickles")
+    parser.add_argument('--compression', choices=['zlib', 'lzma'], default=None,
+                        help="Compress the compiled artifacts (disables memory-mapped loading)")
+    parser.add_argument('--feature-cache', default=os.path.join('.cache', 'features'),
+                        help="Directory caching the fitted preprocessor and encoded matrices")
+    parser.add_argument('--no-feature-cache', action='store_true',
+                        help="Always refit the preprocessor instead of reusing a cached encoding")
+    budget = parser.add_argument_group("budget mode", "Search Random Forest settings under size/latency limits")
+    budget.add_argument('--budget', action='store_true',
+                        help="Pick the most accurate Random Forest within --max-artifact-mb / --max-p99-ms")
+    budget.add_argument('--max-artifact-mb', type=float, default=None,
+                        help="Largest compiled artifact size in MB (default: no limit)")
+    budget.add_argument('--max-p99-ms', type=float, default=None,
+                        help="Largest p99 single-row compiled prediction latency in ms (default: no limit)")
+    budget.add_argument('--budget-trees', type=int, nargs='+', default=[25, 50, 100],
+                        help="Tree counts to try")
+    budget.add_argument('--budget-depths', type=int, nargs='+', default=[0, 20, 14, 10],
+                        help="max_depth values to try (0 = unlimited)")
+    budget.add_argument('--budget-leaves', type=int, nargs='+', default=[1, 5, 20],
+                        help="min_samples_leaf values to try")
+    parser.add_argument('--profile', nargs='?', const='cprofile', choices=ENGINES, default=None,
+                        help="Profile each step [1/6]..[6/6] (default engine: cprofile; also enabled by "
+                             "TRAFFIC_PROFILE) and write collapsed stacks per step")
+    args = parser.parse_args()
     
-    results.append({
-        'Model': model_name,
-        'Train MSE': train_mse,
-        'Test MSE': test_mse,
-        'Train R²': train_r2,
-        'Test R²': test_r2,
-        'Train MAE': train_mae,
-        'Test MAE': test_mae
-    })
+    # One directory per run, one set of files per step
+    profiler = Profiler(
+        args.profile or engine_from_environment([]),
+        os.path.join(os.environ.get(PROFILE_DIR_ENV_VAR, DEFAULT_PROFILE_DIR), run_id('train'))
+    )
     
-    print(f"    Train MSE: {train_mse:,.2f} | Test MSE: {test_mse:,.2f}")
-    print(f"    Train R²:  {train_r2:.4f}   | Test R²:  {test_r2:.4f}")
-
-# ============================================================================
-# STEP 6: SAVE MODELS
-# ============================================================================
-
-print("\n[6/6] Saving pipeline models...")
-
-# Save each pipeline
-for model_name, pipeline in pipelines.items():
-    file_path = f"{model_name} Pipeline.pkl"
-    joblib.dump(pipeline, file_path)
-    print(f"  ✓ Saved: {file_path}")
-
-# Also save the preprocessor separately for reference
-joblib.dump(preprocessor, "preprocessor.pkl")
-print(f"  ✓ Saved: preprocessor.pkl")
-
-# Save the feature information
-feature_info = {
-    'categorical_cols': categorical_cols,
-    'numerical_cols': numerical_cols,
-    'all_cols': categorical_cols + numerical_cols
-}
-joblib.dump(feature_info, "feature_info.pkl")
-print(f"  ✓ Saved: feature_info.pkl")
-
-# ============================================================================
-# EVALUATION SUMMARY
-# ============================================================================
-
-print("\n" + "=" * 80)
-print("EVALUATION SUMMARY")
-print("=" * 80)
-
-results_df = pd.DataFrame(results)
-print("\n" + results_df.to_string(index=False))
-
-# Find best models
-best_test_r2_model = results_df.loc[results_df['Test R²'].idxmax(), 'Model']
-best_test_mse_model = results_df.loc[results_df['Test MSE'].idxmin(), 'Model']
-
-print("\n" + "=" * 80)
-print(f"✓ Best Model (R² Score): {best_test_r2_model}")
-print(f"✓ Best Model (MSE):      {best_test_mse_model}")
-print("=" * 80)
-
-# ============================================================================
-# TEST PREDICTIONS WITH RAW INPUT
-# ============================================================================
-
-print("\n" + "=" * 80)
-print("TESTING PREDICTIONS WITH RAW INPUT")
-print("=" * 80)
-
-# Test with sample raw input (no manual encoding needed!)
-print("\nTesting with sample data (raw input, no manual encoding):")
-sample_raw = X_test.iloc[:3].copy()
-
-print("\nSample raw input:")
-print(sample_raw)
-
-print("\nActual values:")
-print(y_test.iloc[:3].values)
-
-print("\nPredictions from pipelines:")
-for model_name, pipeline in pipelines.items():
-    predictions = pipeline.predict(sample_raw)
-    print(f"\n{model_name}:")
-    for i, pred in enumerate(predictions):
-        print(f"  Sample {i+1}: {pred:,.0f} vehicles")
-
-print("\n" + "=" * 80)
-print("TRAINING COMPLETE!")
-print("=" * 80)
-print("\nNext steps:")
-print("1. Dashboard will now load pipeline models (e.g., 'Linear Regression Pipeline.pkl')")
-print("2. Accept raw user input (with categorical values)")
-print("3. Pipeline automatically handles preprocessing and prediction")
-print("4. No manual feature alignment needed!")
-print("=" * 80)
+    print("=" * 80)
+    print("TRAFFIC VOLUME PREDICTION - PIPELINE-BASED TRAINING")
+    print("=" * 80)
+
+    # ============================================================================
+    # STEP 1: LOAD AND PREPARE DATA
+    # ============================================================================
+
+    profiler.start_phase('1-load-data')
+    print("\n[1/6] Loading data...")
+    # Served from the typed columnar cache (built from the CSV on first run)
+    df = load_raw_data('datafile.csv')
+    print(f"Original data shape: {df.shape}")
+    print(f"Columns: {list(df.columns)}")
+
+    # Remove duplicates
+    print("[1/6] Removing duplicates...")
+    initial_length = len(df)
+    df.drop_duplicates(inplace=True)
+    print(f"Removed {initial_length - len(df)} duplicate rows")
+
+    # ============================================================================
+    # STEP 2: FEATURE ENGINEERING
+    # ============================================================================
+
+    profiler.start_phase('2-feature-engineering')
+    print("\n[2/6] Performing feature engineering...")
+
+    # Parse date_time into day, month, year and hour (drops date_time)
+    df = add_datetime_features(df)
+
+    # Drop weather_description (redundant with weather_main)
+    df.drop('weather_description', axis=1, inplace=True)
+
+    print(f"Data shape after feature engineering: {df.shape}")
+    print(f"Columns: {list(df.columns)}")
+
+    # ============================================================================
+    # STEP 3: IDENTIFY CATEGORICAL AND NUMERICAL COLUMNS
+    # ============================================================================
+
+    profiler.start_phase('3-column-types')
+    print("\n[3/6] Identifying column types...")
+
+    # Separate target from features
+    X = df.drop('traffic_volume', axis=1)
+    y = df['traffic_volume']
+
+    # Identify categorical and numerical columns
+    categorical_cols = X.select_dtypes(include=['object', 'category']).columns.tolist()
+    numerical_cols = X.select_dtypes(include=['int64', 'float64']).columns.tolist()
+
+    print(f"Categorical columns: {categorical_cols}")
+    print(f"Numerical columns: {numerical_cols}")
+
+    # ============================================================================
+    # STEP 4: SPLIT DATA
+    # ============================================================================
+
+    profiler.start_phase('4-split')
+    print("\n[4/6] Splitting data (85% train, 15% test)...")
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, train_size=0.85, shuffle=True, random_state=42
+    )
+    print(f"Training set size: {X_train.shape[0]}")
+    print(f"Test set size: {X_test.shape[0]}")
+
+    # ============================================================================
+    # STEP 5: BUILD PIPELINES WITH PREPROCESSING
+    # ============================================================================
+
+    profiler.start_phase('5-train')
+    print("\n[5/6] Building preprocessing + model pipelines...")
+
+    # Create the preprocessing pipeline
+    preprocessor = ColumnTransformer(
+        transformers=[
+            ('cat', OneHotEncoder(handle_unknown='ignore', sparse_output=args.sparse), categorical_cols),
+            ('num', StandardScaler(), numerical_cols)
+        ],
+        # With --sparse, stack to CSR whatever the density (the default 0.3 would densify
+        # a matrix with only a few categorical columns)
+        sparse_threshold=1.0 if args.sparse else 0.3
+    )
+
+    # Fit the preprocessor once (or reuse the encoding of an identical earlier run);
+    # every model trains and is evaluated on the same encoded matrices
+    if args.no_feature_cache:
+        encode_start = time.perf_counter()
+        X_train_encoded = preprocessor.fit_transform(X_train)
+        fit_seconds = time.perf_counter() - encode_start
+        X_test_encoded = preprocessor.transform(X_test)
+        transform_seconds = time.perf_counter() - encode_start - fit_seconds
+        encode_seconds = fit_seconds + transform_seconds
+        print(f"  Encoded design matrix: {X_train_encoded.shape} in {encode_seconds:.2f}s")
+    else:
+        store = FeatureStore(args.feature_cache)
+        preprocessor, X_train_encoded, X_test_encoded = store.fit_transform(preprocessor, X_train, X_test)
+        fit_seconds = store.last_encode_seconds['fit_transform']
+        transform_seconds = store.last_encode_seconds['transform']
+        encode_seconds = store.last_seconds
+        source = "loaded from feature cache" if store.last_hit else "encoded and cached"
+        print(f"  Encoded design matrix: {X_train_encoded.shape} {source} in {encode_seconds:.2f}s")
+
+    layout = "sparse CSR" if args.sparse else "dense"
+    print(f"  Design matrix memory ({layout}): "
+          f"{(matrix_nbytes(X_train_encoded) + matrix_nbytes(X_test_encoded)) / 2**20:.1f} MB")
+
+    # A separate Pipeline per model would encode X_train while fitting, then X_train
+    # and X_test again for evaluation (transforming X_train costs about as much as fitting it)
+    per_model_seconds = 2 * fit_seconds + transform_seconds
+    naive_seconds = len(MODEL_NAMES) * per_model_seconds
+    print(f"  Encoding time: {encode_seconds:.2f}s vs ~{naive_seconds:.2f}s for "
+          f"{len(MODEL_NAMES)} separate pipelines (saved ~{max(naive_seconds - encode_seconds, 0):.2f}s)")
+
+    forest_params = None
+    if args.budget:
+        print("\n  Budget search: Random Forest settings "
+              f"(max artifact: {args.max_artifact_mb or 'unlimited'} MB, "
+              f"max p99 latency: {args.max_p99_ms or 'unlimited'} ms)...")
+        budget_start = time.perf_counter()
+        # Settings are chosen on a validation split of the training rows, so the
+        # test set still gives an unbiased score for the forest trained below
+        search_idx, val_idx = train_test_split(
+            np.arange(len(X_train)), test_size=BUDGET_VALIDATION_SIZE, shuffle=True, random_state=42
+        )
+        print(f"  Validation split: {len(val_idx)} of {len(X_train)} training rows")
+        candidates = search_forest_budget(
+            X_train_encoded[search_idx], y_train.values[search_idx],
+            X_train_encoded[val_idx], y_train.values[val_idx], preprocessor,
+            sample_rows=X_train.iloc[val_idx[:100]].to_dict('records'),
+            n_estimators=tuple(args.budget_trees),
+            max_depths=tuple(depth or None for depth in args.budget_depths),
+            min_samples_leaf=tuple(args.budget_leaves),
+            max_artifact_mb=args.max_artifact_mb,
+            max_p99_ms=args.max_p99_ms,
+            n_jobs=os.cpu_count()
+        )
+        feasible = [c for c in candidates if c['feasible']]
+        print_budget_report(candidates, pareto_front(feasible))
+        print(f"  Searched {len(candidates)} settings in {time.perf_counter() - budget_start:.1f}s")
+        if feasible:
+            best = max(feasible, key=lambda c: c['val_r2'])
+            forest_params = {key: best[key] for key in ('n_estimators', 'max_depth', 'min_samples_leaf')}
+            print(f"  ✓ Random Forest will use {forest_params}")
+        else:
+            print("  ⚠️  No setting fits the budget; training the Random Forest with default settings")
+
+    n_jobs = args.jobs or min(len(MODEL_NAMES), os.cpu_count() or 1)
+    models = build_models(n_jobs, forest_params)
+    if profiler.enabled and n_jobs > 1:
+        print("  ⚠️  Profiling only sees this process; use --jobs 1 to profile the model fits")
+
+    print(f"  Training {len(models)} models with {n_jobs} worker process(es)...")
+    train_start = time.perf_counter()
+    fitted = fit_models_parallel(models, X_train_encoded, y_train.values,
+                                 X_test_encoded, y_test.values, n_jobs=n_jobs)
+    train_wall = time.perf_counter() - train_start
+
+    # Build pipelines and collect results
+    pipelines = {}
+    results = []
+
+    for model_name, result in fitted.items():
+        print(f"\n  {model_name}")
+
+        # Same result as Pipeline.fit: the preprocessor is already fitted on X_train
+        pipelines[model_name] = Pipeline([
+            ('preprocessor', preprocessor),
+            ('model', result['model'])
+        ])
+
+        train_metrics = result['train_metrics']
+        test_metrics = result['test_metrics']
+
+        results.append({
+            'Model': model_name,
+            'Train MSE': train_metrics['MSE'],
+            'Test MSE': test_metrics['MSE'],
+            'Train R²': train_metrics['R2 Score'],
+            'Test R²': test_metrics['R2 Score'],
+            'Train MAE': train_metrics['MAE'],
+            'Test MAE': test_metrics['MAE']
+        })
+
+        print(f"    Train MSE: {train_metrics['MSE']:,.2f} | Test MSE: {test_metrics['MSE']:,.2f}")
+        print(f"    Train R²:  {train_metrics['R2 Score']:.4f}   | Test R²:  {test_metrics['R2 Score']:.4f}")
+
+    # Per-model cost breakdown
+    print(f"\n  {'Model':20} {'Fit (s)':>9} {'Predict (s)':>12} {'CPU (s)':>9}")
+    for model_name, result in fitted.items():
+        print(f"  {model_name:20} {result['fit_seconds']:>9.2f} {result['predict_seconds']:>12.2f} "
+              f"{result['cpu_seconds']:>9.2f}")
+    serial_wall = sum(r['fit_seconds'] + r['predict_seconds'] for r in fitted.values())
+    print(f"  Wall-clock: {train_wall:.2f}s (sum of per-model times: {serial_wall:.2f}s)")
+
+    # ============================================================================
+    # STEP 6: SAVE MODELS
+    # ============================================================================
+
+    profiler.start_phase('6-save')
+    print("\n[6/6] Saving pipeline models...")
+
+    # Save each pipeline
+    for model_name, pipeline in pipelines.items():
+        file_path = f"{model_name} Pipeline.pkl"
+        joblib.dump(pipeline, file_path)
+        print(f"  ✓ Saved: {file_path}")
+        if args.export_compiled:
+            try:
+                artifact_path = save_compiled_model(model_name, pipeline, compression=args.compression)
+                print(f"  ✓ Saved: {os.path.basename(artifact_path)}/")
+            except TypeError as e:
+                print(f"  ⚠️  {model_name} can't be compiled: {e}")
+
+    # Also save the preprocessor separately for reference
+    joblib.dump(preprocessor, "preprocessor.pkl")
+    print(f"  ✓ Saved: preprocessor.pkl")
+
+    # Save the feature information
+    feature_info = {
+        'categorical_cols': categorical_cols,
+        'numerical_cols': numerical_cols,
+        'all_cols': categorical_cols + numerical_cols
+    }
+    joblib.dump(feature_info, "feature_info.pkl")
+    print(f"  ✓ Saved: feature_info.pkl")
+
+    # Form schema for the dashboard: encoder vocabularies plus training ranges and quantiles
+    feature_schema = build_feature_schema(X_train, preprocessor, default_row=None)
+    save_feature_schema(feature_schema, "feature_schema.json",
+                        n_rows=len(X_train), sklearn_version=sklearn.__version__)
+    print(f"  ✓ Saved: feature_schema.json")
+    profiler.finish()
+
+    # ============================================================================
+    # EVALUATION SUMMARY
+    # ============================================================================
+
+    print("\n" + "=" * 80)
+    print("EVALUATION SUMMARY")
+    print("=" * 80)
+
+    results_df = pd.DataFrame(results)
+    print("\n" + results_df.to_string(index=False))
+
+    # Find best models
+    best_test_r2_model = results_df.loc[results_df['Test R²'].idxmax(), 'Model']
+    best_test_mse_model = results_df.loc[results_df['Test MSE'].idxmin(), 'Model']
+
+    print("\n" + "=" * 80)
+    print(f"✓ Best Model (R² Score): {best_test_r2_model}")
+    print(f"✓ Best Model (MSE):      {best_test_mse_model}")
+    print("=" * 80)
+
+    # ============================================================================
+    # TEST PREDICTIONS WITH RAW INPUT
+    # ============================================================================
+
+    print("\n" + "=" * 80)
+    print("TESTING PREDICTIONS WITH RAW INPUT")
+    print("=" * 80)
+
+    # Test with sample raw input (no manual encoding needed!)
+    print("\nTesting with sample data (raw input, no manual encoding):")
+    sample_raw = X_test.iloc[:3].copy()
+
+    print("\nSample raw input:")
+    print(sample_raw)
+
+    print("\nActual values:")
+    print(y_test.iloc[:3].values)
+
+    print("\nPredictions from pipelines:")
+    for model_name, pipeline in pipelines.items():
+        predictions = pipeline.predict(sample_raw)
+        print(f"\n{model_name}:")
+        for i, pred in enumerate(predictions):
+            print(f"  Sample {i+1}: {pred:,.0f} vehicles")
+
+    print("\n" + "=" * 80)
+    print("TRAINING COMPLETE!")
+    print("=" * 80)
+    print("\nNext steps:")
+    print("1. Dashboard will now load pipeline models (e.g., 'Linear Regression Pipeline.pkl')")
+    print("2. Accept raw user input (with categorical values)")
+    print("3. Pipeline automatically handles preprocessing and prediction")
+    print("4. No manual feature alignment needed!")
+    print("=" * 80)
+
+    if profiler.written:
+        print(f"\nProfiles ({profiler.engine}) written to {profiler.output_dir}/:")
+        for path in profiler.written:
+            print(f"  {os.path.basename(path)}")
+        print("Render with e.g. flamegraph.pl <step>.collapsed > <step>.svg, or open in speedscope.app")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,41 +1,131 @@
 """
 Utils module for the Traffic Volume Prediction Dashboard.
+
+Public helpers are loaded lazily: `from utils import calculate_metrics` only
+imports utils.metrics_utils, not plotly, Streamlit or the other submodules.
 """
 
-from .model_utils import load_model, load_all_models, get_model_type
-from .metrics_utils import calculate_metrics, calculate_residuals, get_prediction_error_stats
-from .plot_utils import (
-    plot_actual_vs_predicted,
-    plot_residuals,
-    plot_actual_vs_predicted_line,
-    plot_model_comparison,
-    plot_error_distribution,
-    plot_feature_importance
-)
-from .data_utils import (
-    load_test_data,
-    get_feature_names,
-    get_feature_stats,
-    prepare_sample_input,
-    validate_input
-)
-
-__all__ = [
-    'load_model',
-    'load_all_models',
-    'get_model_type',
-    'calculate_metrics',
-    'calculate_residuals',
-    'get_prediction_error_stats',
-    'plot_actual_vs_predicted',
-    'plot_residuals',
-    'plot_actual_vs_predicted_line',
-    'plot_model_comparison',
-    'plot_error_distribution',
-    'plot_feature_importance',
-    'load_test_data',
-    'get_feature_names',
-    'get_feature_stats',
-    'prepare_sample_input',
-    'validate_input'
-]
+import importlib
+from typing import TYPE_CHECKING
+
+# Public symbol -> submodule that defines it
+_LAZY_ATTRIBUTES = {
+    'load_model': 'model_utils',
+    'load_all_models': 'model_utils',
+    'get_model_type': 'model_utils',
+    'ModelRegistry': 'model_utils',
+    'get_default_registry': 'model_utils',
+    'load_compiled_model': 'model_utils',
+    'get_compiled_registry': 'model_utils',
+    'calculate_metrics': 'metrics_utils',
+    'calculate_metrics_batch': 'metrics_utils',
+    'calculate_residuals': 'metrics_utils',
+    'compute_histogram': 'metrics_utils',
+    'get_prediction_error_stats': 'metrics_utils',
+    'StreamingMetrics': 'metrics_utils',
+    'StreamingHistogram': 'metrics_utils',
+    'QuantileSketch': 'metrics_utils',
+    'plot_actual_vs_predicted': 'plot_utils',
+    'plot_residuals': 'plot_utils',
+    'plot_actual_vs_predicted_line': 'plot_utils',
+    'plot_model_comparison': 'plot_utils',
+    'plot_error_distribution': 'plot_utils',
+    'plot_target_distribution': 'plot_utils',
+    'plot_feature_importance': 'plot_utils',
+    'load_test_data': 'data_utils',
+    'get_feature_names': 'data_utils',
+    'get_feature_stats': 'data_utils',
+    'prepare_sample_input': 'data_utils',
+    'validate_input': 'data_utils',
+    'build_feature_schema': 'data_utils',
+    'extract_datetime_features': 'feature_utils',
+    'add_datetime_features': 'feature_utils',
+    'PredictionCache': 'cache_utils',
+    'fingerprint_frame': 'cache_utils',
+    'FeatureStore': 'cache_utils',
+    'compile_pipeline': 'inference_utils',
+    'CompiledPipeline': 'inference_utils',
+    'PackedForest': 'inference_utils',
+    'save_artifact': 'inference_utils',
+    'load_artifact': 'inference_utils',
+    'compute_feature_importances': 'importance_utils',
+    'get_feature_importances': 'importance_utils',
+    'resolve_feature_sources': 'importance_utils',
+    'permutation_importance': 'importance_utils',
+    'get_permutation_importance': 'importance_utils',
+    'PerfRecorder': 'perf_utils',
+    'get_recorder': 'perf_utils',
+    'timed': 'perf_utils',
+}
+
+if TYPE_CHECKING:
+    from .model_utils import (
+        load_model,
+        load_all_models,
+        get_model_type,
+        ModelRegistry,
+        get_default_registry,
+        load_compiled_model,
+        get_compiled_registry
+    )
+    from .metrics_utils import (
+        calculate_metrics,
+        calculate_metrics_batch,
+        calculate_residuals,
+        compute_histogram,
+        get_prediction_error_stats,
+        StreamingMetrics,
+        StreamingHistogram,
+        QuantileSketch
+    )
+    from .plot_utils import (
+        plot_actual_vs_predicted,
+        plot_residuals,
+        plot_actual_vs_predicted_line,
+        plot_model_comparison,
+        plot_error_distribution,
+        plot_target_distribution,
+        plot_feature_importance
+    )
+    from .data_utils import (
+        load_test_data,
+        get_feature_names,
+        get_feature_stats,
+        prepare_sample_input,
+        validate_input,
+        build_feature_schema
+    )
+    from .feature_utils import extract_datetime_features, add_datetime_features
+    from .cache_utils import PredictionCache, fingerprint_frame, FeatureStore
+    from .inference_utils import (
+        compile_pipeline,
+        CompiledPipeline,
+        PackedForest,
+        save_artifact,
+        load_artifact
+    )
+    from .importance_utils import (
+        compute_feature_importances,
+        get_feature_importances,
+        resolve_feature_sources,
+        permutation_importance,
+        get_permutation_importance
+    )
+    from .perf_utils import PerfRecorder, get_recorder, timed
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module_name}', __name__), name)
+    # Cache on the package so later lookups skip __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
+
+
+__all__ = list(_LAZY_ATTRIBUTES)
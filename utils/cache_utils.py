@@ -0,0 +1,420 @@
+"""
+Prediction and metrics caching utilities for the ML dashboard.
+Each (model, dataset) pair is predicted and scored once and then shared
+across every dashboard section that needs it.
+
+FeatureStore does the same for training: the fitted preprocessor and the
+encoded design matrices are kept on disk, keyed by data and parameters.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .metrics_utils import calculate_metrics, compute_histogram
+from .perf_utils import record_cache, timed
+
+
+@timed()
+def fingerprint_frame(X: pd.DataFrame) -> str:
+    """
+    Compute a content fingerprint for a DataFrame.
+
+    The fingerprint covers column names, dtypes, index and values, so two
+    frames with identical content map to the same cache entries even if
+    they are different objects (e.g. re-read from CSV on a Streamlit rerun).
+
+    Args:
+        X: DataFrame to fingerprint
+
+    Returns:
+        Hex digest string
+    """
+    digest = hashlib.sha1()
+    digest.update(repr(list(X.columns)).encode())
+    digest.update(repr([str(dtype) for dtype in X.dtypes]).encode())
+    digest.update(pd.util.hash_pandas_object(X, index=True).values.tobytes())
+    return digest.hexdigest()
+
+
+class PredictionCache:
+    """
+    Bounded LRU cache of predictions, metrics and histograms keyed by model
+    identity and dataset fingerprint.
+
+    Usage:
+        cache = PredictionCache()
+        key = fingerprint_frame(test_data)
+        y_pred = cache.get_predictions('Random Forest', pipeline, X_test, key)
+        metrics = cache.get_metrics('Random Forest', pipeline, X_test, y_test, key)
+    """
+
+    def __init__(self, max_entries: int = 32):
+        """
+        Args:
+            max_entries: Maximum number of (model, dataset) entries to keep
+        """
+        self.max_entries = max_entries
+        self._predictions = OrderedDict()
+        self._metrics = OrderedDict()
+        self._histograms = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(model_name: str, model: Any, dataset_key: Hashable) -> tuple:
+        # id(model) distinguishes a reloaded pipeline from the one that was cached
+        return (model_name, id(model), dataset_key)
+
+    def _store(self, store: OrderedDict, key: tuple, value: Any) -> None:
+        store[key] = value
+        store.move_to_end(key)
+        while len(store) > self.max_entries:
+            store.popitem(last=False)
+
+    def get_predictions(
+        self,
+        model_name: str,
+        model: Any,
+        X: pd.DataFrame,
+        dataset_key: Hashable,
+        predict_fn: Optional[Callable[[Any, pd.DataFrame], Optional[np.ndarray]]] = None
+    ) -> Optional[np.ndarray]:
+        """
+        Return cached predictions, computing them on the first request.
+
+        Args:
+            model_name: Display name of the model
+            model: Fitted pipeline object
+            X: Raw feature DataFrame
+            dataset_key: Fingerprint of the dataset X was taken from
+            predict_fn: Optional callable(model, X) used instead of model.predict;
+                a None result is returned but not cached
+
+        Returns:
+            Array of predictions, or None if predict_fn failed
+        """
+        key = self._key(model_name, model, dataset_key)
+        with self._lock:
+            hit = key in self._predictions
+            record_cache('predictions', hit)
+            if hit:
+                self.hits += 1
+                self._predictions.move_to_end(key)
+                return self._predictions[key]
+            self.misses += 1
+
+        y_pred = predict_fn(model, X) if predict_fn is not None else model.predict(X)
+        if y_pred is None:
+            return None
+
+        y_pred = np.asarray(y_pred)
+        y_pred.setflags(write=False)
+        with self._lock:
+            self._store(self._predictions, key, y_pred)
+        return y_pred
+
+    def get_metrics(
+        self,
+        model_name: str,
+        model: Any,
+        X: pd.DataFrame,
+        y_true: np.ndarray,
+        dataset_key: Hashable,
+        predict_fn: Optional[Callable[[Any, pd.DataFrame], Optional[np.ndarray]]] = None
+    ) -> Optional[dict]:
+        """
+        Return cached evaluation metrics, reusing cached predictions.
+
+        Args:
+            model_name: Display name of the model
+            model: Fitted pipeline object
+            X: Raw feature DataFrame
+            y_true: Actual target values for X
+            dataset_key: Fingerprint of the dataset X and y_true were taken from
+            predict_fn: Optional callable(model, X) used instead of model.predict
+
+        Returns:
+            Dictionary from calculate_metrics(), or None if prediction failed
+        """
+        key = self._key(model_name, model, dataset_key)
+        with self._lock:
+            hit = key in self._metrics
+            record_cache('metrics', hit)
+            if hit:
+                self.hits += 1
+                self._metrics.move_to_end(key)
+                return self._metrics[key]
+            self.misses += 1
+
+        y_pred = self.get_predictions(model_name, model, X, dataset_key, predict_fn)
+        if y_pred is None:
+            return None
+
+        metrics = calculate_metrics(y_true, y_pred)
+        with self._lock:
+            self._store(self._metrics, key, metrics)
+        return metrics
+
+    def _cached_histogram(self, key: tuple, compute: Callable[[], Optional[np.ndarray]], bins: int):
+        with self._lock:
+            hit = key in self._histograms
+            record_cache('histograms', hit)
+            if hit:
+                self.hits += 1
+                self._histograms.move_to_end(key)
+                return self._histograms[key]
+            self.misses += 1
+
+        values = compute()
+        if values is None:
+            return None
+
+        histogram = compute_histogram(values, bins)
+        for array in histogram:
+            array.setflags(write=False)
+        with self._lock:
+            self._store(self._histograms, key, histogram)
+        return histogram
+
+    def get_residual_histogram(
+        self,
+        model_name: str,
+        model: Any,
+        X: pd.DataFrame,
+        y_true: np.ndarray,
+        dataset_key: Hashable,
+        bins: int = 30,
+        predict_fn: Optional[Callable[[Any, pd.DataFrame], Optional[np.ndarray]]] = None
+    ) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Return the cached histogram of residuals (actual - predicted), reusing cached predictions.
+
+        Args:
+            model_name: Display name of the model
+            model: Fitted pipeline object
+            X: Raw feature DataFrame
+            y_true: Actual target values for X
+            dataset_key: Fingerprint of the dataset X and y_true were taken from
+            bins: Number of bins
+            predict_fn: Optional callable(model, X) used instead of model.predict
+
+        Returns:
+            Tuple of (bin edges, counts) from compute_histogram(), or None if prediction failed
+        """
+        def residuals():
+            y_pred = self.get_predictions(model_name, model, X, dataset_key, predict_fn)
+            return None if y_pred is None else np.asarray(y_true, dtype=np.float64) - y_pred
+
+        key = ('residuals',) + self._key(model_name, model, dataset_key) + (bins,)
+        return self._cached_histogram(key, residuals, bins)
+
+    def get_target_histogram(
+        self,
+        y_true: np.ndarray,
+        dataset_key: Hashable,
+        bins: int = 30
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the cached histogram of the target values of a dataset.
+
+        Args:
+            y_true: Actual target values
+            dataset_key: Fingerprint of the dataset y_true was taken from
+            bins: Number of bins
+
+        Returns:
+            Tuple of (bin edges, counts) from compute_histogram()
+        """
+        return self._cached_histogram(('target', dataset_key, bins), lambda: y_true, bins)
+
+    def clear(self) -> None:
+        """Drop all cached predictions, metrics and histograms."""
+        with self._lock:
+            self._predictions.clear()
+            self._metrics.clear()
+            self._histograms.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# ============================================================================
+# ENCODED FEATURE STORE FOR TRAINING
+# ============================================================================
+
+class FeatureStore:
+    """
+    On-disk cache of a fitted preprocessor and the train/test matrices it
+    produces.
+
+    Entries are keyed by the content of X_train and X_test plus the
+    preprocessor's parameters and the sklearn version, so a rerun on
+    unchanged data skips fit_transform entirely and a change to either
+    invalidates the entry. Matrices (dense, or CSR as data/indices/indptr)
+    are stored as .npy and memory-mapped on load.
+
+    Usage:
+        store = FeatureStore('.cache/features')
+        preprocessor, X_train_enc, X_test_enc = store.fit_transform(preprocessor, X_train, X_test)
+        print(store.last_hit, store.last_seconds, store.last_encode_seconds)
+    """
+
+    def __init__(self, cache_dir: str = '.cache/features', max_entries: int = 4):
+        """
+        Args:
+            cache_dir: Directory holding one subdirectory per entry
+            max_entries: Entries kept on disk; the least recently used are removed
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+        self.last_hit = False
+        self.last_seconds = 0.0
+        self.last_encode_seconds = {'fit_transform': 0.0, 'transform': 0.0}
+
+    @staticmethod
+    def key(preprocessor: Any, X_train: pd.DataFrame, X_test: pd.DataFrame) -> str:
+        """
+        Cache key for an unfitted preprocessor and a train/test split.
+
+        Args:
+            preprocessor: Unfitted transformer (e.g. ColumnTransformer)
+            X_train: Raw training features
+            X_test: Raw test features
+
+        Returns:
+            Hex digest string
+        """
+        import joblib
+        import sklearn
+
+        digest = hashlib.sha1()
+        digest.update(sklearn.__version__.encode())
+        digest.update(joblib.hash(preprocessor.get_params(deep=True)).encode())
+        digest.update(fingerprint_frame(X_train).encode())
+        digest.update(fingerprint_frame(X_test).encode())
+        return digest.hexdigest()
+
+    @staticmethod
+    def _save_matrix(directory: Path, name: str, X: Any) -> dict:
+        # CSR matrices are stored as their three component arrays so they can be memory-mapped too
+        if hasattr(X, 'indptr'):
+            X = X.tocsr()
+            for part in ('data', 'indices', 'indptr'):
+                np.save(directory / f'{name}.{part}.npy', getattr(X, part))
+            return {'format': 'csr', 'shape': list(X.shape)}
+        np.save(directory / f'{name}.npy', np.ascontiguousarray(X))
+        return {'format': 'dense'}
+
+    @staticmethod
+    def _load_matrix(directory: Path, name: str, layout: dict) -> Any:
+        if layout['format'] == 'csr':
+            from scipy import sparse
+
+            parts = [np.load(directory / f'{name}.{part}.npy', mmap_mode='r')
+                     for part in ('data', 'indices', 'indptr')]
+            return sparse.csr_matrix(tuple(parts), shape=tuple(layout['shape']), copy=False)
+        return np.load(directory / f'{name}.npy', mmap_mode='r')
+
+    def _load(self, entry: Path) -> Tuple[Any, Any, Any]:
+        import joblib
+
+        with open(entry / 'manifest.json') as f:
+            manifest = json.load(f)
+        self.last_encode_seconds = manifest['timings']
+        preprocessor = joblib.load(entry / 'preprocessor.pkl')
+        X_train = self._load_matrix(entry, 'X_train', manifest['matrices']['X_train'])
+        X_test = self._load_matrix(entry, 'X_test', manifest['matrices']['X_test'])
+        # Refresh the mtime so eviction treats this entry as recently used
+        os.utime(entry)
+        return preprocessor, X_train, X_test
+
+    def _save(self, entry: Path, preprocessor: Any, X_train: Any, X_test: Any) -> None:
+        import joblib
+
+        # Write into a temporary directory, then swap it in so readers never see a partial entry
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_dir = Path(tempfile.mkdtemp(dir=self.cache_dir, prefix=f'.{entry.name}-'))
+        try:
+            joblib.dump(preprocessor, tmp_dir / 'preprocessor.pkl')
+            manifest = {
+                'timings': self.last_encode_seconds,
+                'matrices': {
+                    'X_train': self._save_matrix(tmp_dir, 'X_train', X_train),
+                    'X_test': self._save_matrix(tmp_dir, 'X_test', X_test)
+                }
+            }
+            with open(tmp_dir / 'manifest.json', 'w') as f:
+                json.dump(manifest, f, indent=2)
+            if entry.exists():
+                shutil.rmtree(entry)
+            os.replace(tmp_dir, entry)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = sorted(
+            (path for path in self.cache_dir.iterdir() if path.is_dir() and not path.name.startswith('.')),
+            key=lambda path: path.stat().st_mtime
+        )
+        for path in entries[:max(0, len(entries) - self.max_entries)]:
+            shutil.rmtree(path, ignore_errors=True)
+
+    def fit_transform(
+        self,
+        preprocessor: Any,
+        X_train: pd.DataFrame,
+        X_test: pd.DataFrame
+    ) -> Tuple[Any, Any, Any]:
+        """
+        Fit the preprocessor on X_train and encode both splits, or load the
+        result of an earlier identical call.
+
+        Args:
+            preprocessor: Unfitted transformer; fitted in place on a miss
+            X_train: Raw training features
+            X_test: Raw test features
+
+        Returns:
+            Tuple of (fitted preprocessor, encoded X_train, encoded X_test).
+            On a hit the preprocessor is the unpickled copy from disk and the
+            matrices are read-only memory maps. last_encode_seconds holds the
+            fit_transform/transform times measured when the entry was built.
+        """
+        start = time.perf_counter()
+        entry = self.cache_dir / self.key(preprocessor, X_train, X_test)
+
+        if (entry / 'manifest.json').exists():
+            try:
+                result = self._load(entry)
+                self.last_hit = True
+                self.last_seconds = time.perf_counter() - start
+                return result
+            except Exception:
+                # Unreadable entry (e.g. written by an incompatible version): rebuild it
+                shutil.rmtree(entry, ignore_errors=True)
+
+        fit_start = time.perf_counter()
+        X_train_encoded = preprocessor.fit_transform(X_train)
+        transform_start = time.perf_counter()
+        X_test_encoded = preprocessor.transform(X_test)
+        self.last_encode_seconds = {
+            'fit_transform': transform_start - fit_start,
+            'transform': time.perf_counter() - transform_start
+        }
+        self._save(entry, preprocessor, X_train_encoded, X_test_encoded)
+        self.last_hit = False
+        self.last_seconds = time.perf_counter() - start
+        return preprocessor, X_train_encoded, X_test_encoded
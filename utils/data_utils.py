@@ -2,11 +2,28 @@
 Data processing and preparation utilities.
 """
 
+import hashlib
+import json
+import os
+import shutil
+import tempfile
 import pandas as pd
 import numpy as np
-from typing import Tuple, List
+from pathlib import Path
+from typing import Tuple, List, Optional
 
+from .perf_utils import timed
 
+
+# Bump when the on-disk cache layout changes so stale caches are rebuilt
+CACHE_FORMAT_VERSION = 1
+
+# Bump when the feature schema layout changes; older schema files are then ignored
+FEATURE_SCHEMA_VERSION = 1
+SCHEMA_QUANTILES = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+
+
+@timed()
 def load_test_data(filepath: str) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray]:
     """
     Load test data from a CSV file.
@@ -128,3 +145,323 @@ def get_numerical_features(X: pd.DataFrame) -> List[str]:
         List of numerical feature names
     """
     return X.select_dtypes(include=[np.number]).columns.tolist()
+
+
+def _encoder_vocabularies(preprocessor) -> dict:
+    """{feature: fitted categories} of every OneHotEncoder in a fitted ColumnTransformer."""
+    vocabularies = {}
+    for _, transformer, columns in getattr(preprocessor, 'transformers_', []):
+        if hasattr(transformer, 'categories_'):
+            vocabularies.update(zip(columns, transformer.categories_))
+    return vocabularies
+
+
+def _model_columns(preprocessor) -> Optional[set]:
+    """Columns a fitted ColumnTransformer feeds to the model (None if unknown)."""
+    if not hasattr(preprocessor, 'transformers_'):
+        return None
+    return {column for _, transformer, columns in preprocessor.transformers_
+            if transformer != 'drop' for column in columns}
+
+
+@timed()
+def build_feature_schema(X: pd.DataFrame, preprocessor=None, default_row: Optional[int] = 0) -> dict:
+    """
+    Describe every input feature once, so the prediction form can render
+    without scanning the dataset on each rerun.
+
+    Numeric features get a slider range (min/max, widened by 1.0 when
+    constant), a step of 1% of the range (at least 0.01), quantiles and a
+    default clamped into the range. Categorical features get their sorted
+    vocabulary and the index of the default; None (= NaN) is offered first.
+
+    With a fitted preprocessor, vocabularies are the OneHotEncoder's
+    categories_ and None is only offered where NaN is a known category, so
+    no form value is silently encoded as all zeros by handle_unknown='ignore'.
+
+    Args:
+        X: Features DataFrame (the training set when preprocessor is given)
+        preprocessor: Optional fitted ColumnTransformer the models were trained with
+        default_row: Position of the row whose values are used as defaults;
+            None uses each feature's median (numeric) or most frequent value
+
+    Returns:
+        Dictionary with 'columns' (feature order), 'numerical' and
+        'categorical' ({feature: spec}); every value is plain Python
+    """
+    vocabularies = _encoder_vocabularies(preprocessor)
+    model_columns = _model_columns(preprocessor)
+    defaults = X.iloc[default_row] if default_row is not None and len(X) else pd.Series(dtype=object)
+    numerical = {}
+    categorical = {}
+    for feature in X.columns:
+        column = X[feature]
+        default = defaults.get(feature)
+        used = model_columns is None or feature in model_columns
+        if pd.api.types.is_numeric_dtype(column):
+            values = column.dropna().to_numpy(dtype=np.float64)
+            quantiles = np.quantile(values, SCHEMA_QUANTILES) if len(values) else np.zeros(len(SCHEMA_QUANTILES))
+            min_val = float(values.min()) if len(values) else 0.0
+            max_val = float(values.max()) if len(values) else 0.0
+            if default_row is None:
+                default = quantiles[SCHEMA_QUANTILES.index(0.5)]
+            default_val = float(default) if pd.notna(default) else min_val
+            if min_val == max_val:
+                max_val = min_val + 1.0
+                default_val = min_val
+            numerical[feature] = {
+                'dtype': str(column.dtype),
+                'min': min_val,
+                'max': max_val,
+                'default': min(max_val, max(min_val, default_val)),
+                'step': max(0.01, (max_val - min_val) / 100),
+                'quantiles': {f'p{round(q * 100):02d}': float(v) for q, v in zip(SCHEMA_QUANTILES, quantiles)},
+                'used': used
+            }
+        else:
+            if feature in vocabularies:
+                known = vocabularies[feature].tolist()
+                values = [value for value in known if pd.notna(value)]
+                options = ([None] if len(values) < len(known) else []) + sorted(values)
+            else:
+                options = [None] + sorted(column.dropna().unique().tolist())
+            if default_row is None:
+                mode = column.mode(dropna=False)
+                default = mode.iloc[0] if len(mode) else None
+            if pd.notna(default) and default in options:
+                default_index = options.index(default)
+            else:
+                default_index = 0
+            categorical[feature] = {
+                'dtype': str(column.dtype),
+                'options': options,
+                'default_index': default_index,
+                'used': used
+            }
+    return {'columns': list(X.columns), 'numerical': numerical, 'categorical': categorical}
+
+
+def get_feature_schema_path() -> str:
+    """
+    Get the path of the feature schema written by train_with_pipeline.py.
+
+    Returns:
+        Full path to feature_schema.json in the project root
+    """
+    return str(Path(__file__).parent.parent / 'feature_schema.json')
+
+
+def save_feature_schema(schema: dict, path: str, **metadata) -> None:
+    """
+    Write a feature schema as JSON.
+
+    Args:
+        schema: Dictionary from build_feature_schema()
+        path: Destination file
+        **metadata: Extra top-level fields (e.g. n_rows, sklearn_version)
+    """
+    document = {'format_version': FEATURE_SCHEMA_VERSION, **metadata, **schema}
+    # Write to a temporary file and rename, so the dashboard never reads a partial schema
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.feature_schema-', suffix='.json')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(document, f, indent=2)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+@timed()
+def load_feature_schema(path: Optional[str] = None) -> Optional[dict]:
+    """
+    Load a feature schema written by save_feature_schema().
+
+    Args:
+        path: Schema file (default: get_feature_schema_path())
+
+    Returns:
+        Schema dictionary, or None if the file is missing, unreadable or
+        written in another format version
+    """
+    try:
+        with open(path or get_feature_schema_path()) as f:
+            schema = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if schema.get('format_version') != FEATURE_SCHEMA_VERSION:
+        return None
+    return schema
+
+
+# ============================================================================
+# COLUMNAR CACHE FOR RAW CSV DATA
+# ============================================================================
+
+def _default_cache_dir(filepath: Path) -> Path:
+    return filepath.parent / '.cache' / filepath.name
+
+
+def _file_sha1(filepath: Path, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha1()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _source_signature(filepath: Path) -> dict:
+    stat = filepath.stat()
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _smallest_code_dtype(n_categories: int) -> np.dtype:
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories < np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def build_columnar_cache(filepath: str, cache_dir: Optional[str] = None) -> Path:
+    """
+    Convert a raw CSV file into a typed columnar cache.
+    
+    Numeric columns are stored as .npy arrays with the dtypes pandas infers.
+    Text columns (holiday, weather_main, weather_description, date_time) are
+    stored as categorical codes plus a vocabulary in manifest.json.
+    
+    Args:
+        filepath: Path to the CSV file
+        cache_dir: Directory for the cache (default: .cache/<csv name> next to the CSV)
+    
+    Returns:
+        Path to the cache directory
+    """
+    filepath = Path(filepath)
+    cache_dir = Path(cache_dir) if cache_dir else _default_cache_dir(filepath)
+    
+    df = pd.read_csv(filepath)
+    manifest = {
+        'format_version': CACHE_FORMAT_VERSION,
+        'source': {**_source_signature(filepath), 'sha1': _file_sha1(filepath)},
+        'n_rows': len(df),
+        'columns': []
+    }
+    
+    # Write into a temporary directory, then swap it in so readers never see a partial cache
+    cache_dir.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(dir=cache_dir.parent, prefix=f'.{cache_dir.name}-'))
+    try:
+        os.chmod(tmp_dir, 0o755)
+        for i, column in enumerate(df.columns):
+            series = df[column]
+            entry = {'name': column, 'file': f'{i:03d}.npy'}
+            if pd.api.types.is_numeric_dtype(series):
+                entry['kind'] = 'numeric'
+                values = series.to_numpy()
+            else:
+                categorical = pd.Categorical(series)
+                entry['kind'] = 'categorical'
+                entry['categories'] = categorical.categories.tolist()
+                values = categorical.codes.astype(_smallest_code_dtype(len(entry['categories'])))
+            np.save(tmp_dir / entry['file'], np.ascontiguousarray(values))
+            manifest['columns'].append(entry)
+        
+        with open(tmp_dir / 'manifest.json', 'w') as f:
+            json.dump(manifest, f, indent=2)
+        
+        if cache_dir.exists():
+            shutil.rmtree(cache_dir)
+        os.replace(tmp_dir, cache_dir)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    
+    return cache_dir
+
+
+def _read_manifest(cache_dir: Path) -> Optional[dict]:
+    try:
+        with open(cache_dir / 'manifest.json') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _cache_is_fresh(filepath: Path, cache_dir: Path, manifest: Optional[dict]) -> bool:
+    if manifest is None or manifest.get('format_version') != CACHE_FORMAT_VERSION:
+        return False
+    
+    cached = manifest['source']
+    current = _source_signature(filepath)
+    if cached['size'] != current['size']:
+        return False
+    if cached['mtime_ns'] == current['mtime_ns']:
+        return True
+    
+    # Touched but possibly unchanged (e.g. fresh checkout): fall back to the content hash
+    if _file_sha1(filepath) != cached['sha1']:
+        return False
+    manifest['source']['mtime_ns'] = current['mtime_ns']
+    with open(cache_dir / 'manifest.json', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return True
+
+
+def _categorical_from_codes(codes: np.ndarray, categories: list) -> pd.Categorical:
+    dtype = pd.CategoricalDtype(categories)
+    try:
+        # validate=False keeps the memory-mapped codes instead of copying them
+        return pd.Categorical.from_codes(codes, dtype=dtype, validate=False)
+    except TypeError:
+        return pd.Categorical.from_codes(codes, dtype=dtype)
+
+
+def load_raw_data(
+    filepath: str = 'datafile.csv',
+    use_cache: bool = True,
+    cache_dir: Optional[str] = None,
+    mmap: bool = True
+) -> pd.DataFrame:
+    """
+    Load the raw traffic CSV through a typed columnar cache.
+    
+    The first call converts the CSV (see build_columnar_cache); later calls
+    memory-map the cached arrays, so numeric columns are zero-copy views and
+    text columns are categoricals backed by mapped codes. The cache is rebuilt
+    when the CSV's size or content changes.
+    
+    Note: text columns come back as 'category' dtype rather than 'object'.
+    
+    Args:
+        filepath: Path to the CSV file
+        use_cache: If False, read the CSV directly with pd.read_csv
+        cache_dir: Directory for the cache (default: .cache/<csv name> next to the CSV)
+        mmap: Memory-map cached arrays (read-only) instead of reading them into memory
+    
+    Returns:
+        DataFrame with the same columns and values as pd.read_csv(filepath)
+    """
+    filepath = Path(filepath)
+    if not use_cache:
+        return pd.read_csv(filepath)
+    if not filepath.exists():
+        raise FileNotFoundError(f"Data file not found: {filepath}")
+    
+    cache_dir = Path(cache_dir) if cache_dir else _default_cache_dir(filepath)
+    manifest = _read_manifest(cache_dir)
+    if not _cache_is_fresh(filepath, cache_dir, manifest):
+        build_columnar_cache(filepath, cache_dir)
+        manifest = _read_manifest(cache_dir)
+    
+    mmap_mode = 'r' if mmap else None
+    columns = {}
+    for entry in manifest['columns']:
+        # Plain ndarray view of the mapping, so pandas never sees the np.memmap subclass
+        values = np.load(cache_dir / entry['file'], mmap_mode=mmap_mode).view(np.ndarray)
+        if entry['kind'] == 'categorical':
+            values = _categorical_from_codes(values, entry['categories'])
+        columns[entry['name']] = values
+    
+    return pd.DataFrame(columns, copy=False)
@@ -0,0 +1,139 @@
+"""
+Feature engineering shared by the training and test-data scripts.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .perf_utils import timed
+
+
+DATETIME_FORMAT = '%d-%m-%Y %H:%M'
+
+DAY_NAMES = np.array(
+    ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'],
+    dtype=object
+)
+
+# Byte layout of DATETIME_FORMAT, e.g. b'02-10-2012 09:00'
+_TIMESTAMP_WIDTH = 16
+_SEPARATORS = {2: ord('-'), 5: ord('-'), 10: ord(' '), 13: ord(':')}
+_DIGIT_POSITIONS = [0, 1, 3, 4, 6, 7, 8, 9, 11, 12, 14, 15]
+
+
+def _unique_timestamps(date_time: pd.Series):
+    """
+    Split a timestamp column into unique values and per-row codes.
+
+    Hourly data repeats each timestamp many times (one row per weather
+    condition), so features are computed once per unique value and gathered.
+    Categorical input (e.g. from load_raw_data) already carries the mapping.
+    """
+    if isinstance(date_time.dtype, pd.CategoricalDtype):
+        return np.asarray(date_time.cat.categories, dtype=object), date_time.array.codes
+    codes, uniques = pd.factorize(date_time, use_na_sentinel=True)
+    return np.asarray(uniques, dtype=object), codes
+
+
+def _parse_timestamps(uniques: np.ndarray):
+    """
+    Parse 'DD-MM-YYYY HH:MM' strings with vectorized byte arithmetic.
+
+    Returns:
+        Tuple of (day, month, year, hour, weekday) int arrays, or None if any
+        value doesn't match the fixed-width layout (caller falls back to pandas)
+    """
+    try:
+        raw = uniques.astype(f'S{_TIMESTAMP_WIDTH + 1}')
+    except (UnicodeEncodeError, TypeError, ValueError):
+        return None
+    if len(raw) and (np.char.str_len(raw) != _TIMESTAMP_WIDTH).any():
+        return None
+
+    chars = np.frombuffer(raw.tobytes(), dtype=np.uint8).reshape(len(raw), _TIMESTAMP_WIDTH + 1)
+    for position, separator in _SEPARATORS.items():
+        if (chars[:, position] != separator).any():
+            return None
+    digits = chars[:, _DIGIT_POSITIONS].astype(np.int64) - ord('0')
+    if ((digits < 0) | (digits > 9)).any():
+        return None
+
+    day = digits[:, 0] * 10 + digits[:, 1]
+    month = digits[:, 2] * 10 + digits[:, 3]
+    year = digits[:, 4] * 1000 + digits[:, 5] * 100 + digits[:, 6] * 10 + digits[:, 7]
+    hour = digits[:, 8] * 10 + digits[:, 9]
+    minute = digits[:, 10] * 10 + digits[:, 11]
+    if ((month < 1) | (month > 12) | (day < 1) | (hour > 23) | (minute > 59)).any():
+        return None
+
+    # Calendar arithmetic in datetime64: an out-of-range day (e.g. 31-02) rolls into
+    # the next month, which the round-trip check below rejects
+    months = (year - 1970) * 12 + (month - 1)
+    dates = months.astype('datetime64[M]').astype('datetime64[D]') + (day - 1)
+    if (dates.astype('datetime64[M]').astype(np.int64) != months).any():
+        return None
+
+    # 1970-01-01 was a Thursday (Monday == 0)
+    weekday = (dates.astype(np.int64) + 3) % 7
+    return day, month, year, hour, weekday
+
+
+def _pandas_datetime_features(date_time: pd.Series) -> pd.DataFrame:
+    """Reference implementation: the original pd.to_datetime + .dt accessor path."""
+    parsed = pd.to_datetime(date_time, format=DATETIME_FORMAT)
+    return pd.DataFrame({
+        'day': parsed.dt.day_name(),
+        'month': parsed.dt.month,
+        'year': parsed.dt.year,
+        'hour': parsed.dt.hour
+    }, index=date_time.index)
+
+
+def extract_datetime_features(date_time: pd.Series) -> pd.DataFrame:
+    """
+    Derive day name, month, year and hour from a 'DD-MM-YYYY HH:MM' column.
+
+    Produces the same values and dtypes as
+    pd.to_datetime(date_time, format='%d-%m-%Y %H:%M') followed by
+    .dt.day_name() / .dt.month / .dt.year / .dt.hour, but parses each unique
+    timestamp once with byte arithmetic instead of going through datetime
+    objects for every row. Missing or irregular values fall back to pandas.
+
+    Args:
+        date_time: Series of timestamp strings (object, string or categorical)
+
+    Returns:
+        DataFrame with columns day, month, year, hour aligned to date_time.index
+    """
+    uniques, codes = _unique_timestamps(date_time)
+    parsed = _parse_timestamps(uniques) if (codes >= 0).all() else None
+    if parsed is None:
+        return _pandas_datetime_features(date_time)
+
+    _, month, year, hour, weekday = parsed
+    # .dt.month/.year/.hour return int32 in pandas >= 2.0
+    return pd.DataFrame({
+        'day': pd.Series(DAY_NAMES[weekday[codes]], index=date_time.index),
+        'month': month.astype(np.int32)[codes],
+        'year': year.astype(np.int32)[codes],
+        'hour': hour.astype(np.int32)[codes]
+    }, index=date_time.index)
+
+
+@timed()
+def add_datetime_features(df: pd.DataFrame, column: str = 'date_time') -> pd.DataFrame:
+    """
+    Replace the timestamp column with day, month, year and hour columns.
+
+    The new columns are appended at the end, in the same order the training
+    script has always created them.
+
+    Args:
+        df: Raw data containing the timestamp column
+        column: Name of the timestamp column
+
+    Returns:
+        New DataFrame without the timestamp column
+    """
+    features = extract_datetime_features(df[column])
+    return pd.concat([df.drop(columns=column), features], axis=1)
@@ -0,0 +1,388 @@
+"""
+Feature importance for fitted traffic volume pipelines.
+
+The model inside a pipeline sees the ColumnTransformer's output columns
+(e.g. 'cat__weather_main_Rain', 'num__temp'), not the raw input columns.
+Importances are therefore labelled with preprocessor.get_feature_names_out()
+and summed back to the raw column each output was derived from, so one-hot
+encoded features can be compared with numeric ones.
+
+Results are cached per loaded pipeline object: a retrained model (reloaded
+by the ModelRegistry as a new object) gets fresh importances, and the cache
+entry disappears with the pipeline.
+
+permutation_importance() measures how much a score drops when one raw
+column is shuffled. It works on the encoded matrix: since every transformer
+acts on its own columns, shuffling a raw column is the same as shuffling the
+rows of that column's output block, so the data is encoded once and each
+permutation only rewrites a few columns of a preallocated buffer.
+"""
+
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Hashable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .metrics_utils import calculate_metrics, calculate_metrics_batch
+from .perf_utils import record_cache, timed
+
+
+_cache = weakref.WeakKeyDictionary()
+_cache_lock = threading.Lock()
+
+# Metrics permutation importance can be measured on. Signed metrics such as
+# 'Mean Error' are left out: a change in bias has no better or worse direction
+SCORINGS = ('R2 Score', 'MAE', 'MSE', 'RMSE')
+
+# Metrics where a higher value is better; for the others importance is the increase
+_HIGHER_IS_BETTER = {'R2 Score'}
+
+_model_hashes = weakref.WeakKeyDictionary()
+_permutation_cache = OrderedDict()
+_PERMUTATION_CACHE_ENTRIES = 32
+
+
+def resolve_feature_sources(preprocessor: Any) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Name every output column of a fitted ColumnTransformer and the raw column it comes from.
+
+    Args:
+        preprocessor: Fitted ColumnTransformer
+
+    Returns:
+        Tuple of (output feature names, source column per output), both
+        object arrays of length n_features_out
+
+    Raises:
+        TypeError: If preprocessor is not a fitted ColumnTransformer
+    """
+    if not hasattr(preprocessor, 'output_indices_'):
+        raise TypeError("Expected a fitted ColumnTransformer")
+
+    names = np.asarray(preprocessor.get_feature_names_out(), dtype=object)
+    sources = np.empty(len(names), dtype=object)
+    for name, transformer, columns in preprocessor.transformers_:
+        output = preprocessor.output_indices_[name]
+        width = output.stop - output.start
+        if width == 0:
+            continue
+        if np.asarray(columns).dtype.kind in 'iub':
+            columns = preprocessor.feature_names_in_[columns]
+        columns = list(columns)
+
+        if width == len(columns):
+            sources[output] = columns
+            continue
+        categories = getattr(transformer, 'categories_', None)
+        drop_idx = getattr(transformer, 'drop_idx_', None)
+        widths = [len(values) - (drop_idx is not None and drop_idx[i] is not None)
+                  for i, values in enumerate(categories or [])]
+        if categories is not None and sum(widths) == width:
+            sources[output] = np.repeat(np.asarray(columns, dtype=object), widths)
+        else:
+            # Layout not recoverable (e.g. infrequent categories): attribute to the transformer
+            sources[output] = name
+    return names, sources
+
+
+def _model_importances(model: Any) -> Optional[Tuple[str, np.ndarray]]:
+    # Target wrappers (e.g. ScaledTargetRegressor) expose the fitted inner model as regressor_
+    model = getattr(model, 'regressor_', model)
+    if hasattr(model, 'feature_importances_'):
+        return 'impurity', np.asarray(model.feature_importances_, dtype=np.float64)
+    if hasattr(model, 'coef_'):
+        coef = np.asarray(model.coef_, dtype=np.float64)
+        # Multi-output: sum the magnitude over targets
+        return 'coefficient', np.abs(coef).reshape(-1, coef.shape[-1]).sum(axis=0)
+    return None
+
+
+def _ranked(labels: np.ndarray, values: np.ndarray) -> dict:
+    order = np.argsort(-values, kind='stable')
+    return dict(zip(labels[order].tolist(), values[order].tolist()))
+
+
+@timed()
+def compute_feature_importances(pipeline: Any) -> Optional[dict]:
+    """
+    Importances of a fitted Pipeline([('preprocessor', ColumnTransformer), ('model', ...)]).
+
+    Tree models report impurity importances; linear models report |coef|
+    (on standardized inputs, so magnitudes are comparable across numeric
+    columns). Grouped values are the sum over a raw column's outputs.
+
+    Args:
+        pipeline: Fitted sklearn Pipeline
+
+    Returns:
+        Dictionary with 'kind' ('impurity' or 'coefficient'), 'encoded'
+        ({output feature: importance}) and 'grouped' ({raw column:
+        importance}), both sorted by decreasing importance; None if the
+        model exposes neither feature_importances_ nor coef_
+
+    Raises:
+        ValueError: If the model's importances don't match the preprocessor's outputs
+    """
+    result = _model_importances(pipeline[-1])
+    if result is None:
+        return None
+    kind, importances = result
+
+    names, sources = resolve_feature_sources(pipeline[0])
+    if len(importances) != len(names):
+        raise ValueError(f"Model has {len(importances)} importances but the preprocessor "
+                         f"produces {len(names)} features")
+
+    # Group-sum per raw column in first-appearance order
+    codes, columns = pd.factorize(sources)
+    grouped = np.bincount(codes, weights=importances, minlength=len(columns))
+    return {
+        'kind': kind,
+        'encoded': _ranked(names, importances),
+        'grouped': _ranked(np.asarray(columns, dtype=object), grouped)
+    }
+
+
+def get_feature_importances(pipeline: Any) -> Optional[dict]:
+    """
+    Cached compute_feature_importances(), computed once per loaded pipeline.
+
+    Args:
+        pipeline: Fitted sklearn Pipeline
+
+    Returns:
+        Dictionary from compute_feature_importances() (shared; don't modify), or None
+    """
+    with _cache_lock:
+        hit = pipeline in _cache
+        record_cache('feature_importances', hit)
+        if hit:
+            return _cache[pipeline]
+    result = compute_feature_importances(pipeline)
+    with _cache_lock:
+        _cache[pipeline] = result
+    return result
+
+
+# ============================================================================
+# PERMUTATION IMPORTANCE
+# ============================================================================
+
+class _PermutationScorer:
+    """
+    Scores permutations of column blocks of one encoded matrix.
+
+    Holds a single working copy of the matrix: each permutation rewrites the
+    block's columns in place, and the block is restored afterwards.
+    """
+
+    def __init__(self, model: Any, X: np.ndarray, y: np.ndarray):
+        self.model = model
+        self.X = X
+        self.y = y
+        self.buffer = np.array(X, copy=True)
+
+    def score(self, block: np.ndarray, seed: np.random.SeedSequence, n_repeats: int) -> dict:
+        rng = np.random.default_rng(seed)
+        predictions = np.empty((n_repeats, len(self.y)))
+        for repeat in range(n_repeats):
+            self.buffer[:, block] = self.X[np.ix_(rng.permutation(len(self.y)), block)]
+            predictions[repeat] = self.model.predict(self.buffer)
+        self.buffer[:, block] = self.X[:, block]
+        # All repeats scored together in one fused pass
+        return calculate_metrics_batch(self.y, predictions)
+
+
+_worker_scorer = None
+_worker_blocks = []
+
+
+def _init_worker(model: Any, handles: dict) -> None:
+    from .training_utils import _attach_matrix
+
+    global _worker_scorer
+    _worker_scorer = _PermutationScorer(
+        model, _attach_matrix(handles['X'], _worker_blocks), _attach_matrix(handles['y'], _worker_blocks)
+    )
+
+
+def _score_in_worker(block: np.ndarray, seed: np.random.SeedSequence, n_repeats: int) -> dict:
+    return _worker_scorer.score(block, seed, n_repeats)
+
+
+@timed()
+def permutation_importance(
+    pipeline: Any,
+    X: pd.DataFrame,
+    y: np.ndarray,
+    n_repeats: int = 5,
+    scoring: str = 'R2 Score',
+    n_jobs: int = 1,
+    random_state: int = 0
+) -> dict:
+    """
+    Permutation importance of every raw input column of a fitted pipeline.
+
+    X is encoded once. Each column's repeats are scored in one task, so
+    tasks can run in a process pool; workers map the encoded matrix from
+    shared memory. Seeds are derived per column from random_state, so
+    results don't depend on n_jobs. Columns the preprocessor drops get an
+    importance of exactly 0 without being evaluated.
+
+    Args:
+        pipeline: Fitted Pipeline([('preprocessor', ColumnTransformer), ('model', ...)])
+        X: Raw features
+        y: Actual target values
+        n_repeats: Permutations per column
+        scoring: One of SCORINGS; importance is the drop in 'R2 Score', or
+            the increase of an error metric (e.g. 'MAE')
+        n_jobs: Worker processes (1 = in-process; None = one per CPU)
+        random_state: Seed for the permutations
+
+    Returns:
+        Dictionary with 'scoring', 'baseline' (metrics of the unpermuted
+        data), 'importances' ({column: mean importance}, sorted by
+        decreasing importance), 'std' ({column: std over repeats}),
+        'permuted_metrics' ({column: {metric: mean over repeats}}),
+        'n_repeats', 'n_rows' and 'seconds'
+
+    Raises:
+        ValueError: If scoring is not one of SCORINGS
+    """
+    from .training_utils import _share_matrix
+
+    # Checked up front: a bad name would otherwise only fail after every column was scored
+    if scoring not in SCORINGS:
+        raise ValueError(f"Unknown scoring {scoring!r}; expected one of {SCORINGS}")
+
+    start = time.perf_counter()
+    preprocessor, model = pipeline[0], pipeline[-1]
+    X_encoded = preprocessor.transform(X)
+    if hasattr(X_encoded, 'toarray'):
+        # Column blocks are rewritten in place, which CSR can't do cheaply
+        X_encoded = X_encoded.toarray()
+    X_encoded = np.ascontiguousarray(X_encoded)
+    y = np.asarray(y, dtype=np.float64)
+    baseline = calculate_metrics(y, model.predict(X_encoded))
+
+    _, sources = resolve_feature_sources(preprocessor)
+    columns = list(X.columns)
+    seeds = np.random.SeedSequence(random_state).spawn(len(columns))
+    tasks = [(column, np.flatnonzero(sources == column), seed) for column, seed in zip(columns, seeds)]
+    tasks = [task for task in tasks if len(task[1])]
+
+    n_jobs = min(n_jobs or os.cpu_count() or 1, max(len(tasks), 1))
+    if n_jobs == 1:
+        scorer = _PermutationScorer(model, X_encoded, y)
+        scores = [scorer.score(block, seed, n_repeats) for _, block, seed in tasks]
+    else:
+        blocks, handles = [], {}
+        try:
+            for key, matrix in (('X', X_encoded), ('y', y)):
+                matrix_blocks, handles[key] = _share_matrix(matrix)
+                blocks.extend(matrix_blocks)
+            with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                     initargs=(model, handles)) as executor:
+                futures = [executor.submit(_score_in_worker, block, seed, n_repeats)
+                           for _, block, seed in tasks]
+                scores = [future.result() for future in futures]
+        finally:
+            for block in blocks:
+                block.unlink()
+
+    sign = 1.0 if scoring in _HIGHER_IS_BETTER else -1.0
+    drops = {column: np.zeros(n_repeats) for column in columns}
+    permuted_metrics = {column: dict(baseline) for column in columns}
+    for (column, _, _), metrics in zip(tasks, scores):
+        drops[column] = sign * (baseline[scoring] - metrics[scoring])
+        permuted_metrics[column] = {name: float(values.mean()) for name, values in metrics.items()}
+
+    means = np.array([drops[column].mean() for column in columns])
+    order = np.argsort(-means, kind='stable')
+    return {
+        'scoring': scoring,
+        'baseline': baseline,
+        'importances': {columns[i]: float(means[i]) for i in order},
+        'std': {columns[i]: float(drops[columns[i]].std()) for i in order},
+        'permuted_metrics': {columns[i]: permuted_metrics[columns[i]] for i in order},
+        'n_repeats': n_repeats,
+        'n_rows': len(y),
+        'seconds': time.perf_counter() - start
+    }
+
+
+def model_hash(pipeline: Any) -> str:
+    """
+    Content hash of a fitted pipeline, computed once per loaded object.
+
+    Args:
+        pipeline: Fitted sklearn Pipeline
+
+    Returns:
+        Hex digest from joblib.hash (equal for two loads of the same file)
+    """
+    import joblib
+
+    with _cache_lock:
+        if pipeline in _model_hashes:
+            return _model_hashes[pipeline]
+    digest = joblib.hash(pipeline)
+    with _cache_lock:
+        _model_hashes[pipeline] = digest
+    return digest
+
+
+def get_permutation_importance(
+    pipeline: Any,
+    X: pd.DataFrame,
+    y: np.ndarray,
+    dataset_key: Optional[Hashable] = None,
+    n_repeats: int = 5,
+    scoring: str = 'R2 Score',
+    n_jobs: int = 1,
+    random_state: int = 0
+) -> dict:
+    """
+    Cached permutation_importance(), keyed by (model hash, dataset hash, settings).
+
+    Args:
+        pipeline: Fitted sklearn Pipeline
+        X: Raw features
+        y: Actual target values
+        dataset_key: Fingerprint of the dataset X and y were taken from
+            (default: fingerprint_frame of X plus a hash of y)
+        n_repeats: Permutations per column
+        scoring: Metric the importance is measured on (one of SCORINGS)
+        n_jobs: Worker processes for a cache miss
+        random_state: Seed for the permutations
+
+    Returns:
+        Dictionary from permutation_importance() (shared; don't modify)
+    """
+    if dataset_key is None:
+        import joblib
+
+        from .cache_utils import fingerprint_frame
+
+        dataset_key = (fingerprint_frame(X), joblib.hash(np.asarray(y)))
+    key = (model_hash(pipeline), dataset_key, n_repeats, scoring, random_state)
+    with _cache_lock:
+        hit = key in _permutation_cache
+        record_cache('permutation_importance', hit)
+        if hit:
+            _permutation_cache.move_to_end(key)
+            return _permutation_cache[key]
+
+    result = permutation_importance(pipeline, X, y, n_repeats=n_repeats, scoring=scoring,
+                                    n_jobs=n_jobs, random_state=random_state)
+    with _cache_lock:
+        _permutation_cache[key] = result
+        while len(_permutation_cache) > _PERMUTATION_CACHE_ENTRIES:
+            _permutation_cache.popitem(last=False)
+    return result
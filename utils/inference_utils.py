@@ -0,0 +1,693 @@
+"""
+Compiled inference for fitted traffic volume pipelines.
+
+compile_pipeline() flattens a fitted Pipeline(ColumnTransformer, model) into
+plain NumPy arrays: category -> column lookup tables, scaler mean/scale
+vectors, and linear coefficients or tree node arrays. The resulting
+CompiledPipeline predicts from a dict, a list of dicts, a record array or a
+DataFrame without going through sklearn's validation and column machinery,
+and returns the same values as pipeline.predict().
+
+save_artifact() / load_artifact() store a CompiledPipeline as a directory of
+raw .npy blocks plus manifest.json. Uncompressed blocks are memory-mapped on
+load, so loading takes milliseconds and processes serving the same model
+share its pages.
+"""
+
+import io
+import json
+import lzma
+import os
+import shutil
+import tempfile
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from .perf_utils import timed
+
+
+# Below this many rows, categories are looked up with a plain list; above it,
+# np.fromiter avoids building one
+_SMALL_BATCH = 32
+
+# Up to this many rows, trees are walked node by node in plain Python: a few
+# dozen scalar comparisons beat max_depth rounds of NumPy calls
+_SCALAR_ROWS = 4
+
+# Level-wise traversal works on blocks of about this many (row, tree) pairs,
+# and compacts finished pairs out of the active set every few levels
+_PAIRS_PER_BLOCK = 1 << 20
+_COMPACT_INTERVAL = 4
+
+# From this many rows per tree, trees are walked by sklearn's compiled Tree.apply.
+# It pays a fixed cost per tree where the level-wise NumPy traversal pays one per
+# level for all trees, so it needs a few rows per tree to win; the 100-tree forest
+# crosses over at about 400 rows (see benchmarks/bench_forest.py)
+_NATIVE_ROWS_PER_TREE = 4
+
+
+def _is_missing(value: Any) -> bool:
+    return value is None or value != value
+
+
+def _is_nan(value: Any) -> bool:
+    return value != value
+
+
+def _as_columns(rows: Any) -> Dict[str, np.ndarray]:
+    """
+    Normalize prediction input to {column: 1-D array}.
+
+    Accepts a single row as a dict of scalars, a dict of columns, a list of
+    row dicts, a NumPy record/structured array or a pandas DataFrame.
+    """
+    if isinstance(rows, dict):
+        values = list(rows.values())
+        if values and np.ndim(values[0]) == 0:
+            return {name: np.array([value], dtype=object) for name, value in rows.items()}
+        return {name: np.asarray(value) for name, value in rows.items()}
+    if isinstance(rows, np.ndarray) and rows.dtype.names:
+        return {name: rows[name] for name in rows.dtype.names}
+    if hasattr(rows, 'columns') and hasattr(rows, 'to_numpy'):
+        return {name: rows[name].to_numpy() for name in rows.columns}
+    if isinstance(rows, (list, tuple)):
+        names = list(rows[0]) if rows else []
+        return {name: np.array([row.get(name) for row in rows], dtype=object) for name in names}
+    raise TypeError(f"Unsupported input type for prediction: {type(rows).__name__}")
+
+
+class _OneHotBlock:
+    """
+    One OneHotEncoder column: value -> output column lookup.
+
+    Values match categories by Python equality (so 2 matches 2.0 but not '2')
+    and NaN matches a NaN category; None is only a category if the encoder
+    learned None, exactly as in OneHotEncoder.transform.
+    """
+
+    def __init__(self, column: str, categories: np.ndarray, offset: int, handle_unknown: str):
+        self.column = column
+        self.categories = list(categories)
+        self.offset = offset
+        self.handle_unknown = handle_unknown
+        self.table = {}
+        self.missing_index = -1
+        for i, category in enumerate(categories):
+            if _is_nan(category):
+                self.missing_index = offset + i
+            else:
+                self.table[category] = offset + i
+
+    def codes(self, values: np.ndarray) -> np.ndarray:
+        """Output column for each value, or -1 for unknown values."""
+        values = np.asarray(values, dtype=object).ravel()
+        # A dict lookup per value is exact for any category type and beats np.unique on large batches
+        get = self.table.get
+        missing = self.missing_index
+        if len(values) <= _SMALL_BATCH:
+            codes = np.array([
+                missing if _is_nan(v) else get(v, -1) for v in values.tolist()
+            ], dtype=np.intp)
+        else:
+            codes = np.fromiter((get(v, -1) for v in values.tolist()), dtype=np.intp, count=len(values))
+            if missing >= 0:
+                codes[values != values] = missing
+
+        if self.handle_unknown == 'error' and (codes < 0).any():
+            unknown = sorted({str(v) for v, c in zip(values, codes) if c < 0})
+            raise ValueError(f"Found unknown categories {unknown} in column {self.column!r} during transform")
+        return codes
+
+
+class _LinearModel:
+    def __init__(self, coef: np.ndarray, intercept: float):
+        self.coef = np.ascontiguousarray(coef, dtype=np.float64)
+        self.intercept = float(intercept)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        if np.isnan(X).any():
+            raise ValueError("Input X contains NaN.")
+        return X @ self.coef + self.intercept
+
+
+def _float32_thresholds(threshold: np.ndarray) -> np.ndarray:
+    """
+    Round float64 split thresholds down to float32.
+
+    Trees compare float32 features against float64 thresholds. For a float32
+    x, x <= t holds exactly when x <= the largest float32 not above t, so the
+    rounded-down thresholds give identical splits at half the memory.
+    """
+    rounded = threshold.astype(np.float32)
+    over = rounded.astype(np.float64) > threshold
+    rounded[over] = np.nextafter(rounded[over], np.float32(-np.inf))
+    return rounded
+
+
+class PackedForest:
+    """
+    Regression trees packed into one set of contiguous node arrays.
+
+    All trees' nodes are concatenated (feature, threshold, children, value,
+    missing_go_to_left), with child indices rebased to the packed arrays and
+    leaves pointing to themselves. A batch is evaluated for all trees at
+    once: every (row, tree) pair advances one level per NumPy step, and
+    pairs that reach a leaf are dropped from the active set, so the work
+    follows the actual path lengths rather than the deepest tree. Batches of
+    _NATIVE_ROWS_PER_TREE rows per tree or more are handed to sklearn's
+    compiled tree walk instead,
+    using trees rebuilt from the packed arrays on first use (72 bytes per
+    node, against 26 packed), so loaded artifacts get it too. A single
+    DecisionTreeRegressor is a forest of one.
+
+    Usage:
+        packed = PackedForest.from_estimator(random_forest)
+        y_pred = packed.predict(X_encoded.astype(np.float32))
+    """
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, children: np.ndarray,
+                 value: np.ndarray, missing_left: np.ndarray, roots: np.ndarray, max_depth: int,
+                 is_leaf: Optional[np.ndarray] = None):
+        """
+        Args:
+            feature: int32 split feature per node (0 for leaves)
+            threshold: float32 split threshold per node (see _float32_thresholds)
+            children: int32 (n_nodes, 2) packed [left, right] child indices
+                (the node itself for leaves)
+            value: Prediction stored at each node
+            missing_left: Whether NaN goes to the left child at each node
+            roots: Packed index of each tree's root
+            max_depth: Depth of the deepest tree
+            is_leaf: Leaf flag per node (derived from children if omitted)
+        """
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.value = value
+        self.missing_left = missing_left
+        self.is_leaf = children[:, 0] == np.arange(len(children)) if is_leaf is None else is_leaf
+        self.roots = roots
+        self.max_depth = max_depth
+        self._views = None
+        self._trees = None
+
+    @classmethod
+    def from_trees(cls, trees: list) -> 'PackedForest':
+        """
+        Pack fitted sklearn Tree objects (estimator.tree_).
+
+        Args:
+            trees: List of single-output regression trees
+
+        Returns:
+            PackedForest
+        """
+        sizes = np.array([tree.node_count for tree in trees], dtype=np.int64)
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int32)
+        feature, threshold, children, value, missing_left = [], [], [], [], []
+        for tree, offset in zip(trees, offsets):
+            is_leaf = tree.children_left == -1
+            nodes = np.arange(tree.node_count, dtype=np.int64) + offset
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(tree.threshold)
+            children.append(np.stack([
+                np.where(is_leaf, nodes, tree.children_left + offset),
+                np.where(is_leaf, nodes, tree.children_right + offset)
+            ], axis=1))
+            value.append(tree.value[:, 0, 0])
+            missing_left.append(getattr(tree, 'missing_go_to_left', np.zeros(tree.node_count, dtype=bool)))
+        return cls(
+            feature=np.concatenate(feature).astype(np.int32),
+            threshold=_float32_thresholds(np.concatenate(threshold).astype(np.float64)),
+            children=np.ascontiguousarray(np.concatenate(children).astype(np.int32)),
+            value=np.concatenate(value).astype(np.float64),
+            missing_left=np.concatenate(missing_left).astype(bool),
+            roots=offsets,
+            max_depth=max(int(tree.max_depth) for tree in trees)
+        )
+
+    @classmethod
+    def from_estimator(cls, model: Any) -> 'PackedForest':
+        """Pack a fitted DecisionTreeRegressor or RandomForestRegressor / ExtraTreesRegressor."""
+        estimators = getattr(model, 'estimators_', [model])
+        return cls.from_trees([estimator.tree_ for estimator in estimators])
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the packed node arrays."""
+        return sum(a.nbytes for a in (self.feature, self.threshold, self.children, self.value,
+                                      self.missing_left, self.is_leaf, self.roots))
+
+    def __getstate__(self):
+        # The walk cache holds memoryviews, which can't be pickled; _walk rebuilds it.
+        # The rebuilt sklearn trees are only a cache of the node arrays too
+        state = self.__dict__.copy()
+        state['_views'] = None
+        state['_trees'] = None
+        return state
+
+    def _native_trees(self) -> list:
+        """sklearn Tree per packed tree (with its packed offset), built on first use."""
+        if self._trees is None:
+            # sklearn.tree._tree is private, but Tree's pickled state is stable
+            # and is how fitted trees round-trip through joblib
+            from sklearn.tree._tree import NODE_DTYPE, Tree
+
+            n_features = int(np.max(self.feature)) + 1
+            bounds = self.roots.tolist() + [len(self.feature)]
+            trees = []
+            for start, stop in zip(bounds[:-1], bounds[1:]):
+                is_leaf = np.asarray(self.is_leaf[start:stop])
+                children = np.asarray(self.children[start:stop], dtype=np.int64) - start
+                nodes = np.zeros(stop - start, dtype=NODE_DTYPE)
+                nodes['left_child'] = np.where(is_leaf, -1, children[:, 0])
+                nodes['right_child'] = np.where(is_leaf, -1, children[:, 1])
+                nodes['feature'] = np.where(is_leaf, -2, self.feature[start:stop])
+                nodes['threshold'] = np.where(is_leaf, -2.0, self.threshold[start:stop])
+                nodes['missing_go_to_left'] = self.missing_left[start:stop]
+                tree = Tree(n_features, np.array([1], dtype=np.intp), 1)
+                tree.__setstate__({
+                    'max_depth': self.max_depth,
+                    'node_count': stop - start,
+                    'nodes': nodes,
+                    'values': np.zeros((stop - start, 1, 1))
+                })
+                trees.append((tree, start))
+            self._trees = trees
+        return self._trees
+
+    def _walk(self, x: list, node: int) -> int:
+        # memoryviews index to plain Python ints/floats without copying the arrays
+        # (which may be memory-mapped); much cheaper per step than NumPy scalars
+        if self._views is None:
+            self._views = tuple(memoryview(np.ascontiguousarray(a)) for a in (
+                self.feature, self.threshold, self.children.ravel(), self.missing_left, self.is_leaf))
+        feature, threshold, children, missing_left, is_leaf = self._views
+        while not is_leaf[node]:
+            value = x[feature[node]]
+            if value != value:
+                node = children[2 * node + (0 if missing_left[node] else 1)]
+            else:
+                node = children[2 * node + (0 if value <= threshold[node] else 1)]
+        return node
+
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """
+        Packed leaf index reached by every row in every tree.
+
+        Args:
+            X: Encoded float32 matrix (n_rows, n_features)
+
+        Returns:
+            int32 array of shape (n_rows, n_trees)
+        """
+        return self._leaves(X).T
+
+    def _leaves(self, X: np.ndarray) -> np.ndarray:
+        # Tree-major (n_trees, n_rows), the order both traversals produce leaves in
+        n_rows, n_trees = len(X), self.n_trees
+        if n_rows <= _SCALAR_ROWS:
+            rows = X.tolist()
+            return np.array([[self._walk(row, root) for row in rows] for root in self.roots.tolist()],
+                            dtype=np.int32).reshape(n_trees, n_rows)
+
+        if n_rows >= _NATIVE_ROWS_PER_TREE * n_trees:
+            return self._apply_native(X)
+
+        leaves = np.empty((n_trees, n_rows), dtype=np.int32)
+        block_rows = max(1, _PAIRS_PER_BLOCK // n_trees)
+        for start in range(0, n_rows, block_rows):
+            block = np.ascontiguousarray(X[start:start + block_rows], dtype=np.float32)
+            leaves[:, start:start + len(block)] = self._apply_block(block)
+        return leaves
+
+    def _apply_native(self, X: np.ndarray) -> np.ndarray:
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        leaves = np.empty((self.n_trees, len(X)), dtype=np.int32)
+        for i, (tree, start) in enumerate(self._native_trees()):
+            np.add(tree.apply(X), start, out=leaves[i], casting='unsafe')
+        return leaves
+
+    def _apply_block(self, X: np.ndarray) -> np.ndarray:
+        n_rows, n_features = X.shape
+        X_flat = X.ravel()
+        has_nan = np.isnan(X_flat).any()
+        children = self.children.ravel()
+
+        # One entry per (tree, row) pair, tree-major: neighbouring pairs walk the
+        # same tree, so node lookups stay within a small region of the packed arrays
+        position = np.arange(n_rows * self.n_trees, dtype=np.int64)
+        row_offset = np.tile(np.arange(n_rows, dtype=np.int64) * n_features, self.n_trees)
+        node = np.repeat(self.roots, n_rows)
+        leaves = np.empty(n_rows * self.n_trees, dtype=np.int32)
+
+        for level in range(self.max_depth + 1):
+            if level % _COMPACT_INTERVAL == 0 or level == self.max_depth:
+                # Drop finished pairs from the active set
+                done = self.is_leaf[node]
+                leaves[position[done]] = node[done]
+                active = ~done
+                position, row_offset, node = position[active], row_offset[active], node[active]
+                if len(node) == 0:
+                    break
+            x = X_flat[row_offset + self.feature[node]]
+            go_right = x > self.threshold[node]
+            if has_nan:
+                go_right = np.where(np.isnan(x), ~self.missing_left[node], go_right)
+            node = children[2 * node + go_right]
+        return leaves.reshape(self.n_trees, n_rows)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """
+        Average of the trees' predictions.
+
+        Args:
+            X: Encoded float32 matrix (n_rows, n_features)
+
+        Returns:
+            float64 array of predictions
+        """
+        leaves = self._leaves(X)
+        # Accumulate tree by tree in estimator order, as RandomForestRegressor does
+        total = np.zeros(len(X), dtype=np.float64)
+        for tree_leaves in leaves:
+            total += self.value[tree_leaves]
+        total /= self.n_trees
+        return total
+
+
+def _compile_model(model: Any):
+    from sklearn.ensemble import ExtraTreesRegressor, RandomForestRegressor
+    from sklearn.linear_model import ElasticNet, Lasso, LinearRegression, Ridge, SGDRegressor
+    from sklearn.tree import DecisionTreeRegressor, ExtraTreeRegressor
+
+    from .training_utils import ScaledTargetRegressor
+
+    if isinstance(model, ScaledTargetRegressor):
+        inner = _compile_model(model.regressor_)
+        if not isinstance(inner, _LinearModel):
+            raise TypeError("Only linear regressors inside ScaledTargetRegressor can be compiled")
+        # (X @ coef + b) * scale + mean folded into one linear model
+        return _LinearModel(inner.coef * model.y_scale, inner.intercept * model.y_scale + model.y_mean)
+    if isinstance(model, (LinearRegression, Ridge, Lasso, ElasticNet, SGDRegressor)):
+        coef = np.ravel(model.coef_)
+        if len(coef) != model.n_features_in_:
+            raise TypeError("Only single-output linear models can be compiled")
+        return _LinearModel(coef, np.ravel(model.intercept_)[0])
+    if isinstance(model, (DecisionTreeRegressor, ExtraTreeRegressor)):
+        if model.n_outputs_ != 1:
+            raise TypeError("Only single-output trees can be compiled")
+        return PackedForest.from_estimator(model)
+    if isinstance(model, (RandomForestRegressor, ExtraTreesRegressor)):
+        if model.n_outputs_ != 1:
+            raise TypeError("Only single-output forests can be compiled")
+        return PackedForest.from_estimator(model)
+    raise TypeError(f"Cannot compile model of type {type(model).__name__}")
+
+
+class CompiledPipeline:
+    """
+    Flat NumPy predictor equivalent to a fitted preprocessing + model pipeline.
+
+    Tree models see the encoded matrix as float32, exactly as sklearn's trees
+    do, so thresholds compare identically.
+
+    Usage:
+        compiled = compile_pipeline(joblib.load('Random Forest Pipeline.pkl'))
+        compiled.predict({'holiday': None, 'temp': 288.3, ..., 'hour': 9})
+    """
+
+    def __init__(self, columns: List[str], n_features: int, onehot: List[_OneHotBlock],
+                 numeric: List[tuple], model: Any):
+        """
+        Args:
+            columns: Input columns the encoder reads (dropped columns aren't required)
+            n_features: Width of the encoded matrix
+            onehot: One block per one-hot encoded column
+            numeric: (column, output index, mean, scale) per scaled or passthrough column
+            model: Compiled model (_LinearModel or PackedForest)
+        """
+        self.columns = columns
+        self.n_features = n_features
+        self.onehot = onehot
+        self.numeric = numeric
+        self.model = model
+
+    def transform(self, rows: Any) -> np.ndarray:
+        """
+        Encode raw input exactly as the pipeline's ColumnTransformer would.
+
+        Args:
+            rows: dict (one row or columns), list of dicts, record array or DataFrame
+
+        Returns:
+            Dense float64 matrix of shape (n_rows, n_features)
+        """
+        columns = _as_columns(rows)
+        missing = [c for c in self.columns if c not in columns]
+        if missing:
+            raise ValueError(f"columns are missing: {set(missing)}")
+
+        n_rows = len(next(iter(columns.values()))) if columns else 0
+        X = np.zeros((n_rows, self.n_features), dtype=np.float64)
+        for block in self.onehot:
+            codes = block.codes(columns[block.column])
+            known = codes >= 0
+            X[np.flatnonzero(known), codes[known]] = 1.0
+        for column, index, mean, scale in self.numeric:
+            X[:, index] = (np.asarray(columns[column], dtype=np.float64) - mean) / scale
+        return X
+
+    def predict(self, rows: Any) -> np.ndarray:
+        """
+        Predict traffic volume for raw input.
+
+        Args:
+            rows: dict (one row or columns), list of dicts, record array or DataFrame
+
+        Returns:
+            numpy array of predictions
+        """
+        X = self.transform(rows)
+        if not isinstance(self.model, _LinearModel):
+            X = X.astype(np.float32)
+        return self.model.predict(X)
+
+
+@timed()
+def compile_pipeline(pipeline: Any) -> CompiledPipeline:
+    """
+    Compile a fitted Pipeline([('preprocessor', ColumnTransformer), ('model', ...)]).
+
+    Supported: OneHotEncoder (no drop, no infrequent categories), StandardScaler
+    and 'passthrough' transformers; linear regressors, decision trees and
+    random forests (single output).
+
+    Args:
+        pipeline: Fitted sklearn Pipeline as saved by train_with_pipeline.py
+
+    Returns:
+        CompiledPipeline
+
+    Raises:
+        TypeError: If a step can't be represented by the compiled predictor
+    """
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+    preprocessor, model = pipeline[0], pipeline[-1]
+    if len(pipeline) != 2 or not hasattr(preprocessor, 'transformers_'):
+        raise TypeError("Expected Pipeline([('preprocessor', ColumnTransformer), ('model', ...)])")
+
+    onehot, numeric = [], []
+    offset = 0
+    for name, transformer, columns in preprocessor.transformers_:
+        if transformer == 'drop' or len(columns) == 0:
+            continue
+        columns = list(preprocessor.feature_names_in_[columns]) if np.asarray(columns).dtype.kind in 'iub' else list(columns)
+        if transformer == 'passthrough':
+            for i, column in enumerate(columns):
+                numeric.append((column, offset + i, 0.0, 1.0))
+            offset += len(columns)
+        elif isinstance(transformer, OneHotEncoder):
+            if transformer.drop is not None or getattr(transformer, '_infrequent_enabled', False):
+                raise TypeError(f"OneHotEncoder '{name}' uses drop/infrequent categories, which can't be compiled")
+            for column, categories in zip(columns, transformer.categories_):
+                # Artifacts store NaN categories as null, so a None category couldn't round-trip
+                if any(category is None for category in categories):
+                    raise TypeError(f"OneHotEncoder '{name}' has a None category in {column!r}, which can't be compiled")
+                onehot.append(_OneHotBlock(column, categories, offset, transformer.handle_unknown))
+                offset += len(categories)
+        elif isinstance(transformer, StandardScaler):
+            mean = transformer.mean_ if transformer.with_mean else np.zeros(len(columns))
+            scale = transformer.scale_ if transformer.with_std else np.ones(len(columns))
+            for i, column in enumerate(columns):
+                numeric.append((column, offset + i, float(mean[i]), float(scale[i])))
+            offset += len(columns)
+        else:
+            raise TypeError(f"Cannot compile transformer '{name}' of type {type(transformer).__name__}")
+
+    return CompiledPipeline(
+        columns=[block.column for block in onehot] + [column for column, *_ in numeric],
+        n_features=offset,
+        onehot=onehot,
+        numeric=numeric,
+        model=_compile_model(model)
+    )
+
+
+# ============================================================================
+# ARTIFACT FORMAT
+# ============================================================================
+
+# Bump when the on-disk artifact layout changes so stale exports are rejected
+ARTIFACT_FORMAT_VERSION = 1
+
+_CODECS = {'zlib': zlib, 'lzma': lzma}
+
+COMPRESSIONS = [None] + list(_CODECS)
+
+
+def _json_value(value: Any) -> Any:
+    # Categories come back from sklearn as NumPy scalars; NaN is stored as null
+    if _is_missing(value):
+        return None
+    return value.item() if hasattr(value, 'item') else value
+
+
+def _write_block(directory: Path, name: str, array: np.ndarray, compression: Optional[str]) -> dict:
+    array = np.ascontiguousarray(array)
+    entry = {'file': f'{name}.npy', 'compression': compression}
+    if compression is None:
+        np.save(directory / entry['file'], array)
+    else:
+        buffer = io.BytesIO()
+        np.save(buffer, array)
+        entry['file'] += f'.{compression}'
+        (directory / entry['file']).write_bytes(_CODECS[compression].compress(buffer.getvalue()))
+    return entry
+
+
+def _read_block(directory: Path, entry: dict, mmap: bool) -> np.ndarray:
+    path = directory / entry['file']
+    if entry['compression'] is None:
+        return np.load(path, mmap_mode='r' if mmap else None)
+    return np.load(io.BytesIO(_CODECS[entry['compression']].decompress(path.read_bytes())))
+
+
+def save_artifact(
+    compiled: CompiledPipeline,
+    directory: str,
+    compression: Optional[str] = None,
+    source: Optional[dict] = None
+) -> Path:
+    """
+    Write a compiled pipeline as a directory of .npy blocks plus manifest.json.
+
+    Args:
+        compiled: CompiledPipeline to store
+        directory: Target directory (replaced atomically if it exists)
+        compression: None (raw, memory-mappable), 'zlib' or 'lzma'
+        source: Optional metadata about the pipeline it was compiled from
+
+    Returns:
+        Path to the artifact directory
+    """
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression: {compression}")
+    directory = Path(directory)
+
+    manifest = {
+        'format_version': ARTIFACT_FORMAT_VERSION,
+        'columns': compiled.columns,
+        'n_features': compiled.n_features,
+        'onehot': [
+            {
+                'column': block.column,
+                'offset': block.offset,
+                'handle_unknown': block.handle_unknown,
+                'categories': [_json_value(c) for c in block.categories]
+            }
+            for block in compiled.onehot
+        ],
+        'numeric': [[column, index, mean, scale] for column, index, mean, scale in compiled.numeric],
+        'source': source or {},
+        'arrays': {}
+    }
+    model = compiled.model
+    if isinstance(model, _LinearModel):
+        manifest['model'] = {'kind': 'linear', 'intercept': model.intercept}
+        arrays = {'coef': model.coef}
+    else:
+        manifest['model'] = {'kind': 'forest', 'max_depth': model.max_depth}
+        arrays = {name: getattr(model, name) for name in
+                  ('feature', 'threshold', 'children', 'value', 'missing_left', 'is_leaf', 'roots')}
+
+    # Write into a temporary directory, then swap it in so readers never see a partial artifact
+    directory.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(dir=directory.parent, prefix=f'.{directory.name}-'))
+    try:
+        os.chmod(tmp_dir, 0o755)
+        for name, array in arrays.items():
+            manifest['arrays'][name] = _write_block(tmp_dir, name, array, compression)
+        with open(tmp_dir / 'manifest.json', 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        if directory.exists():
+            shutil.rmtree(directory)
+        os.replace(tmp_dir, directory)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    return directory
+
+
+def load_artifact(directory: str, mmap: bool = True) -> CompiledPipeline:
+    """
+    Load a compiled pipeline written by save_artifact().
+
+    Args:
+        directory: Artifact directory
+        mmap: Memory-map uncompressed blocks (read-only) instead of reading them
+
+    Returns:
+        CompiledPipeline
+
+    Raises:
+        FileNotFoundError: If the directory has no manifest.json
+        ValueError: If the artifact was written by an incompatible version
+    """
+    directory = Path(directory)
+    with open(directory / 'manifest.json') as f:
+        manifest = json.load(f)
+    if manifest.get('format_version') != ARTIFACT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported artifact format version {manifest.get('format_version')} in {directory}")
+
+    arrays = {name: _read_block(directory, entry, mmap) for name, entry in manifest['arrays'].items()}
+    if manifest['model']['kind'] == 'linear':
+        model = _LinearModel(arrays['coef'], manifest['model']['intercept'])
+    else:
+        model = PackedForest(max_depth=manifest['model']['max_depth'], **arrays)
+
+    onehot = [
+        _OneHotBlock(
+            block['column'],
+            [np.nan if c is None else c for c in block['categories']],
+            block['offset'],
+            block['handle_unknown']
+        )
+        for block in manifest['onehot']
+    ]
+    return CompiledPipeline(
+        columns=manifest['columns'],
+        n_features=manifest['n_features'],
+        onehot=onehot,
+        numeric=[tuple(entry) for entry in manifest['numeric']],
+        model=model
+    )
@@ -4,31 +4,168 @@ Model evaluation metrics calculation utilities.
 
 import numpy as np
 from typing import Tuple
-from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
 
+from .perf_utils import timed
 
+
+# Rows processed per block by the fused kernel; keeps temporaries cache-sized
+_BLOCK_ROWS = 1 << 14
+
+
+def _as_float64(values) -> np.ndarray:
+    """Return a contiguous float64 view (or copy, if unavoidable) of values."""
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+def _fused_error_sums(y_true: np.ndarray, y_pred: np.ndarray) -> dict:
+    """
+    Accumulate every error statistic in a single blocked pass.
+    
+    Args:
+        y_true: Actual values, shape (n_rows,)
+        y_pred: Predicted values, shape (n_models, n_rows)
+    
+    Returns:
+        Dictionary of per-model sums plus target sums for R2
+    """
+    n_models, n_rows = y_pred.shape
+    block = min(_BLOCK_ROWS, n_rows)
+    residual_buf = np.empty((n_models, block))
+    centered_buf = np.empty((n_models, block))
+    target_buf = np.empty(block)
+    
+    # Target and residual sums are shifted by the first value to limit
+    # cancellation in SST and in the residual variance
+    shift = y_true[0]
+    error_shift = (y_true[0] - y_pred[:, 0])[:, np.newaxis]
+    sum_target = 0.0
+    sum_target_sq = 0.0
+    sum_centered_error = np.zeros(n_models)
+    sum_centered_sq_error = np.zeros(n_models)
+    sum_abs_error = np.zeros(n_models)
+    max_abs_error = np.zeros(n_models)
+    min_abs_error = np.full(n_models, np.inf)
+    
+    for start in range(0, n_rows, block):
+        stop = min(start + block, n_rows)
+        width = stop - start
+        target = y_true[start:stop]
+        residuals = residual_buf[:, :width]
+        
+        np.subtract(target, y_pred[:, start:stop], out=residuals)
+        centered_error = np.subtract(residuals, error_shift, out=centered_buf[:, :width])
+        sum_centered_error += centered_error.sum(axis=1)
+        sum_centered_sq_error += np.einsum('ij,ij->i', centered_error, centered_error)
+        np.abs(residuals, out=residuals)
+        sum_abs_error += residuals.sum(axis=1)
+        np.maximum(max_abs_error, residuals.max(axis=1), out=max_abs_error)
+        np.minimum(min_abs_error, residuals.min(axis=1), out=min_abs_error)
+        
+        centered = np.subtract(target, shift, out=target_buf[:width])
+        sum_target += centered.sum()
+        sum_target_sq += centered @ centered
+    
+    # Raw sums follow from the shifted ones; nothing cancels here, since the
+    # squares are all positive
+    error_shift = error_shift[:, 0]
+    return {
+        'n': n_rows,
+        'sum_error': sum_centered_error + n_rows * error_shift,
+        'sum_sq_error': (sum_centered_sq_error + 2 * error_shift * sum_centered_error
+                         + n_rows * error_shift ** 2),
+        'sum_abs_error': sum_abs_error,
+        'max_abs_error': max_abs_error,
+        'min_abs_error': min_abs_error,
+        'ss_error': np.maximum(sum_centered_sq_error - sum_centered_error ** 2 / n_rows, 0.0),
+        'ss_total': max(sum_target_sq - sum_target * sum_target / n_rows, 0.0)
+    }
+
+
+def _metrics_from_sums(sums: dict) -> dict:
+    """Turn accumulated sums into metric arrays (one value per model)."""
+    n = sums['n']
+    mse = sums['sum_sq_error'] / n
+    mean_error = sums['sum_error'] / n
+    ss_total = sums['ss_total']
+    
+    if ss_total > 0:
+        r2 = 1.0 - sums['sum_sq_error'] / ss_total
+    else:
+        # Same convention as sklearn.metrics.r2_score for a constant target
+        r2 = np.where(sums['sum_sq_error'] == 0, 1.0, 0.0)
+    
+    return {
+        'MSE': mse,
+        'RMSE': np.sqrt(mse),
+        'MAE': sums['sum_abs_error'] / n,
+        'R2 Score': r2,
+        'Mean Error': mean_error,
+        'Std Error': np.sqrt(sums['ss_error'] / n),
+        'Max Error': sums['max_abs_error'],
+        'Min Error': sums['min_abs_error']
+    }
+
+
+def _validate_targets(y_true, y_pred, expected_pred_ndim: int) -> Tuple[np.ndarray, np.ndarray]:
+    y_true = _as_float64(y_true).ravel()
+    y_pred = _as_float64(y_pred)
+    if expected_pred_ndim == 1:
+        y_pred = y_pred.reshape(1, -1)
+    elif y_pred.ndim != 2:
+        raise ValueError(f"y_pred must be 2-D (n_models, n_rows), got shape {y_pred.shape}")
+    
+    if y_pred.shape[1] != y_true.shape[0]:
+        raise ValueError(
+            f"Found input variables with inconsistent numbers of samples: "
+            f"[{y_true.shape[0]}, {y_pred.shape[1]}]"
+        )
+    if y_true.shape[0] == 0:
+        raise ValueError("Cannot calculate metrics for empty arrays")
+    # The fused kernel would turn NaN into a plausible-looking R2 of 0, so reject it as sklearn did
+    if not (np.isfinite(y_true).all() and np.isfinite(y_pred).all()):
+        raise ValueError("Input contains NaN or infinity.")
+    return y_true, y_pred
+
+
+@timed()
 def calculate_metrics(y_true: np.ndarray, y_pred: np.ndarray) -> dict:
     """
     Calculate comprehensive model evaluation metrics.
     
+    All metrics come from one fused pass over contiguous float64 buffers,
+    so the residual statistics are included at no extra cost.
+    
     Args:
         y_true: Actual values
         y_pred: Predicted values
     
     Returns:
-        Dictionary containing MSE, MAE, and R2 Score
+        Dictionary containing MSE, RMSE, MAE and R2 Score, plus the residual
+        statistics of get_prediction_error_stats() (Mean/Std/Max/Min Error)
+    
+    Raises:
+        ValueError: If the inputs are empty, differ in length or contain
+            NaN or infinity
     """
-    mse = mean_squared_error(y_true, y_pred)
-    mae = mean_absolute_error(y_true, y_pred)
-    r2 = r2_score(y_true, y_pred)
-    rmse = np.sqrt(mse)
+    y_true, y_pred = _validate_targets(y_true, y_pred, expected_pred_ndim=1)
+    metrics = _metrics_from_sums(_fused_error_sums(y_true, y_pred))
+    return {name: float(values[0]) for name, values in metrics.items()}
+
+
+def calculate_metrics_batch(y_true: np.ndarray, y_pred: np.ndarray) -> dict:
+    """
+    Score many models' predictions against the same targets in one call.
     
-    return {
-        'MSE': mse,
-        'RMSE': rmse,
-        'MAE': mae,
-        'R2 Score': r2
-    }
+    Args:
+        y_true: Actual values, shape (n_rows,)
+        y_pred: Predicted values, shape (n_models, n_rows)
+    
+    Returns:
+        Dictionary of {metric_name: array of shape (n_models,)} with the same
+        keys as calculate_metrics()
+    """
+    y_true, y_pred = _validate_targets(y_true, y_pred, expected_pred_ndim=2)
+    return _metrics_from_sums(_fused_error_sums(y_true, y_pred))
 
 
 def calculate_residuals(y_true: np.ndarray, y_pred: np.ndarray) -> np.ndarray:
@@ -78,3 +215,318 @@ def format_metric(value: float, metric_name: str) -> str:
         return f"{value:.4f}"
     else:
         return f"{value:,.2f}"
+
+
+@timed()
+def compute_histogram(values: np.ndarray, bins: int = 30) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Equal-width histogram of the finite values, computed server-side.
+    
+    Only the edges and counts need to reach the browser, instead of every
+    value for client-side binning.
+    
+    Args:
+        values: Values to count (e.g. residuals or targets)
+        bins: Number of bins
+    
+    Returns:
+        Tuple of (bin edges, shape bins + 1; counts, shape bins, int64)
+    """
+    values = _as_float64(values).ravel()
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return np.linspace(0.0, 1.0, bins + 1), np.zeros(bins, dtype=np.int64)
+    counts, edges = np.histogram(values, bins=bins)
+    return edges, counts.astype(np.int64)
+
+
+class StreamingMetrics:
+    """
+    Mergeable accumulator for regression metrics over unbounded streams.
+    
+    Memory use is constant regardless of how many rows are seen. Error sums
+    are accumulated directly; the target variance needed for R2 and the
+    residual variance behind Std Error are combined with Chan's parallel
+    update so chunks and workers can be merged in any order.
+    
+    Usage:
+        stream = StreamingMetrics()
+        for y_true_chunk, y_pred_chunk in chunks:
+            stream.update(y_true_chunk, y_pred_chunk)
+        stream.merge(metrics_from_other_worker)
+        metrics = stream.result()  # same keys as calculate_metrics()
+    """
+    
+    def __init__(self):
+        self.n = 0
+        self.target_mean = 0.0
+        self.target_m2 = 0.0
+        self.sum_error = 0.0
+        self.error_m2 = 0.0
+        self.sum_sq_error = 0.0
+        self.sum_abs_error = 0.0
+        self.max_abs_error = 0.0
+        self.min_abs_error = np.inf
+    
+    def _combine_target(self, n: int, mean: float, m2: float) -> None:
+        total = self.n + n
+        delta = mean - self.target_mean
+        self.target_mean += delta * n / total
+        self.target_m2 += m2 + delta * delta * self.n * n / total
+    
+    def _combine_error(self, n: int, sum_error: float, m2: float) -> None:
+        # Called before self.n and self.sum_error include the new rows
+        if self.n > 0:
+            delta = sum_error / n - self.sum_error / self.n
+            m2 += delta * delta * self.n * n / (self.n + n)
+        self.error_m2 += m2
+    
+    def update(self, y_true_chunk: np.ndarray, y_pred_chunk: np.ndarray) -> 'StreamingMetrics':
+        """
+        Add a chunk of actual and predicted values.
+        
+        Args:
+            y_true_chunk: Actual values
+            y_pred_chunk: Predicted values
+        
+        Returns:
+            self, for chaining
+        """
+        y_true, y_pred = _validate_targets(y_true_chunk, y_pred_chunk, expected_pred_ndim=1)
+        sums = _fused_error_sums(y_true, y_pred)
+        
+        self._combine_target(sums['n'], float(y_true.mean()), sums['ss_total'])
+        self._combine_error(sums['n'], float(sums['sum_error'][0]), float(sums['ss_error'][0]))
+        self.n += sums['n']
+        self.sum_error += float(sums['sum_error'][0])
+        self.sum_sq_error += float(sums['sum_sq_error'][0])
+        self.sum_abs_error += float(sums['sum_abs_error'][0])
+        self.max_abs_error = max(self.max_abs_error, float(sums['max_abs_error'][0]))
+        self.min_abs_error = min(self.min_abs_error, float(sums['min_abs_error'][0]))
+        return self
+    
+    def merge(self, other: 'StreamingMetrics') -> 'StreamingMetrics':
+        """
+        Fold another accumulator (e.g. from a worker process) into this one.
+        
+        Args:
+            other: Accumulator to merge
+        
+        Returns:
+            self, for chaining
+        """
+        if other.n == 0:
+            return self
+        self._combine_target(other.n, other.target_mean, other.target_m2)
+        self._combine_error(other.n, other.sum_error, other.error_m2)
+        self.n += other.n
+        self.sum_error += other.sum_error
+        self.sum_sq_error += other.sum_sq_error
+        self.sum_abs_error += other.sum_abs_error
+        self.max_abs_error = max(self.max_abs_error, other.max_abs_error)
+        self.min_abs_error = min(self.min_abs_error, other.min_abs_error)
+        return self
+    
+    def result(self) -> dict:
+        """
+        Get the metrics for everything seen so far.
+        
+        Returns:
+            Dictionary with the same keys as calculate_metrics()
+        
+        Raises:
+            ValueError: If no rows have been added
+        """
+        if self.n == 0:
+            raise ValueError("Cannot calculate metrics for empty arrays")
+        sums = {
+            'n': self.n,
+            'sum_error': np.array([self.sum_error]),
+            'sum_sq_error': np.array([self.sum_sq_error]),
+            'sum_abs_error': np.array([self.sum_abs_error]),
+            'max_abs_error': np.array([self.max_abs_error]),
+            'min_abs_error': np.array([self.min_abs_error]),
+            'ss_error': np.array([self.error_m2]),
+            'ss_total': self.target_m2
+        }
+        return {name: float(values[0]) for name, values in _metrics_from_sums(sums).items()}
+
+
+class StreamingHistogram:
+    """
+    Fixed-bin histogram that can be updated chunk by chunk and merged.
+    
+    Values outside [low, high) are counted in underflow/overflow and NaN in
+    nan_count rather than dropped, so total always matches the number of
+    rows seen.
+    """
+    
+    def __init__(self, low: float, high: float, bins: int = 30):
+        """
+        Args:
+            low: Left edge of the first bin
+            high: Right edge of the last bin
+            bins: Number of equal-width bins
+        """
+        if not high > low:
+            raise ValueError(f"high ({high}) must be greater than low ({low})")
+        self.edges = np.linspace(low, high, bins + 1)
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self.underflow = 0
+        self.overflow = 0
+        self.nan_count = 0
+    
+    @property
+    def total(self) -> int:
+        """Number of values seen, including underflow, overflow and NaN."""
+        return int(self.counts.sum()) + self.underflow + self.overflow + self.nan_count
+    
+    def update(self, values: np.ndarray) -> 'StreamingHistogram':
+        """
+        Add a chunk of values (e.g. residuals).
+        
+        Args:
+            values: Values to count
+        
+        Returns:
+            self, for chaining
+        """
+        values = _as_float64(values).ravel()
+        low, high = self.edges[0], self.edges[-1]
+        bins = len(self.counts)
+        self.underflow += int(np.count_nonzero(values < low))
+        self.overflow += int(np.count_nonzero(values >= high))
+        self.nan_count += int(np.count_nonzero(np.isnan(values)))
+        
+        inside = values[(values >= low) & (values < high)]
+        index = ((inside - low) * (bins / (high - low))).astype(np.intp)
+        np.minimum(index, bins - 1, out=index)
+        self.counts += np.bincount(index, minlength=bins)
+        return self
+    
+    def merge(self, other: 'StreamingHistogram') -> 'StreamingHistogram':
+        """
+        Add another histogram's counts into this one.
+        
+        Args:
+            other: Histogram with identical bin edges
+        
+        Returns:
+            self, for chaining
+        """
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("Cannot merge histograms with different bin edges")
+        self.counts += other.counts
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+        self.nan_count += other.nan_count
+        return self
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with bounded relative error.
+    
+    Values are counted in logarithmic buckets, so any quantile is returned
+    within relative_accuracy of the true value. The number of buckets depends
+    only on the dynamic range of the data, not on the number of rows, and two
+    sketches merge exactly by adding bucket counts.
+    """
+    
+    def __init__(self, relative_accuracy: float = 0.01, min_value: float = 1e-9):
+        """
+        Args:
+            relative_accuracy: Maximum relative error of returned quantiles
+            min_value: Magnitudes below this are counted as zero
+        """
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = np.log(self.gamma)
+        self.positive = {}
+        self.negative = {}
+        self.zero_count = 0
+        self.n = 0
+    
+    def _add_buckets(self, store: dict, magnitudes: np.ndarray) -> None:
+        if magnitudes.size == 0:
+            return
+        keys = np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64)
+        unique_keys, counts = np.unique(keys, return_counts=True)
+        for key, count in zip(unique_keys.tolist(), counts.tolist()):
+            store[key] = store.get(key, 0) + count
+    
+    def _bucket_value(self, key: int) -> float:
+        # Midpoint (in relative terms) of the bucket (gamma^(key-1), gamma^key]
+        return 2 * self.gamma ** key / (self.gamma + 1)
+    
+    def update(self, values: np.ndarray) -> 'QuantileSketch':
+        """
+        Add a chunk of values (e.g. absolute errors).
+        
+        Args:
+            values: Values to add
+        
+        Returns:
+            self, for chaining
+        """
+        values = _as_float64(values).ravel()
+        values = values[~np.isnan(values)]
+        self.n += values.size
+        self.zero_count += int(np.count_nonzero(np.abs(values) < self.min_value))
+        self._add_buckets(self.positive, values[values >= self.min_value])
+        self._add_buckets(self.negative, -values[values <= -self.min_value])
+        return self
+    
+    def merge(self, other: 'QuantileSketch') -> 'QuantileSketch':
+        """
+        Add another sketch's counts into this one.
+        
+        Args:
+            other: Sketch created with the same relative_accuracy
+        
+        Returns:
+            self, for chaining
+        """
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different relative_accuracy")
+        for key, count in other.positive.items():
+            self.positive[key] = self.positive.get(key, 0) + count
+        for key, count in other.negative.items():
+            self.negative[key] = self.negative.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.n += other.n
+        return self
+    
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile of everything seen so far.
+        
+        Args:
+            q: Quantile in [0, 1] (e.g. 0.99 for p99)
+        
+        Returns:
+            Estimated value at quantile q
+        """
+        if self.n == 0:
+            raise ValueError("Cannot compute a quantile of an empty sketch")
+        if not 0 <= q <= 1:
+            raise ValueError("q must be between 0 and 1")
+        
+        rank = q * (self.n - 1)
+        seen = 0
+        # Walk from the most negative value to the most positive one
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._bucket_value(key)
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._bucket_value(key)
+        return self._bucket_value(max(self.positive)) if self.positive else 0.0
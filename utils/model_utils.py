@@ -1,12 +1,24 @@
 """
 Model loading and caching utilities for the ML dashboard.
 Now loads sklearn Pipeline models that include preprocessing + model.
+
+This module is framework-neutral: it does not import Streamlit, so batch
+jobs, tests and services can load models cheaply. The dashboard uses the
+thin adapter in utils.streamlit_utils instead.
 """
 
-import joblib
-import streamlit as st
+import logging
+import os
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, Any
+from typing import Any, Callable, Dict, Optional
+
+import joblib
+
+from .perf_utils import record_cache, span
+
+logger = logging.getLogger(__name__)
 
 
 def get_model_path(model_name: str) -> str:
@@ -29,7 +41,153 @@ def get_model_path(model_name: str) -> str:
     return str(model_path)
 
 
-@st.cache_resource
+def get_compiled_model_path(model_name: str) -> str:
+    """
+    Get the artifact directory of a model's compiled predictor (see export_compiled_models.py).
+    
+    Args:
+        model_name: Name of the model (e.g., 'Linear Regression')
+    
+    Returns:
+        Full path to the compiled artifact directory
+    """
+    return str(Path(__file__).parent.parent / f"{model_name} Compiled")
+
+
+def _load_compiled_artifact(path: str) -> Any:
+    from .inference_utils import load_artifact
+    
+    return load_artifact(path, mmap=True)
+
+
+class ModelRegistry:
+    """
+    Thread-safe LRU cache of loaded pipeline models.
+    
+    Each model is unpickled at most once, even when several threads ask for
+    it at the same time. A cached model is reloaded if its file on disk has
+    been replaced (e.g. after retraining).
+    
+    Usage:
+        registry = ModelRegistry(max_models=4)
+        pipeline = registry.get('Random Forest')
+    """
+    
+    def __init__(
+        self,
+        max_models: int = 8,
+        path_resolver: Optional[Callable[[str], str]] = None,
+        loader: Optional[Callable[[str], Any]] = None,
+        name: str = 'model_registry'
+    ):
+        """
+        Args:
+            max_models: Maximum number of models kept in memory
+            path_resolver: Maps a model name to a file path (default: get_model_path)
+            loader: Loads a model from a file path (default: joblib.load)
+            name: Cache name under which hits and misses are counted (see utils.perf_utils)
+        """
+        self.max_models = max_models
+        self.name = name
+        self.path_resolver = path_resolver or get_model_path
+        self.loader = loader or joblib.load
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+    
+    def _key_lock(self, model_name: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(model_name, threading.Lock())
+    
+    def _lookup(self, model_name: str, mtime: float) -> Optional[Any]:
+        with self._lock:
+            entry = self._models.get(model_name)
+            if entry is not None and entry[0] == mtime:
+                self._models.move_to_end(model_name)
+                return entry[1]
+        return None
+    
+    def get(self, model_name: str) -> Any:
+        """
+        Get a model, loading it from disk on first use.
+        
+        Args:
+            model_name: Name of the model to load
+        
+        Returns:
+            Loaded sklearn.pipeline.Pipeline object
+        
+        Raises:
+            FileNotFoundError: If the model file does not exist
+        """
+        model_path = self.path_resolver(model_name)
+        mtime = os.stat(model_path).st_mtime
+        
+        model = self._lookup(model_name, mtime)
+        record_cache(self.name, model is not None)
+        if model is not None:
+            return model
+        
+        # Only one thread unpickles a given model; others wait and reuse it
+        with self._key_lock(model_name):
+            model = self._lookup(model_name, mtime)
+            if model is not None:
+                return model
+            
+            with span(f"{self.name}.load[{model_name}]"):
+                model = self.loader(model_path)
+            with self._lock:
+                self._models[model_name] = (mtime, model)
+                self._models.move_to_end(model_name)
+                while len(self._models) > self.max_models:
+                    self._models.popitem(last=False)
+        return model
+    
+    def evict(self, model_name: str) -> None:
+        """Remove a model from the cache."""
+        with self._lock:
+            self._models.pop(model_name, None)
+    
+    def clear(self) -> None:
+        """Remove all models from the cache."""
+        with self._lock:
+            self._models.clear()
+    
+    def cached_models(self) -> list:
+        """Names of the models currently in memory, least recently used first."""
+        with self._lock:
+            return list(self._models.keys())
+
+
+_default_registry = ModelRegistry()
+
+# Compiled artifacts are memory-mapped, so keeping many of them costs little memory
+_compiled_registry = ModelRegistry(
+    max_models=32, path_resolver=get_compiled_model_path, loader=_load_compiled_artifact,
+    name='compiled_registry'
+)
+
+
+def get_default_registry() -> ModelRegistry:
+    """
+    Get the process-wide model registry used by load_model().
+    
+    Returns:
+        Shared ModelRegistry instance
+    """
+    return _default_registry
+
+
+def get_compiled_registry() -> ModelRegistry:
+    """
+    Get the process-wide registry of compiled model artifacts.
+    
+    Returns:
+        Shared ModelRegistry instance used by load_compiled_model()
+    """
+    return _compiled_registry
+
+
 def load_model(model_name: str) -> Any:
     """
     Load a trained pipeline model from disk with caching.
@@ -47,17 +205,65 @@ def load_model(model_name: str) -> Any:
         model_name: Name of the model to load
     
     Returns:
-        Loaded sklearn.pipeline.Pipeline object
+        Loaded sklearn.pipeline.Pipeline object, or None if the file is missing
+    """
+    try:
+        return _default_registry.get(model_name)
+    except FileNotFoundError:
+        logger.error("Model pipeline file not found: %s", get_model_path(model_name))
+        return None
+
+
+def load_compiled_model(model_name: str) -> Any:
+    """
+    Load a model's compiled predictor from its memory-mapped artifact.
+    
+    Usage:
+        compiled = load_compiled_model('Random Forest')
+        prediction = compiled.predict({'holiday': None, 'temp': 288.3, ...})
+    
+    Args:
+        model_name: Name of the model to load
+    
+    Returns:
+        utils.inference_utils.CompiledPipeline, or None if no artifact was exported
     """
-    model_path = get_model_path(model_name)
     try:
-        pipeline = joblib.load(model_path)
-        return pipeline
+        return _compiled_registry.get(model_name)
     except FileNotFoundError:
-        st.error(f"Model pipeline file not found: {model_path}")
+        logger.error("Compiled model artifact not found: %s", get_compiled_model_path(model_name))
         return None
 
 
+def save_compiled_model(model_name: str, pipeline: Any, compression: Optional[str] = None) -> str:
+    """
+    Compile a fitted pipeline and write it as the model's artifact directory.
+    
+    Args:
+        model_name: Name of the model (e.g., 'Random Forest')
+        pipeline: Fitted sklearn.pipeline.Pipeline
+        compression: None (memory-mappable), 'zlib' or 'lzma'
+    
+    Returns:
+        Path to the artifact directory
+    
+    Raises:
+        TypeError: If the pipeline can't be compiled
+    """
+    from .inference_utils import compile_pipeline, save_artifact
+    
+    source = {'model_name': model_name}
+    pipeline_path = get_model_path(model_name)
+    if os.path.exists(pipeline_path):
+        stat = os.stat(pipeline_path)
+        source.update({'pipeline_file': os.path.basename(pipeline_path),
+                       'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns})
+    
+    path = get_compiled_model_path(model_name)
+    save_artifact(compile_pipeline(pipeline), path, compression=compression, source=source)
+    return path
+
+
 def load_all_models(model_names: list) -> Dict[str, Any]:
     """
     Load multiple pipeline models at once.
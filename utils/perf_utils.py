@@ -0,0 +1,389 @@
+"""
+Lightweight timing spans and cache counters for the dashboard's hot paths.
+
+A span is a named, timed block (`with span('load_data'):` or the @timed
+decorator). Every finished span updates a process-wide count, total and
+maximum for its name, and is also appended to the current rerun, so the
+dashboard can show both what the last rerun cost and where time went over
+the life of the process. Cache lookups are counted as hits and misses per
+cache name.
+
+Only the standard library is used and a span costs a few microseconds,
+so instrumentation stays on in production. Metrics can be written as JSON
+or in the Prometheus text exposition format (e.g. for node_exporter's
+textfile collector).
+"""
+
+import functools
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+
+# Spans kept per rerun; later ones are only counted, so a loop can't grow a run without bound
+MAX_RUN_SPANS = 500
+
+METRICS_PREFIX = 'traffic_dashboard'
+
+
+class RunRecord:
+    """
+    Spans started during one rerun (or any block wrapped in PerfRecorder.run()).
+
+    Attributes:
+        spans: List of [name, depth, seconds] in the order the spans started
+        dropped: Number of spans beyond MAX_RUN_SPANS that were not kept
+        seconds: Wall time of the whole run (None while it is still running)
+    """
+
+    def __init__(self):
+        self.spans = []
+        self.dropped = 0
+        self.seconds = None
+        self._start = time.perf_counter()
+
+    def elapsed(self) -> float:
+        """Seconds since the run started (its total once finished)."""
+        return self.seconds if self.seconds is not None else time.perf_counter() - self._start
+
+    def totals(self) -> Dict[str, float]:
+        """Total seconds per span name within this run (nested spans are counted in their parents too)."""
+        totals = {}
+        for name, _, seconds in self.spans:
+            totals[name] = totals.get(name, 0.0) + seconds
+        return totals
+
+
+class PerfRecorder:
+    """
+    Thread-safe collector of span timings and cache hit/miss counts.
+
+    Aggregates are shared by all threads (all Streamlit sessions); the
+    current run, nesting depth and pending cache lookups are per thread.
+
+    Usage:
+        recorder = PerfRecorder()
+        with recorder.run() as run:
+            with recorder.span('load_data'):
+                df = pd.read_csv('test_data.csv')
+        print(run.totals(), recorder.to_prometheus())
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._spans = {}
+        self._caches = {}
+        self._runs = 0
+
+    def _state(self) -> threading.local:
+        local = self._local
+        if not hasattr(local, 'depth'):
+            local.depth = 0
+            local.run = None
+            local.lookups = []
+        return local
+
+    def _record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            stats = self._spans.get(name)
+            if stats is None:
+                self._spans[name] = [1, seconds, seconds]
+            else:
+                stats[0] += 1
+                stats[1] += seconds
+                if seconds > stats[2]:
+                    stats[2] = seconds
+
+    def _reserve(self, state: threading.local, name: str, depth: int) -> Optional[list]:
+        # Entries are added when a span starts, so a run lists parents before their children
+        run = state.run
+        if run is None:
+            return None
+        if len(run.spans) >= MAX_RUN_SPANS:
+            run.dropped += 1
+            return None
+        entry = [name, depth, 0.0]
+        run.spans.append(entry)
+        return entry
+
+    def _enter(self, name: str) -> tuple:
+        state = self._state()
+        depth = state.depth
+        entry = self._reserve(state, name, depth)
+        state.depth = depth + 1
+        return state, depth, entry, time.perf_counter()
+
+    def _exit(self, name: str, token: tuple) -> None:
+        state, depth, entry, start = token
+        seconds = time.perf_counter() - start
+        state.depth = depth
+        if entry is not None:
+            entry[2] = seconds
+        self._record(name, seconds)
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """
+        Time a block of code under the given name.
+
+        Args:
+            name: Span name (e.g. 'load_data', 'plot_utils.plot_residuals')
+        """
+        token = self._enter(name)
+        try:
+            yield
+        finally:
+            self._exit(name, token)
+
+    def timed(self, name: Optional[str] = None, cache: Optional[str] = None) -> Callable:
+        """
+        Decorator that wraps every call of a function in a span.
+
+        Args:
+            name: Span name (default: '<module>.<function>')
+            cache: If given, also count each call as a hit or miss of this
+                cache: a miss when the call runs note_cache_miss() (put it in
+                the body of the cached function), a hit otherwise
+
+        Returns:
+            Decorator
+        """
+        def decorator(func: Callable) -> Callable:
+            span_name = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__qualname__}"
+
+            if cache is None:
+                # Same as `with self.span(...)`, without a generator per call
+                @functools.wraps(func)
+                def wrapper(*args, **kwargs):
+                    token = self._enter(span_name)
+                    try:
+                        return func(*args, **kwargs)
+                    finally:
+                        self._exit(span_name, token)
+            else:
+                @functools.wraps(func)
+                def wrapper(*args, **kwargs):
+                    with self.span(span_name), self.cache_lookup(cache):
+                        return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    @contextmanager
+    def cache_lookup(self, cache: str) -> Iterator[None]:
+        """
+        Count a block as a hit of the named cache unless note_cache_miss() runs inside it.
+
+        Args:
+            cache: Cache name (e.g. 'models')
+        """
+        lookups = self._state().lookups
+        lookups.append(False)
+        try:
+            yield
+        finally:
+            self.record_cache(cache, hit=not lookups.pop())
+
+    def note_cache_miss(self) -> None:
+        """Mark the innermost cache_lookup() of this thread as a miss."""
+        lookups = self._state().lookups
+        if lookups:
+            lookups[-1] = True
+
+    def record_cache(self, cache: str, hit: bool) -> None:
+        """
+        Count one lookup of a cache.
+
+        Args:
+            cache: Cache name (e.g. 'predictions')
+            hit: Whether the value was already cached
+        """
+        with self._lock:
+            counts = self._caches.setdefault(cache, [0, 0])
+            counts[0 if hit else 1] += 1
+
+    @contextmanager
+    def run(self) -> Iterator[RunRecord]:
+        """
+        Collect the spans this thread runs inside the block.
+
+        The run's own duration is recorded as the 'rerun' span.
+
+        Yields:
+            RunRecord that fills up as spans finish
+        """
+        state = self._state()
+        previous = state.run
+        record = state.run = RunRecord()
+        try:
+            yield record
+        finally:
+            state.run = previous
+            record.seconds = time.perf_counter() - record._start
+            with self._lock:
+                self._runs += 1
+            self._record('rerun', record.seconds)
+
+    def snapshot(self) -> dict:
+        """
+        Copy of the aggregated metrics.
+
+        Returns:
+            Dictionary with 'runs', 'spans' ({name: count, total_seconds,
+            mean_seconds, max_seconds}) and 'caches' ({name: hits, misses, hit_rate})
+        """
+        with self._lock:
+            spans = {name: list(stats) for name, stats in self._spans.items()}
+            caches = {name: list(counts) for name, counts in self._caches.items()}
+            runs = self._runs
+
+        return {
+            'runs': runs,
+            'spans': {
+                name: {'count': count, 'total_seconds': total,
+                       'mean_seconds': total / count, 'max_seconds': maximum}
+                for name, (count, total, maximum) in sorted(spans.items())
+            },
+            'caches': {
+                name: {'hits': hits, 'misses': misses,
+                       'hit_rate': hits / (hits + misses) if hits + misses else 0.0}
+                for name, (hits, misses) in sorted(caches.items())
+            }
+        }
+
+    def to_prometheus(self, prefix: str = METRICS_PREFIX) -> str:
+        """
+        Render the aggregated metrics in the Prometheus text exposition format.
+
+        Args:
+            prefix: Metric name prefix
+
+        Returns:
+            Exposition text ending in a newline
+        """
+        snapshot = self.snapshot()
+        lines = [
+            f"# HELP {prefix}_span_seconds Wall time spent in instrumented spans.",
+            f"# TYPE {prefix}_span_seconds summary"
+        ]
+        for name, stats in snapshot['spans'].items():
+            label = f'{{span="{_escape_label(name)}"}}'
+            lines.append(f"{prefix}_span_seconds_sum{label} {stats['total_seconds']!r}")
+            lines.append(f"{prefix}_span_seconds_count{label} {stats['count']}")
+
+        lines += [
+            f"# HELP {prefix}_span_max_seconds Longest single call of each span.",
+            f"# TYPE {prefix}_span_max_seconds gauge"
+        ]
+        for name, stats in snapshot['spans'].items():
+            lines.append(f'{prefix}_span_max_seconds{{span="{_escape_label(name)}"}} {stats["max_seconds"]!r}')
+
+        lines += [
+            f"# HELP {prefix}_cache_requests_total Cache lookups by cache and result.",
+            f"# TYPE {prefix}_cache_requests_total counter"
+        ]
+        for name, stats in snapshot['caches'].items():
+            cache = _escape_label(name)
+            lines.append(f'{prefix}_cache_requests_total{{cache="{cache}",result="hit"}} {stats["hits"]}')
+            lines.append(f'{prefix}_cache_requests_total{{cache="{cache}",result="miss"}} {stats["misses"]}')
+
+        lines += [
+            f"# HELP {prefix}_runs_total Dashboard reruns recorded.",
+            f"# TYPE {prefix}_runs_total counter",
+            f"{prefix}_runs_total {snapshot['runs']}"
+        ]
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: str) -> None:
+        """
+        Write the aggregated metrics to a file, replacing it atomically.
+
+        Args:
+            path: Destination; a '.prom' file gets the Prometheus text format,
+                anything else JSON
+        """
+        if path.endswith('.prom'):
+            text = self.to_prometheus()
+        else:
+            text = json.dumps({'written_at': time.time(), **self.snapshot()}, indent=2)
+
+        # Write to a temporary file and rename, so a scraper never reads a partial file
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.metrics-', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def reset(self) -> None:
+        """Drop all aggregated metrics."""
+        with self._lock:
+            self._spans.clear()
+            self._caches.clear()
+            self._runs = 0
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# ============================================================================
+# PROCESS-WIDE RECORDER
+# ============================================================================
+
+_recorder = PerfRecorder()
+
+
+def get_recorder() -> PerfRecorder:
+    """
+    Get the process-wide recorder used by the module-level helpers.
+
+    Returns:
+        Shared PerfRecorder instance
+    """
+    return _recorder
+
+
+def span(name: str):
+    """Time a block under the given name on the shared recorder (see PerfRecorder.span)."""
+    return _recorder.span(name)
+
+
+def timed(name: Optional[str] = None, cache: Optional[str] = None) -> Callable:
+    """Decorator timing every call on the shared recorder (see PerfRecorder.timed)."""
+    return _recorder.timed(name, cache)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Count one cache lookup on the shared recorder (see PerfRecorder.record_cache)."""
+    _recorder.record_cache(cache, hit)
+
+
+def note_cache_miss() -> None:
+    """Mark the innermost pending cache lookup as a miss (see PerfRecorder.cache_lookup)."""
+    _recorder.note_cache_miss()
+
+
+def format_run(run: RunRecord, min_seconds: float = 0.0) -> List[dict]:
+    """
+    Rows describing a run's spans, indented by nesting depth, for display.
+
+    Args:
+        run: RunRecord from PerfRecorder.run()
+        min_seconds: Leave out spans shorter than this
+
+    Returns:
+        List of {'Span', 'ms', 'Share'} dictionaries in the order the spans started
+    """
+    total = run.elapsed() or 1.0
+    return [
+        {'Span': '· ' * depth + name, 'ms': seconds * 1e3, 'Share': seconds / total}
+        for name, depth, seconds in run.spans if seconds >= min_seconds
+    ]
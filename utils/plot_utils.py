@@ -1,37 +1,154 @@
 """
 Visualization utilities for the ML dashboard.
+
+Plot builders scale with the number of points: past WEBGL_THRESHOLD points
+scatter plots are drawn with WebGL (Scattergl), past DENSITY_THRESHOLD they
+become a 2-D histogram binned on the server, and long line plots are
+downsampled with LTTB to at most LTTB_THRESHOLD points per series.
 """
 
 import plotly.graph_objects as go
-import plotly.express as px
 import numpy as np
-from typing import Tuple, List
+from typing import Tuple
+
+from .perf_utils import timed
+
 
+# Point counts at which the plot builders switch representation
+WEBGL_THRESHOLD = 5_000
+DENSITY_THRESHOLD = 100_000
+DENSITY_BINS = 150
+LTTB_THRESHOLD = 2_000
 
-def plot_actual_vs_predicted(y_true: np.ndarray, y_pred: np.ndarray) -> go.Figure:
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Indices of the points kept by Largest-Triangle-Three-Buckets downsampling.
+    
+    The first and last points are always kept; the rest are split into
+    n_out - 2 buckets and each bucket keeps the point forming the largest
+    triangle with the previously kept point and the next bucket's mean, which
+    preserves peaks and troughs of the line.
+    
+    Args:
+        x: Sorted x values
+        y: y values
+        n_out: Number of points to keep
+    
+    Returns:
+        Sorted array of indices into x / y
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        selected[i + 1] = a
+    return selected
+
+
+def _scatter_trace(x: np.ndarray, y: np.ndarray, color: str, name: str, webgl_threshold: int):
+    """Marker trace, drawn with WebGL once there are too many points for SVG."""
+    trace_type = go.Scattergl if len(x) > webgl_threshold else go.Scatter
+    return trace_type(
+        x=x,
+        y=y,
+        mode='markers',
+        marker=dict(
+            size=6,
+            color=f'rgba({color}, 0.6)',
+            line=dict(color=f'rgba({color}, 1)', width=1)
+        ),
+        name=name
+    )
+
+
+def _bin_index(values: np.ndarray, bins: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Equal-width bin edges over the range of values, and each value's bin (the last bin is closed)."""
+    values = np.asarray(values, dtype=np.float64)
+    low, high = float(values.min()), float(values.max())
+    if low == high:
+        low, high = low - 0.5, high + 0.5
+    edges = np.linspace(low, high, bins + 1)
+    index = ((values - low) * (bins / (high - low))).astype(np.intp)
+    np.clip(index, 0, bins - 1, out=index)
+    return edges, index
+
+
+def _density_trace(x: np.ndarray, y: np.ndarray, bins: int, name: str) -> go.Heatmap:
+    """
+    2-D histogram of (x, y) binned with NumPy; only bin centers and counts are sent.
+    
+    Empty bins are NaN so they render transparent, like the background of a scatter plot.
+    """
+    x_edges, ix = _bin_index(x, bins)
+    y_edges, iy = _bin_index(y, bins)
+    # Same counts as np.histogram2d, several times faster on millions of points;
+    # float32 halves the payload and stays exact up to 2**24 points per bin
+    z = np.bincount(iy * bins + ix, minlength=bins * bins).reshape(bins, bins).astype(np.float32)
+    z[z == 0] = np.nan
+    return go.Heatmap(
+        x=(x_edges[:-1] + x_edges[1:]) / 2,
+        y=(y_edges[:-1] + y_edges[1:]) / 2,
+        z=z,
+        colorscale='Blues',
+        colorbar=dict(title='Points'),
+        hovertemplate='x: %{x:,.0f}<br>y: %{y:,.0f}<br>points: %{z:,.0f}<extra></extra>',
+        name=name
+    )
+
+
+def _points_trace(
+    x: np.ndarray,
+    y: np.ndarray,
+    color: str,
+    name: str,
+    webgl_threshold: int,
+    density_threshold: int,
+    bins: int
+):
+    if len(x) > density_threshold:
+        return _density_trace(x, y, bins, name)
+    return _scatter_trace(x, y, color, name, webgl_threshold)
+
+
+@timed()
+def plot_actual_vs_predicted(
+    y_true: np.ndarray,
+    y_pred: np.ndarray,
+    webgl_threshold: int = WEBGL_THRESHOLD,
+    density_threshold: int = DENSITY_THRESHOLD,
+    bins: int = DENSITY_BINS
+) -> go.Figure:
     """
     Create a scatter plot of actual vs predicted values.
     
     Args:
         y_true: Actual values
         y_pred: Predicted values
+        webgl_threshold: Above this many points, draw with Scattergl
+        density_threshold: Above this many points, draw a binned density heatmap
+        bins: Bins per axis of the density heatmap
     
     Returns:
         Plotly figure object
     """
     fig = go.Figure()
     
-    # Add scatter plot
-    fig.add_trace(go.Scatter(
-        x=y_true,
-        y=y_pred,
-        mode='markers',
-        marker=dict(
-            size=6,
-            color='rgba(100, 149, 237, 0.6)',
-            line=dict(color='rgba(100, 149, 237, 1)', width=1)
-        ),
-        name='Predictions'
+    # Add scatter plot (or its density once there are too many points to send)
+    fig.add_trace(_points_trace(
+        y_true, y_pred, '100, 149, 237', 'Predictions', webgl_threshold, density_threshold, bins
     ))
     
     # Add perfect prediction line
@@ -58,13 +175,23 @@ def plot_actual_vs_predicted(y_true: np.ndarray, y_pred: np.ndarray) -> go.Figur
     return fig
 
 
-def plot_residuals(y_true: np.ndarray, y_pred: np.ndarray) -> go.Figure:
+@timed()
+def plot_residuals(
+    y_true: np.ndarray,
+    y_pred: np.ndarray,
+    webgl_threshold: int = WEBGL_THRESHOLD,
+    density_threshold: int = DENSITY_THRESHOLD,
+    bins: int = DENSITY_BINS
+) -> go.Figure:
     """
     Create a residual plot for error analysis.
     
     Args:
         y_true: Actual values
         y_pred: Predicted values
+        webgl_threshold: Above this many points, draw with Scattergl
+        density_threshold: Above this many points, draw a binned density heatmap
+        bins: Bins per axis of the density heatmap
     
     Returns:
         Plotly figure object
@@ -73,16 +200,8 @@ def plot_residuals(y_true: np.ndarray, y_pred: np.ndarray) -> go.Figure:
     
     fig = go.Figure()
     
-    fig.add_trace(go.Scatter(
-        x=y_pred,
-        y=residuals,
-        mode='markers',
-        marker=dict(
-            size=6,
-            color='rgba(144, 238, 144, 0.6)',
-            line=dict(color='rgba(144, 238, 144, 1)', width=1)
-        ),
-        name='Residuals'
+    fig.add_trace(_points_trace(
+        y_pred, residuals, '144, 238, 144', 'Residuals', webgl_threshold, density_threshold, bins
     ))
     
     # Add zero line
@@ -101,40 +220,49 @@ def plot_residuals(y_true: np.ndarray, y_pred: np.ndarray) -> go.Figure:
     return fig
 
 
-def plot_actual_vs_predicted_line(y_true: np.ndarray, y_pred: np.ndarray, sample_size: int = 100) -> go.Figure:
+@timed()
+def plot_actual_vs_predicted_line(
+    y_true: np.ndarray,
+    y_pred: np.ndarray,
+    sample_size: int = 100,
+    max_points: int = LTTB_THRESHOLD
+) -> go.Figure:
     """
     Create a line plot comparing actual vs predicted values over samples.
     
     Args:
         y_true: Actual values
         y_pred: Predicted values
-        sample_size: Number of samples to plot
+        sample_size: Number of samples to plot (None = all)
+        max_points: Longer series are LTTB-downsampled to this many points each
     
     Returns:
         Plotly figure object
     """
-    indices = np.arange(min(sample_size, len(y_true)))
+    n = len(y_true) if sample_size is None else min(sample_size, len(y_true))
+    indices = np.arange(n)
+    downsampled = n > max_points
     
     fig = go.Figure()
     
-    fig.add_trace(go.Scatter(
-        x=indices,
-        y=y_true[:sample_size],
-        mode='lines+markers',
-        name='Actual',
-        line=dict(color='rgba(31, 119, 180, 0.8)', width=2)
-    ))
-    
-    fig.add_trace(go.Scatter(
-        x=indices,
-        y=y_pred[:sample_size],
-        mode='lines+markers',
-        name='Predicted',
-        line=dict(color='rgba(255, 127, 14, 0.8)', width=2)
-    ))
+    for values, name, color in ((y_true[:n], 'Actual', '31, 119, 180'),
+                                (y_pred[:n], 'Predicted', '255, 127, 14')):
+        keep = lttb_indices(indices, values, max_points) if downsampled else indices
+        fig.add_trace(go.Scatter(
+            x=indices[keep],
+            y=values[keep],
+            # Markers stop being readable long before the line does
+            mode='lines' if downsampled else 'lines+markers',
+            name=name,
+            line=dict(color=f'rgba({color}, 0.8)', width=2)
+        ))
+    
+    title = f'Actual vs Predicted (First {n:,} Samples)'
+    if downsampled:
+        title += f' - downsampled to {max_points:,} points'
     
     fig.update_layout(
-        title=f'Actual vs Predicted (First {sample_size} Samples)',
+        title=title,
         xaxis_title='Sample Index',
         yaxis_title='Traffic Volume',
         hovermode='x unified',
@@ -145,6 +273,7 @@ def plot_actual_vs_predicted_line(y_true: np.ndarray, y_pred: np.ndarray, sample
     return fig
 
 
+@timed()
 def plot_model_comparison(metrics_dict: dict, metric_name: str = 'MSE') -> go.Figure:
     """
     Create a bar chart comparing models based on a given metric.
@@ -186,23 +315,46 @@ def plot_model_comparison(metrics_dict: dict, metric_name: str = 'MSE') -> go.Fi
     return fig
 
 
-def plot_error_distribution(residuals: np.ndarray) -> go.Figure:
+def _histogram_trace(edges: np.ndarray, counts: np.ndarray, color: str, name: str) -> go.Bar:
+    """Bars for precomputed histogram bins: one bar per bin, spanning its edges."""
+    edges = np.asarray(edges, dtype=np.float64)
+    return go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2,
+        y=counts,
+        width=np.diff(edges),
+        customdata=np.column_stack([edges[:-1], edges[1:]]),
+        hovertemplate='%{customdata[0]:,.0f} to %{customdata[1]:,.0f}<br>Count: %{y:,}<extra></extra>',
+        marker=dict(color=color),
+        name=name
+    )
+
+
+@timed()
+def plot_error_distribution(
+    residuals: np.ndarray = None,
+    bins: int = 30,
+    histogram: Tuple[np.ndarray, np.ndarray] = None
+) -> go.Figure:
     """
     Create a histogram of residual distribution.
     
+    The bins are computed on the server (or passed in precomputed, e.g. from
+    PredictionCache.get_residual_histogram), so only bin counts are sent to
+    the browser.
+    
     Args:
-        residuals: Array of residuals
+        residuals: Array of residuals (ignored if histogram is given)
+        bins: Number of bins
+        histogram: Optional precomputed (bin edges, counts)
     
     Returns:
         Plotly figure object
     """
+    from .metrics_utils import compute_histogram
+    
+    edges, counts = histogram if histogram is not None else compute_histogram(residuals, bins)
     fig = go.Figure(data=[
-        go.Histogram(
-            x=residuals,
-            nbinsx=30,
-            marker=dict(color='rgba(100, 149, 237, 0.7)'),
-            name='Residuals'
-        )
+        _histogram_trace(edges, counts, 'rgba(100, 149, 237, 0.7)', 'Residuals')
     ])
     
     fig.update_layout(
@@ -211,12 +363,51 @@ def plot_error_distribution(residuals: np.ndarray) -> go.Figure:
         yaxis_title='Frequency',
         template='plotly_white',
         height=400,
-        showlegend=False
+        showlegend=False,
+        bargap=0
+    )
+    
+    return fig
+
+
+@timed()
+def plot_target_distribution(
+    y: np.ndarray = None,
+    bins: int = 30,
+    histogram: Tuple[np.ndarray, np.ndarray] = None
+) -> go.Figure:
+    """
+    Create a histogram of the target (traffic volume) distribution.
+    
+    Args:
+        y: Target values (ignored if histogram is given)
+        bins: Number of bins
+        histogram: Optional precomputed (bin edges, counts)
+    
+    Returns:
+        Plotly figure object
+    """
+    from .metrics_utils import compute_histogram
+    
+    edges, counts = histogram if histogram is not None else compute_histogram(y, bins)
+    fig = go.Figure(data=[
+        _histogram_trace(edges, counts, 'rgba(31, 119, 180, 0.7)', 'Traffic Volume')
+    ])
+    
+    fig.update_layout(
+        title="Traffic Volume Distribution",
+        xaxis_title="Traffic Volume",
+        yaxis_title="Frequency",
+        template='plotly_white',
+        height=400,
+        showlegend=False,
+        bargap=0
     )
     
     return fig
 
 
+@timed()
 def plot_feature_importance(importances: dict, top_n: int = 10) -> go.Figure:
     """
     Create a bar chart of feature importances.
@@ -0,0 +1,314 @@
+"""
+Opt-in profiling of dashboard reruns and training phases.
+
+Profiling is off unless switched on with the TRAFFIC_PROFILE environment
+variable or a --profile command-line flag:
+
+    TRAFFIC_PROFILE=1 streamlit run app.py
+    streamlit run app.py -- --profile=pyinstrument
+    python train_with_pipeline.py --profile
+
+Each profiled block (one Streamlit rerun, one training phase) writes:
+- <name>.collapsed: collapsed stacks ("frame;frame;frame microseconds"),
+  the input of flamegraph.pl, speedscope and inferno
+- <name>.prof: the raw cProfile stats (cProfile only; open with snakeviz
+  or pstats)
+- <name>.html: pyinstrument's interactive call tree (pyinstrument only)
+
+cProfile is always available. pyinstrument is optional (pip install
+pyinstrument); it samples real call stacks with lower overhead, while
+cProfile's collapsed stacks are reconstructed from caller/callee pairs.
+"""
+
+import cProfile
+import os
+import pstats
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+ENGINES = ('cprofile', 'pyinstrument')
+
+PROFILE_ENV_VAR = 'TRAFFIC_PROFILE'
+PROFILE_DIR_ENV_VAR = 'TRAFFIC_PROFILE_DIR'
+DEFAULT_PROFILE_DIR = 'profiles'
+
+# Stacks with less than this share of a profile's total time are dropped from
+# cProfile's reconstruction, which bounds the size of the output
+_MIN_STACK_SHARE = 1e-4
+
+
+def resolve_engine(value: Optional[str]) -> Optional[str]:
+    """
+    Map a switch value to a profiler engine.
+
+    Args:
+        value: '', '0', 'off' or None (disabled); '1', 'on', 'cprofile' or
+            'pyinstrument'
+
+    Returns:
+        'cprofile', 'pyinstrument' or None
+
+    Raises:
+        ValueError: If the value is not recognised
+    """
+    if value is None:
+        return None
+    value = value.strip().lower()
+    if value in ('', '0', 'off', 'false', 'no'):
+        return None
+    if value in ('1', 'on', 'true', 'yes'):
+        return 'cprofile'
+    if value in ENGINES:
+        return value
+    raise ValueError(f"Unknown profiler {value!r}; expected one of {ENGINES} or 1/0")
+
+
+def engine_from_environment(argv: Optional[List[str]] = None) -> Optional[str]:
+    """
+    Read the profiling switch from the command line, then from TRAFFIC_PROFILE.
+
+    Used by app.py, whose arguments are whatever follows `--` in
+    `streamlit run app.py -- --profile`. Scripts with an argparse parser
+    take --profile themselves and pass it to resolve_engine().
+
+    Args:
+        argv: Arguments to search (default: sys.argv[1:])
+
+    Returns:
+        'cprofile', 'pyinstrument' or None
+    """
+    for arg in (sys.argv[1:] if argv is None else argv):
+        if arg == '--profile':
+            return 'cprofile'
+        if arg.startswith('--profile='):
+            return resolve_engine(arg.split('=', 1)[1])
+    return resolve_engine(os.environ.get(PROFILE_ENV_VAR))
+
+
+def _frame_label(function: str, filename: str, line: int) -> str:
+    # ';' separates frames in a collapsed stack, so it can't appear in a label
+    if filename in ('', '~', '<built-in>'):
+        label = function
+    else:
+        # Keep the parent directory: sklearn alone has several _classes.py and _base.py
+        parent, name = os.path.split(filename)
+        label = f"{function} ({os.path.basename(parent)}/{name}:{line})"
+    return label.replace(';', ':')
+
+
+def collapse_cprofile(stats: pstats.Stats) -> Dict[Tuple[str, ...], float]:
+    """
+    Reconstruct collapsed stacks from cProfile statistics.
+
+    cProfile only records caller/callee pairs, not whole stacks, so a
+    function's time is split between its callers in proportion to the time
+    each of them spent calling it. Recursive edges are cut.
+
+    Args:
+        stats: pstats.Stats of one profile
+
+    Returns:
+        Dictionary mapping a stack (outermost frame first) to seconds spent
+        in its innermost frame
+    """
+    raw = stats.stats
+    children = defaultdict(list)
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller, edge in callers.items():
+            if caller in raw and caller != func:
+                children[caller].append((func, edge[3]))
+
+    roots = [func for func, entry in raw.items() if not any(c in raw and c != func for c in entry[4])]
+    total = sum(raw[func][3] for func in roots)
+    min_seconds = total * _MIN_STACK_SHARE
+    stacks = defaultdict(float)
+
+    def visit(func, seconds, path, on_path):
+        _, _, own, cumulative, _ = raw[func]
+        path = path + (_frame_label(func[2], func[0], func[1]),)
+        scale = seconds / cumulative if cumulative > 0 else 0.0
+        stacks[path] += own * scale
+        for child, edge_cumulative in children.get(func, ()):
+            child_seconds = edge_cumulative * scale
+            if child not in on_path and child_seconds >= min_seconds:
+                on_path.add(child)
+                visit(child, child_seconds, path, on_path)
+                on_path.discard(child)
+
+    for root in roots:
+        if raw[root][3] >= min_seconds:
+            visit(root, raw[root][3], (), {root})
+    return stacks
+
+
+def collapse_pyinstrument(session) -> Dict[Tuple[str, ...], float]:
+    """
+    Collapsed stacks of a pyinstrument session.
+
+    Args:
+        session: pyinstrument Session (Profiler.last_session)
+
+    Returns:
+        Dictionary mapping a stack (outermost frame first) to seconds spent
+        in its innermost frame
+    """
+    stacks = defaultdict(float)
+
+    def visit(frame, path):
+        # Synthetic frames ('[self]', '[await]') hold time spent in the parent itself
+        if getattr(frame, 'is_synthetic', False):
+            stacks[path] += frame.time
+            return
+        path = path + (_frame_label(frame.function, frame.file_path_short or '', frame.line_no or 0),)
+        own = frame.time - sum(child.time for child in frame.children)
+        if own > 0:
+            stacks[path] += own
+        for child in frame.children:
+            visit(child, path)
+
+    root = session.root_frame()
+    if root is not None:
+        visit(root, ())
+    return stacks
+
+
+def write_collapsed(stacks: Dict[Tuple[str, ...], float], path: str) -> None:
+    """
+    Write collapsed stacks, one "frame;frame;frame microseconds" line per stack.
+
+    Args:
+        stacks: Dictionary from collapse_cprofile() or collapse_pyinstrument()
+        path: Destination file
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        for stack, seconds in sorted(stacks.items()):
+            microseconds = int(round(seconds * 1e6))
+            if microseconds > 0:
+                f.write(f"{';'.join(stack)} {microseconds}\n")
+
+
+class Profiler:
+    """
+    Profiles named blocks and writes one set of output files per block.
+
+    A disabled Profiler (engine=None) does nothing, so call sites don't
+    need to check whether profiling is on.
+
+    Usage:
+        profiler = Profiler('cprofile', 'profiles/train-20240101-120000')
+        profiler.start_phase('1-load-data')
+        ...
+        profiler.start_phase('2-features')   # writes 1-load-data.*
+        ...
+        profiler.finish()                    # writes 2-features.*
+    """
+
+    def __init__(self, engine: Optional[str], output_dir: Optional[str] = None):
+        """
+        Args:
+            engine: 'cprofile', 'pyinstrument' or None (disabled); falls back
+                to cProfile if pyinstrument isn't installed
+            output_dir: Directory for the output files (default: TRAFFIC_PROFILE_DIR
+                or 'profiles'); created on first write
+        """
+        if engine == 'pyinstrument':
+            try:
+                import pyinstrument  # noqa: F401
+            except ImportError:
+                print("⚠️  pyinstrument is not installed; profiling with cProfile instead")
+                engine = 'cprofile'
+        self.engine = engine
+        self.output_dir = output_dir or os.environ.get(PROFILE_DIR_ENV_VAR, DEFAULT_PROFILE_DIR)
+        self.written = []
+        self._active = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.engine is not None
+
+    def _start(self, name: str) -> None:
+        if self.engine == 'pyinstrument':
+            from pyinstrument import Profiler as SamplingProfiler
+
+            profile = SamplingProfiler(interval=0.001)
+            profile.start()
+        else:
+            profile = cProfile.Profile()
+            profile.enable()
+        self._active = (name, profile)
+
+    def _stop(self) -> Optional[str]:
+        if self._active is None:
+            return None
+        name, profile = self._active
+        self._active = None
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, name)
+
+        if self.engine == 'pyinstrument':
+            profile.stop()
+            session = profile.last_session
+            write_collapsed(collapse_pyinstrument(session), base + '.collapsed')
+            with open(base + '.html', 'w', encoding='utf-8') as f:
+                f.write(profile.output_html())
+        else:
+            profile.disable()
+            profile.dump_stats(base + '.prof')
+            write_collapsed(collapse_cprofile(pstats.Stats(profile)), base + '.collapsed')
+        self.written.append(base + '.collapsed')
+        return base + '.collapsed'
+
+    def start_phase(self, name: str) -> None:
+        """
+        Finish the current phase (writing its files) and start profiling the next.
+
+        Args:
+            name: File name stem of the new phase (e.g. '1-load-data')
+        """
+        if not self.enabled:
+            return
+        self._stop()
+        self._start(name)
+
+    def finish(self) -> Optional[str]:
+        """
+        Stop profiling and write the current phase's files.
+
+        Returns:
+            Path of the phase's .collapsed file, or None if nothing was being profiled
+        """
+        return self._stop() if self.enabled else None
+
+    @contextmanager
+    def profile(self, name: str) -> Iterator[None]:
+        """
+        Profile a block and write its files when it ends (even if it raises).
+
+        Args:
+            name: File name stem (e.g. 'rerun-20240101-120000-123456')
+        """
+        if not self.enabled:
+            yield
+            return
+        self._start(name)
+        try:
+            yield
+        finally:
+            self._stop()
+
+
+def run_id(prefix: str) -> str:
+    """
+    Unique, sortable name for a profiled run.
+
+    Args:
+        prefix: e.g. 'train' or 'rerun'
+
+    Returns:
+        '<prefix>-YYYYmmdd-HHMMSS-<microseconds>'
+    """
+    now = time.time()
+    return f"{prefix}-{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}-{int(now % 1 * 1e6):06d}"
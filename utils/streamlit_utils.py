@@ -0,0 +1,41 @@
+"""
+Streamlit adapter for the framework-neutral model utilities.
+Only the dashboard imports this module; everything else in utils works
+without Streamlit installed.
+"""
+
+import streamlit as st
+from typing import Dict, Any
+
+from .model_utils import get_default_registry, get_model_path
+
+
+def load_model(model_name: str) -> Any:
+    """
+    Load a trained pipeline model through the shared registry, reporting
+    missing files in the Streamlit UI.
+    
+    Args:
+        model_name: Name of the model to load
+    
+    Returns:
+        Loaded sklearn.pipeline.Pipeline object, or None if the file is missing
+    """
+    try:
+        return get_default_registry().get(model_name)
+    except FileNotFoundError:
+        st.error(f"Model pipeline file not found: {get_model_path(model_name)}")
+        return None
+
+
+def load_all_models(model_names: list) -> Dict[str, Any]:
+    """
+    Load multiple pipeline models at once, reporting missing files in the UI.
+    
+    Args:
+        model_names: List of model names to load
+    
+    Returns:
+        Dictionary mapping model names to loaded pipeline objects
+    """
+    return {model_name: load_model(model_name) for model_name in model_names}
@@ -0,0 +1,498 @@
+"""
+Training helpers: out-of-core streaming and parallel model fitting.
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, RegressorMixin, clone
+
+from .metrics_utils import calculate_metrics
+
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """
+    Hash every row of a DataFrame (values only, index ignored).
+
+    Args:
+        df: DataFrame to hash
+
+    Returns:
+        uint64 array with one hash per row
+    """
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def _mix64(values: np.ndarray) -> np.ndarray:
+    # splitmix64 finalizer: derives an independent second hash from the first
+    values = values.copy()
+    values ^= values >> np.uint64(30)
+    values *= np.uint64(0xBF58476D1CE4E5B9)
+    values ^= values >> np.uint64(27)
+    values *= np.uint64(0x94D049BB133111EB)
+    values ^= values >> np.uint64(31)
+    return values
+
+
+class HashDeduplicator:
+    """
+    Drops rows already seen in earlier chunks, using row hashes.
+
+    'exact' keeps every 64-bit row hash in a set (8 bytes of payload per
+    unique row, collisions are negligible). 'bloom' keeps a fixed-size Bloom
+    filter instead: memory doesn't grow with the data, at the cost of
+    dropping a small fraction (error_rate) of unique rows as false duplicates.
+
+    Usage:
+        dedup = HashDeduplicator('bloom', capacity=500_000_000)
+        for chunk in chunks:
+            chunk = chunk[dedup.first_occurrences(row_hashes(chunk))]
+    """
+
+    def __init__(self, method: str = 'exact', capacity: int = 10_000_000, error_rate: float = 1e-4):
+        """
+        Args:
+            method: 'exact' or 'bloom'
+            capacity: Expected number of unique rows (sizes the Bloom filter)
+            error_rate: Target false-positive rate of the Bloom filter
+        """
+        if method not in ('exact', 'bloom'):
+            raise ValueError(f"Unknown dedup method: {method}")
+        self.method = method
+        self.n_seen = 0
+        self.n_dropped = 0
+
+        if method == 'exact':
+            self._seen = set()
+        else:
+            n_bits = int(np.ceil(-capacity * np.log(error_rate) / np.log(2) ** 2))
+            self.n_bits = max(n_bits, 64)
+            self.n_hashes = max(1, int(round(self.n_bits / capacity * np.log(2))))
+            self._bits = np.zeros((self.n_bits + 7) // 8, dtype=np.uint8)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the filter or hash set."""
+        if self.method == 'exact':
+            return sys.getsizeof(self._seen) + 32 * len(self._seen)
+        return self._bits.nbytes
+
+    def _bloom_positions(self, hashes: np.ndarray) -> np.ndarray:
+        # Double hashing: position_i = h1 + i * h2 (mod n_bits)
+        h1 = hashes
+        h2 = _mix64(hashes) | np.uint64(1)
+        steps = np.arange(self.n_hashes, dtype=np.uint64)
+        return (h1[:, None] + steps[None, :] * h2[:, None]) % np.uint64(self.n_bits)
+
+    def first_occurrences(self, hashes: np.ndarray) -> np.ndarray:
+        """
+        Mark rows whose hash hasn't been seen before, then remember them.
+
+        Args:
+            hashes: uint64 row hashes of one chunk (see row_hashes)
+
+        Returns:
+            Boolean mask, True for rows to keep
+        """
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        keep = np.zeros(len(hashes), dtype=bool)
+        unique_hashes, first_index = np.unique(hashes, return_index=True)
+
+        if self.method == 'exact':
+            new = np.fromiter(
+                (h not in self._seen for h in unique_hashes.tolist()),
+                dtype=bool, count=len(unique_hashes)
+            )
+            self._seen.update(unique_hashes[new].tolist())
+        else:
+            positions = self._bloom_positions(unique_hashes)
+            is_set = (self._bits[positions >> np.uint64(3)] >> (positions & np.uint64(7)).astype(np.uint8)) & 1
+            new = ~is_set.all(axis=1)
+            new_positions = positions[new].ravel()
+            np.bitwise_or.at(
+                self._bits, new_positions >> np.uint64(3),
+                (np.uint8(1) << (new_positions & np.uint64(7)).astype(np.uint8))
+            )
+
+        keep[first_index[new]] = True
+        self.n_seen += len(hashes)
+        self.n_dropped += len(hashes) - int(keep.sum())
+        return keep
+
+
+class ScaledTargetRegressor(BaseEstimator, RegressorMixin):
+    """
+    Wraps an incremental regressor so it learns a standardized target.
+
+    SGD diverges on raw traffic volumes (thousands of vehicles); fitting
+    (y - y_mean) / y_scale keeps the steps well-conditioned. The target
+    statistics come from a streaming pass, so this works with partial_fit.
+    """
+
+    def __init__(self, regressor=None, y_mean: float = 0.0, y_scale: float = 1.0):
+        self.regressor = regressor
+        self.y_mean = y_mean
+        self.y_scale = y_scale
+
+    def partial_fit(self, X, y):
+        """Update the wrapped regressor with one chunk."""
+        if not hasattr(self, 'regressor_'):
+            self.regressor_ = clone(self.regressor)
+        self.regressor_.partial_fit(X, (np.asarray(y, dtype=np.float64) - self.y_mean) / self.y_scale)
+        return self
+
+    def fit(self, X, y):
+        """Fit from scratch on in-memory data."""
+        self.regressor_ = clone(self.regressor)
+        self.regressor_.fit(X, (np.asarray(y, dtype=np.float64) - self.y_mean) / self.y_scale)
+        return self
+
+    def predict(self, X):
+        """Predict on the original target scale."""
+        return self.regressor_.predict(X) * self.y_scale + self.y_mean
+
+
+def peak_memory_mb() -> float:
+    """
+    Peak resident memory of this process in MB.
+
+    Returns:
+        Peak RSS in MB, or NaN where the resource module is unavailable (Windows)
+    """
+    try:
+        import resource
+    except ImportError:
+        return float('nan')
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 1024
+
+
+# ============================================================================
+# PARALLEL MODEL FITTING
+# ============================================================================
+
+class SharedArray:
+    """
+    A NumPy array placed in shared memory so worker processes can map it
+    instead of receiving a pickled copy.
+
+    The creating process owns the block and must call unlink(); workers
+    attach with SharedArray.attach(handle) and only close() their mapping.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, shape: tuple, dtype: np.dtype, owner: bool):
+        self._shm = shm
+        self.owner = owner
+        self.array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+    @classmethod
+    def create(cls, array: np.ndarray) -> 'SharedArray':
+        """Copy an array into a new shared memory block."""
+        array = np.ascontiguousarray(array)
+        shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        shared = cls(shm, array.shape, array.dtype, owner=True)
+        shared.array[...] = array
+        return shared
+
+    @property
+    def handle(self) -> tuple:
+        """Picklable (name, shape, dtype) used by workers to attach."""
+        return (self._shm.name, self.array.shape, self.array.dtype.str)
+
+    @classmethod
+    def attach(cls, handle: tuple) -> 'SharedArray':
+        """Map an existing block created by another process."""
+        name, shape, dtype = handle
+        return cls(shared_memory.SharedMemory(name=name), shape, np.dtype(dtype), owner=False)
+
+    def close(self) -> None:
+        self.array = None
+        self._shm.close()
+
+    def unlink(self) -> None:
+        self.close()
+        if self.owner:
+            self._shm.unlink()
+
+
+def _fit_and_score(model, X_train, y_train, X_test, y_test) -> dict:
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_wall = time.perf_counter() - wall_start
+
+    predict_start = time.perf_counter()
+    y_pred_train = model.predict(X_train)
+    y_pred_test = model.predict(X_test)
+    predict_wall = time.perf_counter() - predict_start
+
+    return {
+        'model': model,
+        'train_metrics': calculate_metrics(y_train, y_pred_train),
+        'test_metrics': calculate_metrics(y_test, y_pred_test),
+        'fit_seconds': fit_wall,
+        'predict_seconds': predict_wall,
+        'cpu_seconds': time.process_time() - cpu_start,
+        'pid': os.getpid()
+    }
+
+
+def matrix_nbytes(X) -> int:
+    """
+    Memory held by a dense array or a scipy sparse matrix.
+
+    Args:
+        X: NumPy array or scipy.sparse matrix
+
+    Returns:
+        Size in bytes (data plus index arrays for sparse matrices)
+    """
+    if hasattr(X, 'indptr'):
+        return X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+    return np.asarray(X).nbytes
+
+
+def _share_matrix(X) -> tuple:
+    """Copy a dense array or CSR matrix into shared memory: (blocks, handle)."""
+    if hasattr(X, 'indptr'):
+        X = X.tocsr()
+        blocks = [SharedArray.create(X.data), SharedArray.create(X.indices), SharedArray.create(X.indptr)]
+        return blocks, ('csr', X.shape, [block.handle for block in blocks])
+    block = SharedArray.create(X)
+    return [block], ('dense', block.handle)
+
+
+def _attach_matrix(handle: tuple, blocks: list):
+    """Rebuild a matrix from _share_matrix's handle, appending the mapped blocks to blocks."""
+    if handle[0] == 'csr':
+        from scipy import sparse
+
+        _, shape, block_handles = handle
+        data, indices, indptr = (SharedArray.attach(h) for h in block_handles)
+        blocks.extend([data, indices, indptr])
+        return sparse.csr_matrix((data.array, indices.array, indptr.array), shape=shape, copy=False)
+    block = SharedArray.attach(handle[1])
+    blocks.append(block)
+    return block.array
+
+
+def _fit_candidate(name: str, model, handles: dict) -> dict:
+    """
+    Fit one model on the shared design matrices and evaluate it.
+
+    Runs in a worker process (or inline when n_jobs == 1).
+    """
+    blocks = []
+    try:
+        # Views into shared memory must be released before the mapping is closed,
+        # so the matrices are only referenced for the duration of _fit_and_score
+        result = _fit_and_score(
+            model,
+            _attach_matrix(handles['X_train'], blocks), _attach_matrix(handles['y_train'], blocks),
+            _attach_matrix(handles['X_test'], blocks), _attach_matrix(handles['y_test'], blocks)
+        )
+    finally:
+        for block in blocks:
+            block.close()
+    result['name'] = name
+    return result
+
+
+def fit_models_parallel(
+    models: dict,
+    X_train: np.ndarray,
+    y_train: np.ndarray,
+    X_test: np.ndarray,
+    y_test: np.ndarray,
+    n_jobs: int = None
+) -> Dict[str, dict]:
+    """
+    Fit candidate models concurrently on an already-preprocessed matrix.
+
+    The encoded train/test matrices are copied into shared memory once;
+    every worker maps them rather than re-encoding or unpickling its own copy.
+    CSR matrices are shared as their data/indices/indptr arrays.
+
+    Args:
+        models: Dictionary of {model_name: unfitted estimator}
+        X_train: Encoded training matrix (dense array or scipy.sparse)
+        y_train: Training targets
+        X_test: Encoded test matrix (dense array or scipy.sparse)
+        y_test: Test targets
+        n_jobs: Worker processes (default: one per model, capped at the CPU count)
+
+    Returns:
+        Dictionary of {model_name: result} in the order of models, where each
+        result holds the fitted 'model', 'train_metrics', 'test_metrics' and
+        'fit_seconds' / 'predict_seconds' / 'cpu_seconds' timings
+    """
+    n_jobs = n_jobs or min(len(models), os.cpu_count() or 1)
+    blocks, handles, results = [], {}, {}
+    try:
+        for key, matrix in (('X_train', X_train), ('y_train', np.asarray(y_train, dtype=np.float64)),
+                            ('X_test', X_test), ('y_test', np.asarray(y_test, dtype=np.float64))):
+            matrix_blocks, handles[key] = _share_matrix(matrix)
+            blocks.extend(matrix_blocks)
+
+        if n_jobs == 1:
+            for name, model in models.items():
+                results[name] = _fit_candidate(name, model, handles)
+        else:
+            with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                futures = [executor.submit(_fit_candidate, name, model, handles)
+                           for name, model in models.items()]
+                for future in as_completed(futures):
+                    result = future.result()
+                    results[result['name']] = result
+    finally:
+        for block in blocks:
+            block.unlink()
+
+    return {name: results[name] for name in models}
+
+
+# ============================================================================
+# SIZE/LATENCY BUDGET SEARCH
+# ============================================================================
+
+def _latency_ms(predict, rows: list, calls: int) -> np.ndarray:
+    predict(rows[0])  # warm up
+    timings = np.empty(calls)
+    for i in range(calls):
+        start = time.perf_counter()
+        predict(rows[i % len(rows)])
+        timings[i] = time.perf_counter() - start
+    return timings * 1000
+
+
+def search_forest_budget(
+    X_train: np.ndarray,
+    y_train: np.ndarray,
+    X_val: np.ndarray,
+    y_val: np.ndarray,
+    preprocessor,
+    sample_rows: list,
+    n_estimators: tuple = (25, 50, 100),
+    max_depths: tuple = (None, 20, 14, 10),
+    min_samples_leaf: tuple = (1, 5, 20),
+    max_artifact_mb: float = None,
+    max_p99_ms: float = None,
+    latency_calls: int = 200,
+    random_state: int = 42,
+    n_jobs: int = None
+) -> List[dict]:
+    """
+    Score Random Forest settings on accuracy, artifact size and single-row latency.
+
+    One forest with max(n_estimators) trees is fitted per (max_depth,
+    min_samples_leaf). Smaller tree counts are evaluated on its first k trees,
+    which are exactly the trees a forest with n_estimators=k and the same
+    random_state would grow. Size is that of the compiled artifact (packed
+    node arrays); latency is the compiled predictor on single raw rows.
+
+    Args:
+        X_train: Encoded training matrix (dense or CSR)
+        y_train: Training targets
+        X_val: Encoded validation matrix (dense or CSR), held out from the
+            training data; keep the test set for scoring the chosen setting
+        y_val: Validation targets
+        preprocessor: Fitted ColumnTransformer that produced X_train / X_val
+        sample_rows: Raw rows (dicts) used for latency measurements
+        n_estimators: Tree counts to evaluate
+        max_depths: Depth limits to evaluate (None = unlimited)
+        min_samples_leaf: Leaf size limits to evaluate
+        max_artifact_mb: Largest acceptable artifact size (None = no limit)
+        max_p99_ms: Largest acceptable p99 single-row latency (None = no limit)
+        latency_calls: Single-row predictions timed per candidate
+        random_state: Seed shared by every candidate forest
+        n_jobs: Worker threads used to fit each forest
+
+    Returns:
+        One dict per candidate with its parameters, 'val_r2', 'val_mae',
+        'artifact_mb', 'p50_ms', 'p99_ms', 'fit_seconds' and 'feasible'
+    """
+    import copy
+
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.pipeline import Pipeline
+
+    from .inference_utils import PackedForest, compile_pipeline
+
+    from scipy import sparse
+
+    y_val = np.asarray(y_val, dtype=np.float64)
+    # Trees predict on float32; convert once instead of once per estimator.predict call
+    if sparse.issparse(X_val):
+        X_val32 = sparse.csr_matrix(X_val, dtype=np.float32)
+    else:
+        X_val32 = np.asarray(X_val, dtype=np.float32)
+    tree_counts = sorted(set(n_estimators))
+    candidates = []
+    for max_depth in max_depths:
+        for leaf in min_samples_leaf:
+            forest = RandomForestRegressor(
+                n_estimators=tree_counts[-1], max_depth=max_depth, min_samples_leaf=leaf,
+                random_state=random_state, n_jobs=n_jobs
+            )
+            start = time.perf_counter()
+            forest.fit(X_train, y_train)
+            fit_seconds = time.perf_counter() - start
+
+            # Running sum of per-tree predictions, accumulated in estimator order like forest.predict
+            running = np.zeros(X_val32.shape[0])
+            prefix_sums = {}
+            for i, estimator in enumerate(forest.estimators_, start=1):
+                running += estimator.predict(X_val32)
+                if i in tree_counts:
+                    prefix_sums[i] = running.copy()
+
+            for k in tree_counts:
+                sliced = copy.copy(forest)
+                sliced.estimators_ = forest.estimators_[:k]
+                sliced.n_estimators = k
+                metrics = calculate_metrics(y_val, prefix_sums[k] / k)
+                compiled = compile_pipeline(Pipeline([('preprocessor', preprocessor), ('model', sliced)]))
+                latency = _latency_ms(compiled.predict, sample_rows, latency_calls)
+                artifact_mb = PackedForest.from_estimator(sliced).nbytes / 2**20
+                p50, p99 = np.percentile(latency, [50, 99])
+                candidates.append({
+                    'n_estimators': k,
+                    'max_depth': max_depth,
+                    'min_samples_leaf': leaf,
+                    'val_r2': metrics['R2 Score'],
+                    'val_mae': metrics['MAE'],
+                    'artifact_mb': artifact_mb,
+                    'p50_ms': p50,
+                    'p99_ms': p99,
+                    'fit_seconds': fit_seconds,
+                    'feasible': ((max_artifact_mb is None or artifact_mb <= max_artifact_mb)
+                                 and (max_p99_ms is None or p99 <= max_p99_ms))
+                })
+    return candidates
+
+
+def pareto_front(candidates: List[dict], maximize: str = 'val_r2', minimize: str = 'p99_ms') -> List[dict]:
+    """
+    Candidates not beaten on both objectives by any other candidate.
+
+    Args:
+        candidates: Dicts as returned by search_forest_budget
+        maximize: Key of the objective to maximize (accuracy)
+        minimize: Key of the objective to minimize (cost)
+
+    Returns:
+        Pareto-optimal candidates, cheapest first
+    """
+    front = []
+    best = -np.inf
+    for candidate in sorted(candidates, key=lambda c: (c[minimize], -c[maximize])):
+        if candidate[maximize] > best:
+            front.append(candidate)
+            best = candidate[maximize]
+    return front
@@ -6,8 +6,8 @@ import sys
 import os
 from pathlib import Path
 
-# Add project to path
-project_root = r'c:\Users\jains\OneDrive\Desktop\Trffic'
+# Add project to path (the directory this script lives in)
+project_root = str(Path(__file__).resolve().parent)
 sys.path.insert(0, project_root)
 os.chdir(project_root)
 